@@ -1,61 +1,723 @@
-from fastapi import APIRouter
+import copy
+import os
+import queue
+import threading
+import time
+from typing import Union
 
-from src.behavior_features import load_transactions, build_user_behavior
-from src.anomaly_detector import detect_anomalies
-from src.transaction_graph import build_transaction_graph, detect_graph_anomalies
-from src.temporal_detector import detect_temporal_anomalies
-from src.risk_engine import compute_final_risk
+import numpy as np
+from fastapi import APIRouter, Body, HTTPException
+
+from src.symbols import SYMBOLS, active_accounts, batch_size, concat_batches
+from src.anomaly_detector import save_behavior_model
+from src.sketches import SKETCH_MODE, CounterpartySketches
+from src.risk_engine import (
+    compute_final_risk,
+    decode_final_risk,
+    get_fusion_engine,
+    RISK_LEVELS
+)
 from src.explainability import generate_explanation
-from src.fraud_simulator import inject_fraud
+from src.realtime_scoring import ScoringState, MicroBatcher, normalize_transaction
+from src.alerts import AlertEngine, pipeline_alerts
+from src.monitoring import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, MonitoringView
+from src.risk_evolution import EXPLANATIONS, HISTORY_TICKS, STATUSES, RiskEvolution
+from src.storage import FILE_PATH, TransactionWriter, StoreFull, encode_rows
+from src.tracing import current_span, span, traced
+# Detector engines (pandas / SciPy / sklearn) load on first use
+from src.engines import engines
 
 router = APIRouter(prefix="/aml", tags=["AML"])
 
-# 🔥 Toggle fraud simulation here
-SIMULATE_FRAUD = True
+# 🔥 Toggle fraud simulation here (demo only, off in serving)
+SIMULATE_FRAUD = os.environ.get("NEUROAML_SIMULATE_FRAUD") == "1"
 
+# Hash-partitioned multi-process mode when > 1 (see src/sharding.py)
+SHARDS = int(os.environ.get("NEUROAML_SHARDS", "0"))
 
-def run_aml_pipeline():
-    transactions = load_transactions()
+# Snapshot warm start and catch-up (see src/snapshot.py); 0 disables
+SNAPSHOTS = os.environ.get("NEUROAML_SNAPSHOTS", "1") != "0"
 
-    if SIMULATE_FRAUD:
-        transactions = inject_fraud(transactions)
+# A catch-up refits the behaviour model once the store grew this much
+MODEL_REFIT_GROWTH = 0.2
 
-    behavior_profiles = build_user_behavior(transactions)
-    behavior_risk = detect_anomalies(behavior_profiles)
+# A failed catch-up is retried after this delay, doubling up to the max
+CATCH_UP_RETRY_S = 1.0
+CATCH_UP_MAX_RETRY_S = 300.0
 
-    graph = build_transaction_graph(transactions)
-    graph_risk = detect_graph_anomalies(graph)
+# /aml/score answers 503 when a batch takes longer than this
+SCORE_TIMEOUT_S = 30
 
-    temporal_risk = detect_temporal_anomalies(transactions)
+# POST /aml/transactions answers 503 when a commit takes longer than this
+INGEST_TIMEOUT_S = 30
 
-    final_risk = compute_final_risk(
-        behavior_risk,
-        graph_risk,
-        temporal_risk
-    )
 
-    return behavior_risk, graph_risk, final_risk
+@traced("pipeline.build")
+def build_pipeline_state(path=None, base=None):
+    """
+    Pipeline state over the whole store. Given a previous state as
+    base, only the rows after its watermark are parsed and its
+    behaviour model is reused until the store has grown by
+    MODEL_REFIT_GROWTH.
+    """
+
+    model, model_rows = None, 0
+    build = current_span().set(mode="cold" if base is None else "catch_up")
+
+    if base is None:
+        with span("pipeline.load") as load:
+            transactions, watermark = engines.load_transaction_range(path)
+            load.set(rows=batch_size(transactions), bytes=watermark)
+
+        if SIMULATE_FRAUD:
+            transactions = engines.inject_fraud(transactions)
+    else:
+        with span("pipeline.load", start=base["watermark"]) as load:
+            tail, watermark = engines.load_transaction_range(path, base["watermark"])
+            transactions = concat_batches(base["transactions"], tail)
+            load.set(rows=batch_size(tail), bytes=watermark - base["watermark"])
+
+        if batch_size(transactions) <= base["model_rows"] * (1 + MODEL_REFIT_GROWTH):
+            model, model_rows = base["behavior_model"], base["model_rows"]
+
+    build.set(rows=batch_size(transactions), model="reused" if model is not None else "fitted")
+
+    # Every stage works on account codes; arrays are aligned to the table
+    n_accounts = len(SYMBOLS.accounts)
+
+    if SHARDS > 1:
+        # Shards fit the model on the merged profiles
+        model = None
+        with span("pipeline.sharded", shards=SHARDS):
+            layers = engines.run_sharded_pipeline(
+                transactions, SYMBOLS, SHARDS, sketch_mode=SKETCH_MODE
+            )
+    else:
+        linkage_indexes = None
+        if base is not None:
+            # Fold the new rows into a copy of the served device index
+            devices = copy.copy(base["linkage_indexes"]["devices"])
+            devices.update(tail["sender_id"], tail["device_id"])
+            linkage_indexes = {"devices": devices}
+
+        sketches = None
+        if SKETCH_MODE:
+            # Optional bounded-memory distinct counts (NEUROAML_SKETCH_MODE=1)
+            if base is not None and base["sketches"] is not None:
+                # Sketches are mergeable: fold in the new rows only
+                sketches = copy.deepcopy(base["sketches"])
+                sketches.update(tail)
+            else:
+                sketches = CounterpartySketches()
+                sketches.update(transactions)
+
+        layers = engines.run_layers(
+            transactions, n_accounts, len(SYMBOLS.devices), sketches, model=model,
+            linkage_indexes=linkage_indexes
+        )
+
+    behavior_model = layers["behavior_model"]
+
+    # Persisted for the real-time scoring path. Builds over an explicit
+    # path (ad-hoc runs, benchmarks) never replace the served model
+    model_version = None
+    if model is not None:
+        model_version = base["model_version"]
+    elif behavior_model is not None and path is None:
+        with span("pipeline.save_model"):
+            model_version = save_behavior_model(behavior_model)
+    if model is None and behavior_model is not None:
+        model_rows = batch_size(transactions)
+    build.set(model_version=model_version, accounts=n_accounts)
+
+    # Continuous network risk: PageRank from confirmed / anomalous seeds
+    with span("pipeline.network_risk"):
+        seeds = engines.seed_vector(
+            n_accounts, engines.load_confirmed_accounts(SYMBOLS), layers["behavior_risk"]
+        )
+        network_risk = engines.propagate_network_risk(layers["graph"], seeds)
+
+    with span("pipeline.cycles") as stage:
+        cycles = engines.detect_cycles(transactions, n_accounts)
+        stage.set(cycles=len(cycles["cycles"]), truncated=cycles["truncated"])
+
+    # Sampled betweenness, cached per graph generation
+    with span("pipeline.betweenness"):
+        betweenness = engines.approximate_betweenness(layers["graph"])
+
+    with span("pipeline.fusion"):
+        final_risk = compute_final_risk(
+            layers["behavior_risk"],
+            layers["graph_risk"],
+            layers["temporal_risk"],
+            layers["device_linkage"]["linkage_risk"],
+            propagation=network_risk,
+            cycle_risk=cycles["cycle_risk"]
+        )
+
+    return {
+        "symbols": SYMBOLS,
+        "transactions": transactions,
+        "accounts": np.flatnonzero(active_accounts(transactions, n_accounts)),
+        "watermark": watermark,
+        "behavior_profiles": layers["behavior_profiles"],
+        "behavior_model": behavior_model,
+        "model_version": model_version,
+        "model_rows": model_rows,
+        "graph": layers["graph"],
+        "sketches": layers["sketches"],
+        "behavior_risk": layers["behavior_risk"],
+        "graph_risk": layers["graph_risk"],
+        "network_risk": network_risk,
+        "temporal_risk": layers["temporal_risk"],
+        "linkage_indexes": layers["linkage_indexes"],
+        "device_linkage": layers["device_linkage"],
+        "cycles": cycles,
+        "betweenness": betweenness,
+        "final_risk": final_risk,
+        # Scores of the state this one caught up from (monitoring movers)
+        "previous_risk_score": base["final_risk"]["risk_score"] if base else None
+    }
+
+
+# -----------------------------------------------------
+# Served State
+# -----------------------------------------------------
+_state = None
+_state_lock = threading.Lock()
+_catch_up = None
+_catch_up_failures = 0
+_catch_up_retry_at = 0.0
+_catch_up_error = None
+_view = None
+
+
+def _publish(state):
+    global _state, _view
+
+    previous = _state
+    if SNAPSHOTS:
+        with span("state.save_snapshot"):
+            engines.save_snapshot(state, FILE_PATH)
+    with span("state.monitoring_view"):
+        _view = MonitoringView(state)
+    _state = state
+    _refresh_scorer(state)
+
+    # Detector hits new since the previous state; repeats fold into open alerts
+    with span("state.alerts") as stage:
+        results = get_alert_engine().submit_many(pipeline_alerts(state, previous))
+        stage.set(records=len(results))
+
+
+def _run_catch_up(base):
+    global _catch_up, _catch_up_failures, _catch_up_retry_at, _catch_up_error
+
+    try:
+        with span("state.catch_up", start=base["watermark"]):
+            state = build_pipeline_state(base=base)
+            if state["watermark"] > base["watermark"]:
+                _publish(state)
+        _catch_up_failures, _catch_up_error = 0, None
+    except Exception as error:
+        # Keep serving the current state; retry later, not on every request
+        _catch_up_failures += 1
+        _catch_up_error = f"{type(error).__name__}: {error}"
+        delay = min(CATCH_UP_RETRY_S * 2 ** (_catch_up_failures - 1), CATCH_UP_MAX_RETRY_S)
+        _catch_up_retry_at = time.monotonic() + delay
+    finally:
+        _catch_up = None
+
+
+def get_pipeline_state():
+    """
+    State served by the endpoints. The first call maps the last
+    snapshot (or builds one); rows appended to the store later are
+    folded in by a background catch-up while the current state keeps
+    serving.
+    """
+
+    global _state, _catch_up
+
+    waiting = time.perf_counter()
+    with _state_lock:
+        waited_ms = (time.perf_counter() - waiting) * 1000
+        if waited_ms >= 1:
+            # e.g. a request queued behind the startup snapshot load
+            current_span().set(state_wait_ms=round(waited_ms, 1))
+
+        size = os.path.getsize(FILE_PATH)
+
+        if _state is None and SNAPSHOTS:
+            with span("state.load_snapshot") as stage:
+                state = engines.load_snapshot(FILE_PATH, SYMBOLS)
+                hit = state is not None and state["watermark"] <= size
+                stage.set(cache="hit" if hit else "miss")
+            if hit:
+                _state = state
+
+        if _state is None or _state["watermark"] > size:
+            # No usable snapshot, or the store was replaced
+            with span("state.cold_start"):
+                _publish(build_pipeline_state())
+
+        if (_catch_up is None and size > _state["watermark"]
+                and time.monotonic() >= _catch_up_retry_at):
+            _catch_up = threading.Thread(
+                target=_run_catch_up, args=(_state,), daemon=True
+            )
+            _catch_up.start()
+
+        return _state
+
+
+def get_monitoring_view():
+    """
+    Aggregates and sort orders for the served state, rebuilt only when
+    a new state is published.
+    """
+
+    global _view
+
+    state = get_pipeline_state()
+    view = _view
+    if view is None or view.state is not state:
+        with span("state.monitoring_view"):
+            view = _view = MonitoringView(state)
+    return view
+
+
+def run_aml_pipeline():
+    state = get_pipeline_state()
+    return state["behavior_risk"], state["graph_risk"], state["final_risk"]
 
 
 @router.get("/risk-report")
 def risk_report():
-    _, _, final_risk = run_aml_pipeline()
-    return final_risk
+    state = get_pipeline_state()
+    return decode_final_risk(
+        state["final_risk"], state["accounts"], state["symbols"]
+    )
+
+
+@router.get("/summary")
+def summary():
+    return get_monitoring_view().summary()
+
+
+@router.get("/accounts")
+def accounts(
+    offset: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+    sort: str = "risk_score",
+    order: str = "desc",
+    level: Union[str, None] = None
+):
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=422, detail="order must be asc or desc")
+
+    try:
+        return get_monitoring_view().page(
+            offset, limit, sort, descending=order == "desc", level=level
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+
+
+def _state_code(state, user_id):
+    # Account code within this state, or -1. The symbol table is shared
+    # and grows (scoring, catch-up) past the state's arrays
+    code = state["symbols"].accounts.code(user_id)
+    return code if code < len(state["final_risk"]["risk_score"]) else -1
 
 
 @router.get("/explain/{user_id}")
 def explain_user(user_id: str):
-    behavior_risk, graph_risk, final_risk = run_aml_pipeline()
+    state = get_pipeline_state()
+    code = _state_code(state, user_id)
 
-    explanation = generate_explanation(
-        user_id,
-        behavior_risk,
-        graph_risk,
-        final_risk
-    )
+    if code < 0:
+        return {
+            "user": user_id,
+            "risk": {},
+            "explanation": "No transactions recorded for this account."
+        }
+
+    with span("explain.generate", model_version=state["model_version"]):
+        explanation = generate_explanation(
+            code,
+            state["behavior_risk"],
+            state["graph_risk"],
+            state["final_risk"],
+            linkage_risk=state["device_linkage"]["linkage_risk"],
+            network_risk=state["network_risk"],
+            cycle_risk=state["cycles"]["cycle_risk"]
+        )
 
     return {
         "user": user_id,
-        "risk": final_risk.get(user_id, {}),
+        "risk": decode_final_risk(
+            state["final_risk"], [code], state["symbols"]
+        )[user_id],
         "explanation": explanation
     }
+
+
+@router.get("/typologies")
+def typologies():
+    state = get_pipeline_state()
+
+    labels = engines.classify_account_typologies(
+        state["graph"],
+        state["final_risk"]["risk_score"],
+        broker=state["betweenness"]["broker"]
+    )
+    accounts = state["accounts"]
+    names = state["symbols"].accounts.decode(accounts)
+
+    return {
+        name: engines.typology_records(labels[code])
+        for name, code in zip(names, accounts)
+    }
+
+
+@router.get("/cycles")
+def cycles(limit: int = 100):
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=422, detail=f"limit must be 1..{MAX_PAGE_SIZE}")
+    state = get_pipeline_state()
+    found = state["cycles"]["cycles"]
+
+    return {
+        "total": len(found),
+        "truncated": state["cycles"]["truncated"],
+        "cycles": [
+            engines.cycle_evidence(state["transactions"], cycle, state["symbols"])
+            for cycle in found[:limit]
+        ]
+    }
+
+
+@router.get("/brokers")
+def brokers(limit: int = 100):
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=422, detail=f"limit must be 1..{MAX_PAGE_SIZE}")
+    state = get_pipeline_state()
+    result = state["betweenness"]
+
+    codes = np.flatnonzero(result["broker"])
+    codes = codes[np.argsort(-result["betweenness"][codes], kind="stable")]
+    names = state["symbols"].accounts.decode(codes[:limit])
+
+    return {
+        "total": len(codes),
+        "samples": result["samples"],
+        "sources": result["sources"],
+        "exact": result["exact"],
+        "epsilon": result["epsilon"],
+        "generation": result["generation"],
+        "brokers": [
+            {
+                "account_id": name,
+                "betweenness": float(result["betweenness"][code]),
+                "stderr": float(result["stderr"][code]),
+                "lower": float(result["lower"][code]),
+            }
+            for name, code in zip(names, codes[:limit])
+        ]
+    }
+
+
+# -----------------------------------------------------
+# Alerts
+# -----------------------------------------------------
+_alerts = None
+_alerts_lock = threading.Lock()
+
+
+def get_alert_engine():
+    global _alerts
+
+    with _alerts_lock:
+        if _alerts is None:
+            # Replays the persisted alert history
+            _alerts = AlertEngine()
+
+    return _alerts
+
+
+@router.get("/alerts")
+def alert_queue(offset: int = 0, limit: int = DEFAULT_PAGE_SIZE):
+    if offset < 0 or not 0 < limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=422, detail=f"limit must be 1..{MAX_PAGE_SIZE}")
+    return get_alert_engine().queue(offset, limit)
+
+
+@router.get("/alerts/history")
+def alert_history(offset: int = 0, limit: int = DEFAULT_PAGE_SIZE):
+    if offset < 0 or not 0 < limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=422, detail=f"limit must be 1..{MAX_PAGE_SIZE}")
+    return get_alert_engine().history(offset, limit)
+
+
+@router.get("/alerts/stats")
+def alert_stats():
+    return get_alert_engine().stats()
+
+
+@router.post("/alerts/{alert_id}/acknowledge")
+def acknowledge_alert(alert_id: int, payload: Union[dict, None] = Body(None)):
+    alert = get_alert_engine().acknowledge(alert_id, (payload or {}).get("note"))
+    if alert is None:
+        raise HTTPException(status_code=404, detail=f"No open alert {alert_id}")
+    return alert
+
+
+# -----------------------------------------------------
+# Risk Evolution
+# -----------------------------------------------------
+_evolution = None
+_evolution_lock = threading.Lock()
+
+
+def get_evolution():
+    global _evolution
+
+    with _evolution_lock:
+        if _evolution is None:
+            _evolution = RiskEvolution(alerts=get_alert_engine())
+            _evolution.start(get_pipeline_state)
+
+    return _evolution
+
+
+@router.get("/evolution")
+def evolution_status():
+    evolution = get_evolution()
+    view = evolution.snapshot()
+    counts = np.bincount(view["levels"], minlength=len(RISK_LEVELS))
+
+    return {
+        "version": view["version"],
+        "tick": view["tick"],
+        "updated_at": view["updated_at"],
+        "demo": view["demo"],
+        "accounts": len(view["accounts"]),
+        "levels": dict(zip(RISK_LEVELS.tolist(), counts.tolist())),
+        "escalated": int(view["escalated"].sum()),
+        "last_error": evolution.last_error
+    }
+
+
+@router.get("/evolution/accounts")
+def evolution_accounts():
+    """
+    Columnar table of the current tick; status and explanation are
+    indexes into the "statuses" / "explanations" lists.
+    """
+
+    evolution = get_evolution()
+    view = evolution.snapshot()
+
+    return {
+        "version": view["version"],
+        "account_id": (
+            evolution.symbols.accounts.decode(view["accounts"]).tolist()
+            if evolution.symbols else []
+        ),
+        "risk_score": view["scores"].tolist(),
+        "risk_level": RISK_LEVELS[view["levels"]].tolist(),
+        "status": view["status"].tolist(),
+        "explanation": view["explanation"].tolist(),
+        "escalated": view["escalated"].tolist(),
+        "statuses": STATUSES.tolist(),
+        "explanations": EXPLANATIONS.tolist()
+    }
+
+
+@router.get("/evolution/history/{user_id}")
+def evolution_history(user_id: str):
+    evolution = get_evolution()
+    code = evolution.symbols.accounts.code(user_id) if evolution.symbols else -1
+
+    return {
+        "user": user_id,
+        "max_ticks": HISTORY_TICKS,
+        "history": evolution.account_history(code)
+    }
+
+
+@router.post("/evolution/inject")
+def evolution_inject(payload: dict = Body(...)):
+    try:
+        users = [str(u) for u in payload["accounts"]]
+        delta = float(payload["delta"])
+    except (KeyError, TypeError, ValueError) as error:
+        raise HTTPException(status_code=422, detail=f"accounts and delta required: {error}")
+
+    evolution = get_evolution()
+    if evolution.symbols is None:
+        raise HTTPException(
+            status_code=503, detail="Risk evolution is starting", headers={"Retry-After": "1"}
+        )
+
+    codes = [evolution.symbols.accounts.code(u) for u in users]
+    try:
+        applied = evolution.inject(
+            codes, delta, payload.get("message"), kind=payload.get("kind", "SIMULATION")
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+
+    return {"applied": applied, "version": evolution.snapshot()["version"]}
+
+
+@router.post("/evolution/demo")
+def evolution_demo(payload: dict = Body(...)):
+    evolution = get_evolution()
+    evolution.set_demo(bool(payload.get("enabled")))
+    return {"demo": evolution.demo, "version": evolution.snapshot()["version"]}
+
+
+# -----------------------------------------------------
+# Real-Time Scoring
+# -----------------------------------------------------
+_batcher = None
+_batcher_lock = threading.Lock()
+_scorer_source = None           # pipeline state the batcher's scorer was built from
+_scorer_lock = threading.Lock()
+
+
+def _refresh_scorer(state):
+    # Swaps in a scorer for a newly published state; a batch already
+    # running finishes on the previous one
+    global _scorer_source
+
+    with _scorer_lock:
+        if _batcher is not None and state is not None and _scorer_source is not state:
+            with span("state.scoring"):
+                _batcher.scorer = ScoringState(state, state["behavior_model"])
+            _scorer_source = state
+
+
+def get_batcher():
+    global _batcher, _scorer_source
+
+    with _batcher_lock:
+        if _batcher is None:
+            state = get_pipeline_state()
+            with _scorer_lock:
+                _batcher = MicroBatcher(ScoringState(state, state["behavior_model"]))
+                _scorer_source = state
+
+    # A state published while the batcher was being created
+    _refresh_scorer(_state)
+    return _batcher
+
+
+@router.post("/score")
+def score(payload: Union[dict, list] = Body(...)):
+    records = payload if isinstance(payload, list) else [payload]
+
+    try:
+        records = [normalize_transaction(r) for r in records]
+    except (ValueError, AttributeError) as error:
+        raise HTTPException(status_code=422, detail=str(error))
+
+    if not records:
+        return []
+
+    try:
+        results = get_batcher().submit(records).result(timeout=SCORE_TIMEOUT_S)
+    except queue.Full:
+        raise HTTPException(status_code=503, detail="scoring queue is full, retry later")
+    except TimeoutError:
+        raise HTTPException(status_code=503, detail="scoring timed out, retry later")
+
+    return results if isinstance(payload, list) else results[0]
+
+
+# -----------------------------------------------------
+# Bulk Ingest
+# -----------------------------------------------------
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+
+    with _writer_lock:
+        if _writer is None:
+            _writer = TransactionWriter()
+
+    return _writer
+
+
+@router.post("/transactions")
+def ingest_transactions(payload: list = Body(...)):
+    try:
+        records = [normalize_transaction(r) for r in payload]
+    except (ValueError, AttributeError) as error:
+        raise HTTPException(status_code=422, detail=str(error))
+
+    if not records:
+        return {"accepted": 0, "first_offset": None, "last_offset": None}
+
+    try:
+        future = get_writer().submit(encode_rows(records), len(records))
+    except StoreFull as error:
+        raise HTTPException(
+            status_code=503, detail=str(error), headers={"Retry-After": "1"}
+        )
+
+    try:
+        first, last = future.result(timeout=INGEST_TIMEOUT_S)
+    except TimeoutError:
+        raise HTTPException(
+            status_code=503, detail="store commit timed out, retry later",
+            headers={"Retry-After": "1"}
+        )
+    except OSError as error:
+        # The failed commit was rolled back; nothing was stored
+        raise HTTPException(
+            status_code=503, detail=f"store write failed: {error}",
+            headers={"Retry-After": "1"}
+        )
+
+    return {
+        "accepted": len(records),
+        "first_offset": first,
+        "last_offset": last,
+        "transaction_ids": [r["transaction_id"] for r in records]
+    }
+
+
+@router.get("/fusion-config")
+def fusion_config():
+    engine = get_fusion_engine()
+    engine.reload_if_changed()
+    config = engine.config
+
+    return {
+        "path": engine.path,
+        "version": engine.version,
+        "weights": config["weights"],
+        "max_score": config["max_score"],
+        "thresholds": dict(zip(RISK_LEVELS[1:].tolist(), config["cutoffs"].tolist())),
+        "rules": [rule["name"] for rule in config["rules"]],
+        "last_error": engine.last_error
+    }
+
+
+@router.get("/metrics")
+def metrics():
+    return {
+        "scoring": _batcher.metrics.snapshot() if _batcher else None,
+        "ingest": _writer.stats() if _writer else None,
+        "catch_up": {
+            "running": _catch_up is not None,
+            "failures": _catch_up_failures,
+            "last_error": _catch_up_error,
+        }
+    }
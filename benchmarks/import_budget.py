@@ -0,0 +1,111 @@
+"""
+Import-Time Budget
+Measures `import main` in fresh interpreters (python -X importtime) and
+fails when the median exceeds the budget, or when the API or a backend
+module pulls in a heavy / UI dependency at import time. Run it in CI
+next to the pipeline benchmarks.
+
+Usage:
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --budget-ms 400 --runs 7
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+DEFAULT_BUDGET_MS = float(os.environ.get("NEUROAML_IMPORT_BUDGET_MS", "800"))
+DEFAULT_RUNS = 5
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded lazily through src/engines.py or only by the dashboard
+DEFERRED_MODULES = ["pandas", "scipy", "sklearn", "networkx", "matplotlib", "streamlit"]
+
+# Backend modules that must import without Streamlit
+BACKEND_MODULES = [
+    "main",
+    "governance.case_management",
+    "governance.sar_export",
+    "intelligence.typology_engine",
+    "intelligence.risk_forecast",
+    "phase4",
+]
+
+
+def measure_import(module):
+    """
+    One fresh interpreter: (cumulative import ms, [(self ms, name)]).
+    """
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True
+    )
+
+    total, modules = None, []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((int(self_us) / 1000, name.strip()))
+        if name.rstrip() == f" {module}":
+            total = int(cumulative_us) / 1000
+
+    return total, modules
+
+
+def loaded_modules(module):
+    code = (
+        f"import sys, {module}; "
+        "print(' '.join(sorted({m.split('.')[0] for m in sys.modules})))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True
+    )
+    return set(result.stdout.split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget for the API")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--top", type=int, default=10,
+                        help="slowest modules to list when over budget")
+    args = parser.parse_args()
+
+    failures = []
+
+    runs = [measure_import("main") for _ in range(args.runs)]
+    median = statistics.median(total for total, _ in runs)
+    print(f"import main: median {median:.1f} ms over {args.runs} runs "
+          f"(budget {args.budget_ms:.0f} ms)")
+
+    if median > args.budget_ms:
+        failures.append(f"import main took {median:.1f} ms > {args.budget_ms:.0f} ms")
+        print("\nSlowest modules (self time, last run):")
+        for ms, name in sorted(runs[-1][1], reverse=True)[:args.top]:
+            print(f"  {ms:8.1f} ms  {name}")
+
+    eager = sorted(loaded_modules("main") & set(DEFERRED_MODULES))
+    if eager:
+        failures.append(f"import main loads {', '.join(eager)} eagerly")
+
+    for module in BACKEND_MODULES:
+        if "streamlit" in loaded_modules(module):
+            failures.append(f"{module} imports streamlit")
+
+    if failures:
+        print("\nImport budget failures:")
+        for line in failures:
+            print(f"  {line}")
+        return 1
+
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,494 @@
+"""
+Detector Parameter Sweep
+Tunes the behaviour model contamination, the degree centrality cutoff,
+the temporal spending ratio and the fusion weights / thresholds against
+a labelled corpus, and reports the precision / recall / alert volume
+Pareto frontier.
+
+Everything that does not depend on the swept parameters is computed
+once and cached on disk as .npy files per corpus: the forest's anomaly
+scores, degree centrality, each sender's early / late spending
+averages, device linkage and cycle flags, and the network risk for
+each contamination value. Workers memory-map the cache, so evaluating
+one configuration is a few vector comparisons and one fusion pass.
+
+Usage:
+    python -m benchmarks.param_sweep --size 100k --samples 2000
+    python -m benchmarks.param_sweep --corpus data/tx.csv --labels data/labels.csv --search grid --space space.json
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from multiprocessing import get_context
+
+import numpy as np
+
+from benchmarks.pipeline_bench import DATA_DIR, SEED, ensure_corpus, parse_size
+
+SWEEP_DIR = os.path.join(DATA_DIR, "sweep")
+CACHE_VERSION = 1           # bump when the cached features change meaning
+DEFAULT_SAMPLES = 2000
+DEFAULT_SIZE = "100k"
+CONFIGS_PER_TASK = 16       # configurations per worker round trip
+
+# Parameter -> candidate values. "weights.<component>" and
+# "thresholds.<level>" are fusion config entries (src/risk_engine.py)
+SEARCH_SPACE = {
+    "contamination": [0.01, 0.02, 0.05, 0.1, 0.15, 0.2, 0.3],
+    "centrality": [0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2],
+    "temporal_ratio": [1.5, 2.0, 3.0, 4.0, 6.0],
+    "weights.behavior": [0.0, 0.1, 0.2, 0.3, 0.4, 0.5],
+    "weights.graph": [0.0, 0.1, 0.2, 0.3, 0.4, 0.5],
+    "weights.temporal": [0.0, 0.1, 0.2, 0.3, 0.4, 0.5],
+    "weights.linkage": [0.0, 0.1, 0.2, 0.3, 0.4, 0.5],
+    "weights.propagation": [0.0, 0.1, 0.2, 0.3, 0.4, 0.5],
+    "weights.cycle": [0.0, 0.1, 0.2, 0.3, 0.4, 0.5],
+    "thresholds.MEDIUM": [0.2, 0.3, 0.4, 0.5],
+    "thresholds.HIGH": [0.4, 0.5, 0.6, 0.7, 0.8, 1.0],
+}
+
+
+def live_fusion_config(path=None):
+    """
+    The fusion config the API runs with: the JSON at NEUROAML_RISK_CONFIG
+    (or path) over the defaults, rules included.
+    """
+
+    from src.risk_engine import CONFIG_PATH, DEFAULT_FUSION_CONFIG
+
+    path = path or CONFIG_PATH
+    config = {}
+    if path and os.path.isfile(path):
+        with open(path) as file:
+            config = json.load(file)
+
+    return {
+        "weights": {**DEFAULT_FUSION_CONFIG["weights"], **config.get("weights", {})},
+        "thresholds": {**DEFAULT_FUSION_CONFIG["thresholds"], **config.get("thresholds", {})},
+        "max_score": config.get("max_score", DEFAULT_FUSION_CONFIG["max_score"]),
+        "rules": config.get("rules", DEFAULT_FUSION_CONFIG["rules"]),
+    }
+
+
+def default_parameters(live):
+    # The values the pipeline runs with today
+    from src.anomaly_detector import BEHAVIOR_CONTAMINATION
+    from src.transaction_graph import GRAPH_CENTRALITY_THRESHOLD
+    from src.temporal_detector import TEMPORAL_RATIO
+
+    parameters = {
+        "contamination": BEHAVIOR_CONTAMINATION,
+        "centrality": GRAPH_CENTRALITY_THRESHOLD,
+        "temporal_ratio": TEMPORAL_RATIO,
+    }
+    for section in ("weights", "thresholds"):
+        for name, value in live[section].items():
+            parameters[f"{section}.{name}"] = value
+    return parameters
+
+
+def fusion_config(parameters, live):
+    # Swept weights / thresholds; max_score and rules stay as configured
+    config = {
+        "weights": {}, "thresholds": {},
+        "max_score": live["max_score"], "rules": live["rules"],
+    }
+    for key, value in parameters.items():
+        section, _, name = key.partition(".")
+        if section in ("weights", "thresholds"):
+            config[section][name] = value
+    return config
+
+
+# -----------------------------------------------------
+# Feature Cache (computed once per corpus)
+# -----------------------------------------------------
+def cache_dir(corpus, labels):
+    stats = [
+        f"{os.path.abspath(p)}:{os.stat(p).st_size}:{os.stat(p).st_mtime_ns}"
+        for p in (corpus, labels)
+    ]
+    key = hashlib.sha256(f"{CACHE_VERSION}|{'|'.join(stats)}".encode("utf-8")).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(corpus))[0]
+    return os.path.join(SWEEP_DIR, f"{stem}_{key}")
+
+
+def _network_file(contamination):
+    return f"network_{contamination:g}.npy"
+
+
+def build_feature_cache(corpus, labels, directory):
+    """
+    Runs every detector input once over the corpus and saves the
+    population-aligned arrays (accounts with any transaction).
+    """
+
+    import pandas as pd
+    import scipy.sparse as sp
+
+    from src.symbols import SYMBOLS, active_accounts
+    from src.behavior_features import load_transactions, build_user_behavior
+    from src.anomaly_detector import build_feature_matrix, fit_behavior_model
+    from src.transaction_graph import build_transaction_graph, degree_centrality
+    from src.temporal_detector import spending_halves
+    from src.device_linkage import build_linkage_indexes, detect_device_linkage
+    from src.cycle_detection import detect_cycles
+
+    timings = {}
+
+    def timed(name, fn):
+        start = time.perf_counter()
+        result = fn()
+        timings[name] = round(time.perf_counter() - start, 3)
+        return result
+
+    transactions = timed("load", lambda: load_transactions(corpus))
+    n = len(SYMBOLS.accounts)
+    population = np.flatnonzero(active_accounts(transactions, n))
+
+    profiles = timed("behavior_features", lambda: build_user_behavior(transactions, n))
+
+    # The forest's trees don't depend on contamination (only its score
+    # offset does), so one fit serves every contamination value
+    def behavior_scores():
+        model = fit_behavior_model(profiles)
+        scores = np.full(n, np.inf)
+        active = np.flatnonzero(profiles["active"])
+        scores[active] = model.score_samples(build_feature_matrix(profiles)[active])
+        return scores
+
+    scores = timed("behavior_model", behavior_scores)
+
+    graph = timed("graph", lambda: build_transaction_graph(transactions, n))
+    centrality = timed("centrality", lambda: degree_centrality(graph))
+    avg_early, avg_late = timed("temporal", lambda: spending_halves(transactions, n))
+
+    linkage = timed("device_linkage", lambda: detect_device_linkage(
+        build_linkage_indexes(transactions)["devices"], n, len(SYMBOLS.devices)
+    )["linkage_risk"])
+    cycles = timed("cycles", lambda: detect_cycles(transactions, n)["cycle_risk"])
+
+    ids = pd.read_csv(labels, usecols=["account_id"], dtype=str)["account_id"].unique()
+    codes = np.array([SYMBOLS.accounts.code(i) for i in ids], dtype=np.int64)
+    positive = np.zeros(n, dtype=bool)
+    positive[codes[codes >= 0]] = True
+
+    os.makedirs(directory, exist_ok=True)
+    arrays = {
+        "behavior_score": scores,
+        "centrality": centrality,
+        "avg_early": avg_early,
+        "avg_late": avg_late,
+        "linkage": np.asarray(linkage, dtype=bool),
+        "cycle": np.asarray(cycles, dtype=bool),
+        "positive": positive,
+    }
+    for name, values in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), np.asarray(values)[population])
+
+    # Full graph: network risk is added per contamination value on demand
+    sp.save_npz(os.path.join(directory, "graph.npz"), graph)
+    np.save(os.path.join(directory, "population.npy"), population)
+
+    meta = {
+        "corpus": corpus,
+        "labels": labels,
+        "rows": int(len(transactions["amount"])),
+        "accounts": n,
+        "population": int(len(population)),
+        "positives": int(positive[population].sum()),
+        "seconds": timings,
+    }
+    with open(os.path.join(directory, "meta.json"), "w") as file:
+        json.dump(meta, file, indent=4)
+
+    return meta
+
+
+def behavior_offset(scores, contamination):
+    # Same cut as IsolationForest(contamination=c): the c-quantile of
+    # the training (active account) scores
+    return float(np.percentile(scores[np.isfinite(scores)], 100.0 * contamination))
+
+
+def ensure_network_risk(directory, contaminations):
+    """
+    Network risk per contamination value: the propagation is seeded by
+    the behaviour flags only, never by the labels being scored.
+    """
+
+    import scipy.sparse as sp
+
+    from src.risk_propagation import RiskPropagation, seed_vector
+
+    missing = [
+        c for c in contaminations
+        if not os.path.isfile(os.path.join(directory, _network_file(c)))
+    ]
+    if not missing:
+        return
+
+    graph = sp.load_npz(os.path.join(directory, "graph.npz"))
+    population = np.load(os.path.join(directory, "population.npy"))
+    scores = np.load(os.path.join(directory, "behavior_score.npy"))
+
+    for contamination in missing:
+        flags = np.zeros(graph.shape[0], dtype=bool)
+        flags[population] = scores < behavior_offset(scores, contamination)
+        network = RiskPropagation().run(graph, seed_vector(graph.shape[0], (), flags))
+        np.save(os.path.join(directory, _network_file(contamination)), network[population])
+
+
+# -----------------------------------------------------
+# Search
+# -----------------------------------------------------
+def _valid(parameters):
+    return parameters["thresholds.MEDIUM"] <= parameters["thresholds.HIGH"]
+
+
+def candidate_configs(space, search, samples, seed):
+    names = list(space)
+
+    if search == "grid":
+        combos = (dict(zip(names, values)) for values in itertools.product(*space.values()))
+        return [c for c in combos if _valid(c)]
+
+    rng = np.random.default_rng(seed)
+    configs, seen = [], set()
+    # Rejection sampling; bounded in case the space is smaller than samples
+    for _ in range(samples * 20):
+        if len(configs) == samples:
+            break
+        picked = {name: space[name][rng.integers(len(space[name]))] for name in names}
+        key = tuple(picked.values())
+        if key in seen or not _valid(picked):
+            continue
+        seen.add(key)
+        configs.append(picked)
+    return configs
+
+
+# -----------------------------------------------------
+# Evaluation (worker processes)
+# -----------------------------------------------------
+_worker_input = {}
+
+
+def _init_worker(directory, offsets, level, live):
+    # Memory-mapped: every worker shares the page cache
+    for name in ("behavior_score", "centrality", "avg_early", "avg_late",
+                 "linkage", "cycle", "positive"):
+        _worker_input[name] = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+    _worker_input["network"] = {
+        c: np.load(os.path.join(directory, _network_file(c)), mmap_mode="r")
+        for c in offsets
+    }
+    _worker_input["offsets"] = offsets
+    _worker_input["level"] = level
+    _worker_input["live"] = live
+    _worker_input["positives"] = int(_worker_input["positive"].sum())
+
+
+def evaluate(parameters):
+    from src.risk_engine import _fuse_arrays, _validate
+
+    data = _worker_input
+    contamination = parameters["contamination"]
+    n = len(data["positive"])
+
+    arrays = {
+        "behavior": data["behavior_score"] < data["offsets"][contamination],
+        "graph": data["centrality"] > parameters["centrality"],
+        "temporal": data["avg_late"] > data["avg_early"] * parameters["temporal_ratio"],
+        "linkage": np.asarray(data["linkage"]),
+        "propagation": np.asarray(data["network"][contamination]),
+        "cycle": np.asarray(data["cycle"]),
+    }
+    _, label = _fuse_arrays(_validate(fusion_config(parameters, data["live"])), arrays, n)
+
+    alerts = label >= data["level"]
+    alert_count = int(alerts.sum())
+    hits = int((alerts & data["positive"]).sum())
+    positives = data["positives"]
+
+    precision = hits / alert_count if alert_count else 0.0
+    recall = hits / positives if positives else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if hits else 0.0
+
+    return {
+        "parameters": parameters,
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(f1, 4),
+        "alerts": alert_count,
+        "hits": hits,
+        "alert_rate": round(alert_count / n, 5) if n else 0.0,
+    }
+
+
+def _evaluate_many(configs):
+    return [evaluate(parameters) for parameters in configs]
+
+
+def run_sweep(directory, configs, level, workers, live):
+    scores = np.load(os.path.join(directory, "behavior_score.npy"))
+    contaminations = sorted({c["contamination"] for c in configs})
+    ensure_network_risk(directory, contaminations)
+    offsets = {c: behavior_offset(scores, c) for c in contaminations}
+
+    tasks = [configs[i:i + CONFIGS_PER_TASK] for i in range(0, len(configs), CONFIGS_PER_TASK)]
+
+    if workers <= 1 or len(tasks) <= 1:
+        _init_worker(directory, offsets, level, live)
+        return [r for task in tasks for r in _evaluate_many(task)]
+
+    with get_context().Pool(min(workers, len(tasks)), _init_worker,
+                            (directory, offsets, level, live)) as pool:
+        return [r for found in pool.imap(_evaluate_many, tasks) for r in found]
+
+
+# -----------------------------------------------------
+# Pareto Frontier
+# -----------------------------------------------------
+def pareto_frontier(results):
+    """
+    Results no other result beats on precision, recall and alert
+    volume at once (higher, higher, lower), best recall first.
+    Configurations that catch nothing are left out (few alerts alone
+    would put them on the frontier); identical metrics are kept once.
+    """
+
+    unique = {}
+    for result in results:
+        if result["hits"]:
+            key = (result["precision"], result["recall"], result["alerts"])
+            unique.setdefault(key, dict(result, equivalent=0))["equivalent"] += 1
+    candidates = list(unique.values())
+    if not candidates:
+        return []
+
+    points = np.array([[r["precision"], r["recall"], -r["alerts"]] for r in candidates])
+    frontier = []
+    for i, point in enumerate(points):
+        no_worse = (points >= point).all(axis=1)
+        better = (points > point).any(axis=1)
+        if not (no_worse & better).any():
+            frontier.append(candidates[i])
+
+    frontier.sort(key=lambda r: (-r["recall"], -r["precision"]))
+    return frontier
+
+
+def print_frontier(baseline, frontier, limit):
+    columns = ["contamination", "centrality", "temporal_ratio", "thresholds.MEDIUM", "thresholds.HIGH"]
+    print(f"{'':>10}{'precision':>11}{'recall':>9}{'f1':>8}{'alerts':>9}  "
+          + "  ".join(c.split(".")[-1] for c in columns) + "  weights b,g,t,l,p,c")
+
+    def line(label, r):
+        p = r["parameters"]
+        weights = ",".join(f"{p[k]:g}" for k in p if k.startswith("weights."))
+        print(f"{label:>10}{r['precision']:>11.3f}{r['recall']:>9.3f}{r['f1']:>8.3f}{r['alerts']:>9}  "
+              + "  ".join(f"{p[c]:>{len(c.split('.')[-1])}g}" for c in columns) + f"  {weights}")
+
+    line("defaults", baseline)
+    for i, result in enumerate(frontier[:limit]):
+        line(f"#{i}", result)
+    if len(frontier) > limit:
+        print(f"... {len(frontier) - limit} more in the report")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NeuroAML detector parameter sweep")
+    parser.add_argument("--size", default=DEFAULT_SIZE,
+                        help="seeded benchmark corpus to tune on, e.g. 10k, 100k, 1M")
+    parser.add_argument("--corpus", help="transactions CSV (instead of --size)")
+    parser.add_argument("--labels", help="labels CSV with an account_id column")
+    parser.add_argument("--search", choices=("random", "grid"), default="random")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES,
+                        help="configurations drawn by the random search")
+    parser.add_argument("--space", help="JSON {parameter: [values]} overriding SEARCH_SPACE")
+    parser.add_argument("--level", choices=("MEDIUM", "HIGH"), default="HIGH",
+                        help="lowest risk level that counts as an alert")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--rebuild-cache", action="store_true")
+    parser.add_argument("--show", type=int, default=20, help="frontier rows to print")
+    parser.add_argument("--output", help="report JSON (default: next to the feature cache)")
+    parser.add_argument("--config", help="fusion config to start from "
+                        "(default NEUROAML_RISK_CONFIG or config/risk_fusion.json)")
+    args = parser.parse_args()
+
+    from src.risk_engine import RISK_LEVELS
+
+    if args.corpus:
+        if not args.labels:
+            parser.error("--corpus needs --labels")
+        corpus, labels = args.corpus, args.labels
+    else:
+        corpus = ensure_corpus(parse_size(args.size), args.workers)
+        labels = corpus.replace(".csv", "_labels.csv")
+
+    space = dict(SEARCH_SPACE)
+    if args.space:
+        with open(args.space) as file:
+            overrides = json.load(file)
+        unknown = set(overrides) - set(SEARCH_SPACE)
+        if unknown:
+            parser.error(f"unknown parameters in --space: {sorted(unknown)}")
+        space.update(overrides)
+
+    started = time.perf_counter()
+    directory = cache_dir(corpus, labels)
+    meta_path = os.path.join(directory, "meta.json")
+    if args.rebuild_cache or not os.path.isfile(meta_path):
+        print(f"Building feature cache in {directory}")
+        meta = build_feature_cache(corpus, labels, directory)
+    else:
+        with open(meta_path) as file:
+            meta = json.load(file)
+    cache_seconds = time.perf_counter() - started
+
+    live = live_fusion_config(args.config)
+    baseline = default_parameters(live)
+    configs = [baseline] + candidate_configs(space, args.search, args.samples, args.seed)
+    level = int(np.flatnonzero(RISK_LEVELS == args.level)[0])
+
+    started = time.perf_counter()
+    results = run_sweep(directory, configs, level, args.workers, live)
+    sweep_seconds = time.perf_counter() - started
+
+    frontier = pareto_frontier(results[1:])
+    print(
+        f"{meta['population']:,} accounts, {meta['positives']:,} labelled; "
+        f"{len(configs):,} configurations in {sweep_seconds:.1f}s "
+        f"(cache {cache_seconds:.1f}s, {args.workers} workers)"
+    )
+    print_frontier(results[0], frontier, args.show)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "corpus": meta,
+        "search": args.search,
+        "alert_level": args.level,
+        "configurations": len(configs),
+        "seconds": {"cache": round(cache_seconds, 2), "sweep": round(sweep_seconds, 2)},
+        "baseline": results[0],
+        # "fusion" drops into NEUROAML_RISK_CONFIG as-is
+        "frontier": [dict(r, fusion=fusion_config(r["parameters"], live)) for r in frontier],
+    }
+
+    output = args.output or os.path.join(directory, f"pareto_{args.level.lower()}.json")
+    with open(output, "w") as file:
+        json.dump(report, file, indent=4)
+    print(f"Report written to {output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+Pipeline Scale Benchmarks
+Times every pipeline stage on seeded synthetic corpora and guards
+against regressions relative to a saved JSON baseline.
+
+Usage:
+    python -m benchmarks.pipeline_bench --sizes 10k,100k --save-baseline
+    python -m benchmarks.pipeline_bench --sizes 10k,100k --max-regression 20
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BENCH_DIR, "data")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+DEFAULT_SIZES = "10k,100k,1M,10M"
+DEFAULT_MAX_REGRESSION = 20.0   # percent
+MIN_COMPARABLE_SECONDS = 0.05   # faster stages are too noisy to gate on
+SEED = 42
+
+STAGES = [
+    "load",
+    "build_user_behavior",
+    "detect_anomalies",
+    "build_transaction_graph",
+    "detect_graph_anomalies",
+    "detect_temporal_anomalies",
+    "compute_final_risk",
+    "run_aml_pipeline",
+]
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    number = text[:-1] if text[-1] in "km" else text
+    return int(float(number) * multiplier)
+
+
+# -----------------------------------------------------
+# Peak Memory (per stage)
+# -----------------------------------------------------
+def _reset_peak_rss():
+    # Linux: writing 5 to clear_refs resets VmHWM for this process
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _measure(fn, rows):
+    _reset_peak_rss()
+    start = time.perf_counter()
+    result = fn()
+    wall = time.perf_counter() - start
+
+    return result, {
+        "wall_seconds": round(wall, 4),
+        "rows_per_second": round(rows / wall, 1) if wall > 0 else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+# -----------------------------------------------------
+# Corpus
+# -----------------------------------------------------
+def corpus_path(rows):
+    return os.path.join(DATA_DIR, f"corpus_{rows}_seed{SEED}.csv")
+
+
+def ensure_corpus(rows, workers):
+    from src.data_generator import generate_corpus
+    from src.fraud_simulator import DEFAULT_SCENARIOS, inject_scenarios_into_corpus
+
+    path = corpus_path(rows)
+    if os.path.isfile(path):
+        return path
+
+    users = min(max(rows // 10, 1_000), 1_000_000)
+    start, span_days = "2026-01-01T00:00:00", 30
+
+    generate_corpus(
+        path, rows, workers=workers, users=users,
+        devices=max(users // 2, 1), start=start, span_days=span_days, seed=SEED
+    )
+
+    instances = max(rows // 20_000, 1)
+    inject_scenarios_into_corpus(
+        path, path.replace(".csv", "_labels.csv"), users, start, span_days,
+        scenarios={t: {"instances": instances} for t in DEFAULT_SCENARIOS},
+        seed=SEED
+    )
+
+    return path
+
+
+# -----------------------------------------------------
+# Stage Runner (executed in a fresh process per size)
+# -----------------------------------------------------
+def run_stages(path, rows):
+    from src.behavior_features import load_transactions, build_user_behavior
+    from src.anomaly_detector import detect_anomalies
+    from src.transaction_graph import build_transaction_graph, detect_graph_anomalies
+    from src.temporal_detector import detect_temporal_anomalies
+    from src.risk_engine import compute_final_risk
+    import main
+
+    results = {}
+
+    transactions, results["load"] = _measure(
+        lambda: load_transactions(path), rows
+    )
+    profiles, results["build_user_behavior"] = _measure(
+        lambda: build_user_behavior(transactions), rows
+    )
+    behavior_risk, results["detect_anomalies"] = _measure(
+        lambda: detect_anomalies(profiles), rows
+    )
+    graph, results["build_transaction_graph"] = _measure(
+        lambda: build_transaction_graph(transactions), rows
+    )
+    graph_risk, results["detect_graph_anomalies"] = _measure(
+        lambda: detect_graph_anomalies(graph), rows
+    )
+    temporal_risk, results["detect_temporal_anomalies"] = _measure(
+        lambda: detect_temporal_anomalies(transactions), rows
+    )
+    _, results["compute_final_risk"] = _measure(
+        lambda: compute_final_risk(behavior_risk, graph_risk, temporal_risk), rows
+    )
+
+    del transactions, profiles, graph
+    _, results["run_aml_pipeline"] = _measure(
+        lambda: main.run_aml_pipeline(path), rows
+    )
+
+    return results
+
+
+def bench_size(rows, workers):
+    path = ensure_corpus(rows, workers)
+
+    # Fresh interpreter per size so peak memory isn't polluted by earlier runs
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.pipeline_bench",
+         "--stage-runner", path, "--rows", str(rows)],
+        check=True, capture_output=True, text=True,
+        cwd=os.path.dirname(BENCH_DIR)
+    ).stdout
+
+    return json.loads(output.strip().splitlines()[-1])
+
+
+# -----------------------------------------------------
+# Baseline Comparison
+# -----------------------------------------------------
+def compare_to_baseline(results, baseline, max_regression):
+    regressions = []
+
+    for size, stages in results.items():
+        for stage, metrics in stages.items():
+            base = baseline.get(size, {}).get(stage)
+            if not base or base.get("wall_seconds", 0) < MIN_COMPARABLE_SECONDS:
+                continue
+
+            change = (
+                (metrics["wall_seconds"] - base["wall_seconds"])
+                / base["wall_seconds"] * 100
+            )
+            metrics["change_vs_baseline_pct"] = round(change, 1)
+
+            if change > max_regression:
+                regressions.append(
+                    f"{size} {stage}: {base['wall_seconds']}s -> "
+                    f"{metrics['wall_seconds']}s (+{change:.1f}%)"
+                )
+
+    return regressions
+
+
+def print_table(results):
+    print(f"{'rows':>10}  {'stage':<28}{'wall s':>10}{'rows/s':>14}{'peak MB':>10}{'Δ%':>8}")
+    for size, stages in results.items():
+        for stage in STAGES:
+            m = stages.get(stage)
+            if not m:
+                continue
+            change = m.get("change_vs_baseline_pct")
+            print(
+                f"{size:>10}  {stage:<28}{m['wall_seconds']:>10.3f}"
+                f"{(m['rows_per_second'] or 0):>14,.0f}{m['peak_rss_mb']:>10.1f}"
+                f"{'' if change is None else f'{change:+.1f}':>8}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NeuroAML pipeline benchmarks")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help="comma separated row counts, e.g. 10k,100k,1M,10M")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="overwrite the baseline with this run")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION,
+                        help="fail if any stage is this many percent slower")
+    parser.add_argument("--output", help="also write results JSON here")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="corpus generation processes")
+    parser.add_argument("--stage-runner", help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stage_runner:
+        print(json.dumps(run_stages(args.stage_runner, args.rows)))
+        return 0
+
+    results = {}
+    for size in [parse_size(s) for s in args.sizes.split(",")]:
+        results[str(size)] = bench_size(size, args.workers)
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file).get("results", {})
+
+    regressions = compare_to_baseline(results, baseline, args.max_regression)
+    print_table(results)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=4)
+
+    if args.save_baseline:
+        # Keep sizes from the old baseline that weren't re-run
+        merged = dict(baseline, **results)
+        with open(args.baseline, "w") as file:
+            json.dump(dict(report, results=merged), file, indent=4)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"\nRegressions over {args.max_regression}%:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
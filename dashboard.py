@@ -6,13 +6,12 @@ import time
 from datetime import datetime
 import random
 import matplotlib.pyplot as plt
-from intelligence.typology_engine import classify_fraud_typology
+from intelligence.typology_engine import classify_typologies, typology_records
 from intelligence.risk_forecast import forecast_risk
 
 from phase4 import (
     aml_compliance_mapping,
-    compute_impact_metrics,
-    demo_mode_multiplier,
+    impact_metrics_from_counts,
     demo_mode_toggle_ui
 )
 
@@ -45,8 +44,20 @@ st.set_page_config(
 # -----------------------------------------------------
 # Constants
 # -----------------------------------------------------
-API_URL = "http://127.0.0.1:8000/aml/run"
+API_BASE = "http://127.0.0.1:8000/aml"
+SUMMARY_URL = f"{API_BASE}/summary"
+ACCOUNTS_URL = f"{API_BASE}/accounts"
+EVOLUTION_URL = f"{API_BASE}/evolution"
+ALERTS_URL = f"{API_BASE}/alerts"
+ALERT_FEED_SIZE = 10
 AUTO_REFRESH_SECONDS = 5
+PAGE_SIZE = 50
+SORT_OPTIONS = {
+    "Risk Score": "risk_score",
+    "Change": "change",
+    "Network Risk": "network_risk",
+    "Account": "account_id",
+}
 
 # -----------------------------------------------------
 # Session State Initialization
@@ -69,81 +80,90 @@ if "mode" not in st.session_state:
 if "last_refresh" not in st.session_state:
     st.session_state.last_refresh = datetime.now()
 
+if "backend_demo" not in st.session_state:
+    st.session_state.backend_demo = None
+
 # -----------------------------------------------------
 # Helper Functions
 # -----------------------------------------------------
-def fetch_backend_data():
-    r = requests.get(API_URL, timeout=5)
+def fetch_evolution():
+    r = requests.get(EVOLUTION_URL, timeout=5)
     r.raise_for_status()
     return r.json()
 
-def record_risk_history(user, score):
-    if user not in st.session_state.risk_history:
-        st.session_state.risk_history[user] = []
-    st.session_state.risk_history[user].append({
-        "time": datetime.now().strftime("%H:%M:%S"),
-        "score": score
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_evolution_table(version):
+    """
+    One backend tick as a DataFrame, shared read-only by every session.
+    """
+    r = requests.get(f"{EVOLUTION_URL}/accounts", timeout=30)
+    r.raise_for_status()
+    data = r.json()
+
+    statuses = data["statuses"]
+    explanations = data["explanations"]
+    df = pd.DataFrame({
+        "User": data["account_id"],
+        "Risk Score": data["risk_score"],
+        "Risk Level": data["risk_level"],
+        "Explanation": [explanations[i] for i in data["explanation"]],
+        "Status": [statuses[i] for i in data["status"]]
     })
 
-def log_alert(message):
-    ts = datetime.now().strftime("%H:%M:%S")
-    st.session_state.alert_log.insert(0, f"[{ts}] {message}")
-    st.session_state.alert_log = st.session_state.alert_log[:10]
+    return {
+        "df": df,
+        "risk": dict(zip(data["account_id"], data["risk_score"])),
+        "escalated": {
+            user for user, flag in zip(data["account_id"], data["escalated"]) if flag
+        }
+    }
 
-# -----------------------------------------------------
-# 🔥 Dynamic Explanation Engine (ADDED)
-# -----------------------------------------------------
-def generate_dynamic_explanation(user, score, level, G):
-    if G is None or not G.has_node(user):
-        neighbors = []
-    else:
-        neighbors = list(G.neighbors(user))
-
-    high_risk_neighbors = [
-        n for n in neighbors
-        if st.session_state.dynamic_risk.get(n, 0) >= 0.7
-    ]
-
-    if level == "HIGH":
-        return (
-            "🚨 The account shows persistent high-risk behavior with rapid risk "
-            "escalation over time. Transactional exposure to other high-risk "
-            "accounts suggests potential money laundering, layering, or "
-            "mule-network activity."
-        )
+def fetch_risk_history(user):
+    r = requests.get(f"{EVOLUTION_URL}/history/{user}", timeout=5)
+    r.raise_for_status()
+    return r.json()["history"]
 
-    if level == "MEDIUM":
-        if high_risk_neighbors:
-            return (
-                "⚠️ The account displays suspicious behavior and is directly "
-                "connected to one or more high-risk accounts, indicating possible "
-                "risk propagation or early-stage laundering."
-            )
-        return (
-            "⚠️ Abnormal transaction patterns detected compared to baseline users. "
-            "Enhanced monitoring and due diligence are advised."
-        )
+def fetch_alert_feed():
+    # Highest-priority open alerts from the backend alert engine
+    r = requests.get(ALERTS_URL, params={"limit": ALERT_FEED_SIZE}, timeout=5)
+    r.raise_for_status()
+    return r.json()["alerts"]
 
-    return (
-        "✅ The account currently shows normal transaction behavior with no "
-        "significant laundering indicators. It remains under continuous monitoring."
+def inject_risk(users, delta, message, kind):
+    r = requests.post(
+        f"{EVOLUTION_URL}/inject",
+        json={"accounts": users, "delta": delta, "message": message, "kind": kind},
+        timeout=5
     )
+    r.raise_for_status()
+    return r.json()
 
-# -----------------------------------------------------
-# 🔥 Dynamic Status Engine (ADDED)
-# -----------------------------------------------------
-def determine_dynamic_status(user, score, level):
-    history = st.session_state.risk_history.get(user, [])
+def sync_demo_mode():
+    # Demo acceleration is a backend setting shared by every session
+    enabled = st.session_state.get("demo_mode", False)
+    if st.session_state.backend_demo != enabled:
+        requests.post(f"{EVOLUTION_URL}/demo", json={"enabled": enabled}, timeout=5)
+        st.session_state.backend_demo = enabled
 
-    if level == "HIGH":
-        return "🚨 Escalated"
+def fetch_summary():
+    r = requests.get(SUMMARY_URL, timeout=5)
+    r.raise_for_status()
+    return r.json()
 
-    if level == "MEDIUM":
-        if len(history) >= 3:
-            return "🕵️ Under Review"
-        return "⚠️ Watchlisted"
+def fetch_accounts_page(offset, sort, order, level):
+    params = {"offset": offset, "limit": PAGE_SIZE, "sort": sort, "order": order}
+    if level != "ALL":
+        params["level"] = level
+    r = requests.get(ACCOUNTS_URL, params=params, timeout=5)
+    r.raise_for_status()
+    return r.json()
 
-    return "🟢 Monitoring"
+def color_risk(val):
+    if val == "HIGH":
+        return "background-color:#7f1d1d"
+    elif val == "MEDIUM":
+        return "background-color:#78350f"
+    return "background-color:#14532d"
 
 # -----------------------------------------------------
 # Transaction Network Engine (Phase 3)
@@ -212,6 +232,7 @@ def draw_transaction_network(G, focus_user=None):
 # Sidebar — Controls
 # -----------------------------------------------------
 demo_mode_toggle_ui()
+sync_demo_mode()
 st.sidebar.markdown("## 🧠 NeuroAML")
 st.sidebar.caption("Real-Time AML Command Center")
 
@@ -301,59 +322,104 @@ st.markdown("""
 **Live monitoring of behavioral, network, and temporal fraud intelligence**
 """)
 
-# -----------------------------------------------------
-# Fetch Backend Data
-# -----------------------------------------------------
-with st.spinner("📡 Synchronizing with AML backend..."):
-    raw_data = fetch_backend_data()
+# =====================================================
+# 🛰️ MODE 1 — MONITORING
+# Aggregates and table pages come from the backend, so the view
+# costs the same for any number of accounts.
+# =====================================================
+if st.session_state.mode == "🛰️ Monitoring":
 
-# -----------------------------------------------------
-# Dynamic Risk Evolution Engine
-# -----------------------------------------------------
-rows = []
+    st.markdown("## 🛰️ Live System Monitoring")
 
-for user, payload in raw_data.items():
-    base_score = payload["risk"]["risk_score"]
+    with st.spinner("📡 Synchronizing with AML backend..."):
+        summary = fetch_summary()
+        st.session_state.alert_log = fetch_alert_feed()
 
-    if user not in st.session_state.dynamic_risk:
-        st.session_state.dynamic_risk[user] = base_score
+    levels = summary["levels"]
 
-    drift = random.uniform(0.01, 0.05) * demo_mode_multiplier()
-    if st.session_state.dynamic_risk[user] >= 0.6:
-        drift *= 1.5
-    elif st.session_state.dynamic_risk[user] >= 0.3:
-        drift *= 1.2
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("👥 Accounts", summary["accounts"])
+    c2.metric("🔴 High Risk", levels["HIGH"])
+    c3.metric("🟠 Medium Risk", levels["MEDIUM"])
+    c4.metric("🟢 Low Risk", levels["LOW"])
 
-    st.session_state.dynamic_risk[user] = min(
-        st.session_state.dynamic_risk[user] + drift, 1.0
+    st.markdown("### 📊 System Impact Metrics")
+    impact = impact_metrics_from_counts(
+        summary["accounts"], levels["HIGH"], levels["MEDIUM"],
+        st.session_state.risk_history
     )
+    for k, v in impact.items():
+        st.write(f"**{k}:** {v}")
+
+    st.markdown("### 🚨 Live Alert Feed")
+    if st.session_state.alert_log:
+        for alert in st.session_state.alert_log:
+            seen = datetime.fromtimestamp(alert["last_seen"]).strftime("%H:%M:%S")
+            text = f"[{seen}] {alert['severity']} — {alert['message']}"
+            if alert["count"] > 1:
+                text += f" (×{alert['count']})"
+            if alert["severity"] in ("HIGH", "CRITICAL"):
+                st.error(text)
+            else:
+                st.warning(text)
+    else:
+        st.success("No critical alerts detected.")
+
+    st.markdown("### 📈 Risk Score Distribution")
+    edges = summary["histogram"]["edges"]
+    st.bar_chart(pd.DataFrame(
+        {"Accounts": summary["histogram"]["counts"]},
+        index=[f"{lo:.2f}–{hi:.2f}" for lo, hi in zip(edges[:-1], edges[1:])]
+    ))
 
-    score = round(st.session_state.dynamic_risk[user], 3)
+    st.markdown("### 🧩 Flagged by Detector")
+    st.bar_chart(pd.DataFrame({"Accounts": summary["flags"]}))
 
-    if score >= 0.7:
-        level = "HIGH"
-        if user not in st.session_state.escalated_accounts:
-            log_alert(f"🚨 Risk escalated to HIGH for {user}")
-        st.session_state.escalated_accounts.add(user)
-    elif score >= 0.35:
-        level = "MEDIUM"
+    st.markdown("### 🔺 Top Movers")
+    if summary["top_movers"]:
+        st.dataframe(pd.DataFrame(summary["top_movers"]), use_container_width=True)
     else:
-        level = "LOW"
-
-    record_risk_history(user, score)
-
-    rows.append({
-        "User": user,
-        "Risk Score": score,
-        "Risk Level": level,
-        "Explanation": generate_dynamic_explanation(
-            user, score, level,
-            st.session_state.get("tx_graph")
-        ),
-        "Status": determine_dynamic_status(user, score, level)
-    })
+        st.caption("No score changes since the previous backend run.")
 
-df = pd.DataFrame(rows)
+    st.markdown("### 📊 Risk Overview")
+
+    f1, f2, f3 = st.columns(3)
+    sort_label = f1.selectbox("Sort by", list(SORT_OPTIONS))
+    order = f2.selectbox("Order", ["desc", "asc"])
+    level_filter = f3.selectbox("Risk Level", ["ALL", "HIGH", "MEDIUM", "LOW"])
+
+    total = summary["accounts"] if level_filter == "ALL" else levels[level_filter]
+    pages = max((total + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+    page_number = st.number_input("Page", min_value=1, max_value=pages, value=1)
+    st.caption(f"{total} accounts · page {page_number} of {pages}")
+
+    page = fetch_accounts_page(
+        (page_number - 1) * PAGE_SIZE, SORT_OPTIONS[sort_label], order, level_filter
+    )
+    table = pd.DataFrame(page["rows"])
+
+    if table.empty:
+        st.info("No accounts match this filter.")
+    else:
+        table["flags"] = table["flags"].str.join(", ")
+        st.dataframe(
+            table.style.map(color_risk, subset=["final_risk"]),
+            use_container_width=True,
+            height=420
+        )
+
+    st.stop()
+
+# -----------------------------------------------------
+# Risk Evolution (backend clock, one shared state per tick)
+# -----------------------------------------------------
+with st.spinner("📡 Synchronizing with AML backend..."):
+    evolution = fetch_evolution()
+    table = load_evolution_table(evolution["version"])
+
+df = table["df"]
+st.session_state.dynamic_risk = table["risk"]
+st.session_state.escalated_accounts = table["escalated"]
 
 # Build / update transaction network (SAFE UPDATE)
 current_users = df["User"].tolist()
@@ -366,59 +432,19 @@ else:
         if not G.has_node(u):
             G.add_node(u, risk=st.session_state.dynamic_risk.get(u, 0))
 
+# Classify every account once per rerun (shared by investigation & SAR export)
+typology_users, typology_labels = classify_typologies(
+    st.session_state.tx_graph,
+    st.session_state.dynamic_risk,
+    users=current_users
+)
+typology_index = {u: i for i, u in enumerate(typology_users)}
 
-# -----------------------------------------------------
-# Metrics
-# -----------------------------------------------------
-total_users = len(df)
-high = (df["Risk Level"] == "HIGH").sum()
-medium = (df["Risk Level"] == "MEDIUM").sum()
-low = (df["Risk Level"] == "LOW").sum()
-
-# =====================================================
-# 🛰️ MODE 1 — MONITORING
-# =====================================================
-if st.session_state.mode == "🛰️ Monitoring":
-
-    st.markdown("## 🛰️ Live System Monitoring")
-
-    c1, c2, c3, c4 = st.columns(4)
-    c1.metric("👥 Accounts", total_users)
-    c2.metric("🔴 High Risk", high)
-    c3.metric("🟠 Medium Risk", medium)
-    c4.metric("🟢 Low Risk", low)
-
-    st.markdown("### 📊 System Impact Metrics")
-    impact = compute_impact_metrics(df, st.session_state.risk_history)
-    for k, v in impact.items():
-        st.write(f"**{k}:** {v}")
-
-    st.markdown("### 🚨 Live Alert Feed")
-    if st.session_state.alert_log:
-        for alert in st.session_state.alert_log:
-            st.error(alert)
-    else:
-        st.success("No critical alerts detected.")
-
-    st.markdown("### 📊 Risk Overview")
-
-    def color_risk(val):
-        if val == "HIGH":
-            return "background-color:#7f1d1d"
-        elif val == "MEDIUM":
-            return "background-color:#78350f"
-        return "background-color:#14532d"
-
-    st.dataframe(
-        df.style.applymap(color_risk, subset=["Risk Level"]),
-        use_container_width=True,
-        height=420
-    )
 
 # =====================================================
 # 🕵️ MODE 2 — INVESTIGATION
 # =====================================================
-elif st.session_state.mode == "🕵️ Investigation":
+if st.session_state.mode == "🕵️ Investigation":
 
     st.markdown("## 🕵️ Investigation Console")
 
@@ -437,8 +463,12 @@ elif st.session_state.mode == "🕵️ Investigation":
         """)
 
         st.markdown("#### ⏱️ Risk Evolution Timeline")
+        st.session_state.risk_history[user] = fetch_risk_history(user)
         hist_df = pd.DataFrame(st.session_state.risk_history[user])
-        st.line_chart(hist_df.set_index("time")["score"])
+        if hist_df.empty:
+            st.info("No risk history recorded yet.")
+        else:
+            st.line_chart(hist_df.set_index("time")["score"])
 
         st.markdown("---")
 
@@ -461,11 +491,7 @@ elif st.session_state.mode == "🕵️ Investigation":
                 # ---------------- Fraud Typology Classification ----------------
         st.markdown("#### 🧠 Fraud Typology Assessment")
 
-        typologies = classify_fraud_typology(
-            user=user,
-            risk_score=record["Risk Score"],
-            G=st.session_state.tx_graph
-        )
+        typologies = typology_records(typology_labels[typology_index[user]])
 
         for t in typologies:
             st.write(f"**{t['type']}** — {t['reason']}")
@@ -545,11 +571,7 @@ elif st.session_state.mode == "🕵️ Investigation":
                     user,
                     st.session_state.tx_graph
                 ),
-                typologies=classify_fraud_typology(
-                    user,
-                    record["Risk Score"],
-                    st.session_state.tx_graph
-                ),
+                typologies=typologies,
                 forecast=forecast,
                 compliance_rules=aml_compliance_mapping(
                     user,
@@ -647,19 +669,15 @@ elif st.session_state.mode == "🧪 Simulation":
 
     if c1.button("💸 Simulate Smurfing"):
         target = random.choice(df["User"].tolist())
-        st.session_state.dynamic_risk[target] += 0.15
-        log_alert(f"💸 Smurfing injected on {target}")
+        inject_risk([target], 0.15, f"💸 Smurfing injected on {target}", "SMURFING")
         st.warning(f"Smurfing simulated on {target}")
 
     if c2.button("🧍‍♂️ Simulate Mule Network"):
         targets = random.sample(df["User"].tolist(), 3)
-        for t in targets:
-            st.session_state.dynamic_risk[t] += 0.2
-        log_alert("🧍‍♂️ Mule network injected")
+        inject_risk(targets, 0.2, "🧍‍♂️ Mule network injected", "MULE_NETWORK")
         st.warning(f"Mule network simulated on {', '.join(targets)}")
 
     if c3.button("🔁 Simulate Layering"):
         target = random.choice(df["User"].tolist())
-        st.session_state.dynamic_risk[target] += 0.25
-        log_alert(f"🔁 Layering injected on {target}")
+        inject_risk([target], 0.25, f"🔁 Layering injected on {target}", "LAYERING")
         st.warning(f"Layering simulated on {target}")
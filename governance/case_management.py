@@ -3,7 +3,6 @@ AML Case Management & Audit Trail
 Handles lifecycle of suspicious accounts
 """
 
-import streamlit as st
 from datetime import datetime
 import uuid
 
@@ -11,22 +10,33 @@ import uuid
 # -----------------------------------------------------
 # Case Store Initialization
 # -----------------------------------------------------
-def initialize_case_store():
-    if "cases" not in st.session_state:
-        st.session_state.cases = {}
+def initialize_case_store(store=None):
+    """
+    Returns the case store: any dict-like (backend use), defaulting to
+    the dashboard's Streamlit session state.
+    """
 
-    if "audit_trail" not in st.session_state:
-        st.session_state.audit_trail = []
+    if store is None:
+        import streamlit as st
+        store = st.session_state
+
+    if "cases" not in store:
+        store["cases"] = {}
+
+    if "audit_trail" not in store:
+        store["audit_trail"] = []
+
+    return store
 
 
 # -----------------------------------------------------
 # Case Creation
 # -----------------------------------------------------
-def create_case(user, risk_level):
-    initialize_case_store()
+def create_case(user, risk_level, store=None):
+    store = initialize_case_store(store)
 
     # Prevent duplicate cases
-    for case in st.session_state.cases.values():
+    for case in store["cases"].values():
         if case["user"] == user and case["status"] != "Closed":
             return case
 
@@ -41,8 +51,8 @@ def create_case(user, risk_level):
         "actions": []
     }
 
-    st.session_state.cases[case_id] = case
-    log_audit(case_id, f"Case created for {user} with risk level {risk_level}")
+    store["cases"][case_id] = case
+    log_audit(case_id, f"Case created for {user} with risk level {risk_level}", store)
 
     return case
 
@@ -50,10 +60,10 @@ def create_case(user, risk_level):
 # -----------------------------------------------------
 # Case Update Actions
 # -----------------------------------------------------
-def update_case_status(case_id, new_status, note=""):
-    initialize_case_store()
+def update_case_status(case_id, new_status, note="", store=None):
+    store = initialize_case_store(store)
 
-    case = st.session_state.cases.get(case_id)
+    case = store["cases"].get(case_id)
     if not case:
         return
 
@@ -64,14 +74,16 @@ def update_case_status(case_id, new_status, note=""):
         "note": note
     })
 
-    log_audit(case_id, f"Status changed to {new_status}. {note}")
+    log_audit(case_id, f"Status changed to {new_status}. {note}", store)
 
 
 # -----------------------------------------------------
 # Audit Trail Logger
 # -----------------------------------------------------
-def log_audit(case_id, message):
-    st.session_state.audit_trail.append({
+def log_audit(case_id, message, store=None):
+    store = initialize_case_store(store)
+
+    store["audit_trail"].append({
         "time": datetime.now().strftime("%H:%M:%S"),
         "case_id": case_id,
         "message": message
@@ -81,17 +93,16 @@ def log_audit(case_id, message):
 # -----------------------------------------------------
 # Retrieve Cases
 # -----------------------------------------------------
-def get_cases():
-    initialize_case_store()
-    return st.session_state.cases
+def get_cases(store=None):
+    return initialize_case_store(store)["cases"]
 
 
-def get_audit_trail(case_id=None):
-    initialize_case_store()
+def get_audit_trail(case_id=None, store=None):
+    store = initialize_case_store(store)
 
     if case_id:
         return [
-            a for a in st.session_state.audit_trail
+            a for a in store["audit_trail"]
             if a["case_id"] == case_id
         ]
-    return st.session_state.audit_trail
+    return store["audit_trail"]
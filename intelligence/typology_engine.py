@@ -3,72 +3,184 @@ Fraud Typology Reasoning Engine
 Classifies suspicious behavior into AML typologies
 """
 
-import streamlit as st
+import numpy as np
+import scipy.sparse as sp
 
+from src.betweenness import broker_accounts
 
-def classify_fraud_typology(user, risk_score, G):
+HIGH_RISK_THRESHOLD = 0.7
+SMURFING_BAND = (0.35, 0.6)
+MULE_MIN_HIGH_RISK_NEIGHBORS = 2
+
+# Column order of the typology label matrix
+TYPOLOGIES = [
+    {
+        "key": "SMURFING",
+        "type": "💸 Smurfing",
+        "reason": (
+            "Multiple low-to-medium risk behaviors detected, "
+            "consistent with transaction structuring to avoid thresholds."
+        )
+    },
+    {
+        "key": "MULE_NETWORK",
+        "type": "🧍‍♂️ Mule Network",
+        "reason": (
+            "Account is directly connected to multiple high-risk entities, "
+            "indicating possible use as a money mule."
+        )
+    },
+    {
+        "key": "LAYERING",
+        "type": "🕸️ Layering",
+        "reason": (
+            "Account lies on an unusually large share of the money paths "
+            "between otherwise separate groups, "
+            "suggesting attempts to obscure fund origin."
+        )
+    },
+    {
+        "key": "HIGH_RISK",
+        "type": "🚨 High-Risk Anomalous Activity",
+        "reason": (
+            "Persistent high-risk behavior observed across monitoring cycles."
+        )
+    },
+    {
+        "key": "NONE",
+        "type": "ℹ️ No Dominant Typology Detected",
+        "reason": (
+            "Account shows irregular behavior but does not strongly match "
+            "known AML typologies at this stage."
+        )
+    }
+]
+
+TYPOLOGY_KEYS = [t["key"] for t in TYPOLOGIES]
+
+
+# -----------------------------------------------------
+# Batch Classification (backend, no Streamlit)
+# -----------------------------------------------------
+def classify_account_typologies(adjacency, scores, broker=None):
+    """
+    Classifies every account in one pass.
+
+    Parameters:
+    - adjacency: sparse sender x receiver matrix over account codes
+    - scores: risk score per account code, aligned with adjacency rows
+    - broker: bool per account from approximate betweenness
+      (src/betweenness.py); computed from adjacency when omitted
+
+    Returns:
+    - boolean label matrix of shape (accounts, len(TYPOLOGIES))
+      in TYPOLOGIES column order
+    """
+
+    scores = np.asarray(scores, dtype=float)
+
+    structure = adjacency.tocsr(copy=True)
+    structure.data[:] = 1
+
+    if broker is None:
+        broker = broker_accounts(structure)
+
+    # High-risk neighbour counts as a sparse matrix-vector product
+    high = (scores >= HIGH_RISK_THRESHOLD).astype(float)
+    high_risk_neighbor_count = structure @ high
+
+    return typology_label_matrix(
+        scores, high_risk_neighbor_count, np.asarray(broker, dtype=bool)
+    )
+
+
+def classify_typologies(G, risk_scores, users=None):
+    """
+    Batch classification for a networkx graph with dict risk scores
+    (dashboard network).
+
+    Returns:
+    - (users, labels) with labels in TYPOLOGIES column order
+    """
+
+    if users is None:
+        users = list(risk_scores.keys())
+    else:
+        users = list(users)
+
+    nodes = list(G.nodes()) if G is not None else []
+    index = {n: i for i, n in enumerate(nodes)}
+    for u in users:
+        if u not in index:
+            index[u] = len(index)
+
+    all_nodes = list(index)
+    scores = np.array(
+        [float(risk_scores.get(n, 0)) for n in all_nodes], dtype=float
+    )
+
+    adjacency = sp.csr_matrix((len(all_nodes), len(all_nodes)))
+    if nodes:
+        import networkx as nx
+
+        adjacency = sp.csr_matrix(nx.to_scipy_sparse_array(
+            G, nodelist=nodes, weight=None, format="csr"
+        ))
+        adjacency.resize((len(all_nodes), len(all_nodes)))
+
+    labels = classify_account_typologies(adjacency, scores)
+
+    return users, labels[[index[u] for u in users]]
+
+
+def typology_label_matrix(scores, high_risk_neighbor_count, broker):
+    """
+    Applies the typology rules to aligned per-account arrays.
+    """
+
+    labels = np.zeros((len(scores), len(TYPOLOGIES)), dtype=bool)
+
+    low, high = SMURFING_BAND
+    labels[:, 0] = (scores >= low) & (scores < high)
+    labels[:, 1] = high_risk_neighbor_count >= MULE_MIN_HIGH_RISK_NEIGHBORS
+    labels[:, 2] = broker
+    labels[:, 3] = scores >= HIGH_RISK_THRESHOLD
+    labels[:, 4] = ~labels[:, :4].any(axis=1)
+
+    return labels
+
+
+def typology_records(label_row):
+    """
+    Converts one row of the label matrix into typology dicts
+    (same shape as classify_fraud_typology output).
+    """
+
+    return [
+        {"type": t["type"], "reason": t["reason"]}
+        for t, flag in zip(TYPOLOGIES, label_row) if flag
+    ]
+
+
+# -----------------------------------------------------
+# Single Account Classification
+# -----------------------------------------------------
+def classify_fraud_typology(user, risk_score, G, risk_lookup=None):
     """
     Determines likely fraud typology for a user
     based on risk score and transaction network.
+
+    risk_lookup defaults to the dashboard session's dynamic risk.
     """
 
-    typologies = []
-
-    # ---------------- Smurfing ----------------
-    if risk_score < 0.6 and risk_score >= 0.35:
-        typologies.append({
-            "type": "💸 Smurfing",
-            "reason": (
-                "Multiple low-to-medium risk behaviors detected, "
-                "consistent with transaction structuring to avoid thresholds."
-            )
-        })
-
-    # ---------------- Network-Based Analysis ----------------
-    if G is not None and G.has_node(user):
-        neighbors = list(G.neighbors(user))
-        high_risk_neighbors = [
-            n for n in neighbors
-            if st.session_state.dynamic_risk.get(n, 0) >= 0.7
-        ]
-
-        # Mule Network
-        if len(high_risk_neighbors) >= 2:
-            typologies.append({
-                "type": "🧍‍♂️ Mule Network",
-                "reason": (
-                    "Account is directly connected to multiple high-risk entities, "
-                    "indicating possible use as a money mule."
-                )
-            })
-
-        # Layering
-        if len(neighbors) >= 4:
-            typologies.append({
-                "type": "🕸️ Layering",
-                "reason": (
-                    "Dense transaction connectivity detected, "
-                    "suggesting attempts to obscure fund origin."
-                )
-            })
-
-    # ---------------- High Risk Catch ----------------
-    if risk_score >= 0.7:
-        typologies.append({
-            "type": "🚨 High-Risk Anomalous Activity",
-            "reason": (
-                "Persistent high-risk behavior observed across monitoring cycles."
-            )
-        })
-
-    # ---------------- Fallback ----------------
-    if not typologies:
-        typologies.append({
-            "type": "ℹ️ No Dominant Typology Detected",
-            "reason": (
-                "Account shows irregular behavior but does not strongly match "
-                "known AML typologies at this stage."
-            )
-        })
-
-    return typologies
+    if risk_lookup is None:
+        import streamlit as st
+        risk_lookup = st.session_state.dynamic_risk
+
+    # Layering needs the whole network (betweenness), so classify the
+    # account through the batch path
+    risk = dict(risk_lookup)
+    risk[user] = risk_score
+    _, labels = classify_typologies(G, risk, users=[user])
+
+    return typology_records(labels[0])
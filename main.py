@@ -1,50 +1,46 @@
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from src.behavior_features import load_transactions, build_user_behavior
-from src.anomaly_detector import detect_anomalies
-from src.transaction_graph import build_transaction_graph, detect_graph_anomalies
-from src.temporal_detector import detect_temporal_anomalies
-from src.risk_engine import compute_final_risk
 from src.explainability import generate_explanation
-from src.fraud_simulator import inject_fraud
-
-SIMULATE_FRAUD = True
-
-
-def run_aml_pipeline():
-    transactions = load_transactions()
+from src.risk_engine import decode_final_risk
+from src.engines import PRELOAD, warm_up
+from src.tracing import TracingMiddleware, span, tracer
+from api import router as aml_router, build_pipeline_state, get_evolution, get_pipeline_state
 
-    if SIMULATE_FRAUD:
-        transactions = inject_fraud(transactions)
+if PRELOAD:
+    # Pre-fork warm-up (e.g. gunicorn --preload): workers inherit the
+    # imported engines instead of each importing them on first request
+    warm_up()
 
-    behavior_profiles = build_user_behavior(transactions)
-    behavior_risk = detect_anomalies(behavior_profiles)
 
-    graph = build_transaction_graph(transactions)
-    graph_risk = detect_graph_anomalies(graph)
+def run_aml_pipeline(path=None):
+    state = build_pipeline_state(path) if path else get_pipeline_state()
 
-    temporal_risk = detect_temporal_anomalies(transactions)
-
-    final_risk = compute_final_risk(
-        behavior_risk,
-        graph_risk,
-        temporal_risk
+    final_risk = decode_final_risk(
+        state["final_risk"], state["accounts"], state["symbols"]
     )
 
     results = {}
 
-    for user, result in final_risk.items():
-        explanation = generate_explanation(
-            user,
-            behavior_risk,
-            graph_risk,
-            final_risk
-        )
-
-        results[user] = {
-            "risk": result,
-            "explanation": explanation
-        }
+    # Decode at the API boundary: account codes -> ids
+    with span("explain.all", accounts=len(final_risk), model_version=state["model_version"]):
+        for code, (user, result) in zip(state["accounts"], final_risk.items()):
+            explanation = generate_explanation(
+                code,
+                state["behavior_risk"],
+                state["graph_risk"],
+                state["final_risk"],
+                linkage_risk=state["device_linkage"]["linkage_risk"],
+                network_risk=state["network_risk"],
+                cycle_risk=state["cycles"]["cycle_risk"]
+            )
+
+            results[user] = {
+                "risk": result,
+                "explanation": explanation
+            }
 
     return results
 
@@ -53,13 +49,30 @@ def run_aml_pipeline():
 # FastAPI App (CORRECTED)
 # -------------------------------------------------
 
+@asynccontextmanager
+async def lifespan(app):
+    # Map the last snapshot (or build the first one) without holding up
+    # the port; requests arriving meanwhile wait for the same state
+    threading.Thread(target=get_pipeline_state, daemon=True).start()
+    # One risk evolution clock for every dashboard session
+    get_evolution()
+    yield
+
+
 app = FastAPI(
     title="NeuroAML API",
     description="Multi-layer Anti–Money Laundering Intelligence System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 
+app.include_router(aml_router)
+
+# Request spans (NEUROAML_TRACING=0 turns tracing off)
+app.add_middleware(TracingMiddleware)
+
+
 @app.get("/")
 def health_check():
     return {"status": "NeuroAML API is running"}
@@ -68,3 +81,17 @@ def health_check():
 @app.get("/aml/run")
 def run_aml():
     return run_aml_pipeline()
+
+
+@app.get("/debug/traces")
+def debug_traces(limit: int = 20, name: str = None, min_ms: float = 0.0):
+    """
+    Slowest recent traces (request or pipeline) with their spans.
+    """
+    return {
+        "enabled": tracer.enabled,
+        "buffered": len(tracer.traces),
+        "file": tracer.path,
+        "file_error": tracer.file_error,
+        "traces": tracer.slowest(limit, name, min_ms)
+    }
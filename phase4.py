@@ -7,7 +7,6 @@ Includes:
 """
 
 import random
-import streamlit as st
 from datetime import datetime
 
 
@@ -48,9 +47,18 @@ def compute_impact_metrics(df, risk_history):
     Computes system-level impact metrics for judges.
     """
 
-    total_accounts = len(df)
-    high_risk = (df["Risk Level"] == "HIGH").sum()
-    medium_risk = (df["Risk Level"] == "MEDIUM").sum()
+    return impact_metrics_from_counts(
+        len(df),
+        (df["Risk Level"] == "HIGH").sum(),
+        (df["Risk Level"] == "MEDIUM").sum(),
+        risk_history
+    )
+
+
+def impact_metrics_from_counts(total_accounts, high_risk, medium_risk, risk_history):
+    """
+    Same metrics from risk level counts, e.g. the backend /aml/summary.
+    """
 
     # Simulated baseline assumptions (acceptable for SIH)
     baseline_false_positives = int(total_accounts * 0.30)
@@ -90,11 +98,15 @@ def demo_mode_multiplier():
     Safe, read-only access to session_state.
     """
 
+    import streamlit as st
+
     return 2.5 if st.session_state.get("demo_mode", False) else 1.0
 
 
 
 def demo_mode_toggle_ui():
+    import streamlit as st
+
     # ---- SAFE session_state initialization ----
     if "demo_mode" not in st.session_state:
         st.session_state.demo_mode = False
@@ -0,0 +1,504 @@
+"""
+Alert Engine
+Turns escalations and detector hits into analyst alerts.
+
+- Priority queue: open alerts ordered by severity, then score.
+- Deduplication: one alert per (account, kind) inside the account
+  suppression window; repeats only bump its count and score.
+- Typology budget: at most TYPOLOGY_BURST new alerts per kind per
+  TYPOLOGY_WINDOW_SECONDS, so a burst of one pattern does not flood
+  the queue (CRITICAL alerts always pass).
+- Escalation rules raise the severity of alerts that keep firing, hit
+  extreme scores, or share an account with other kinds of alert.
+- Every change is appended to a JSON-lines history that is replayed
+  on startup; memory holds only the open alerts (at most
+  MAX_OPEN_ALERTS, lowest priority evicted first) and live windows.
+  Past HISTORY_MAX_BYTES the history is compacted to the latest line
+  per alert.
+"""
+
+import heapq
+import json
+import os
+import threading
+import time
+
+ALERT_LOG = os.environ.get("NEUROAML_ALERT_LOG", "data/alerts.jsonl")
+MAX_OPEN_ALERTS = int(os.environ.get("NEUROAML_MAX_OPEN_ALERTS", "10000"))
+ACCOUNT_WINDOW_SECONDS = float(os.environ.get("NEUROAML_ALERT_ACCOUNT_WINDOW", "3600"))
+TYPOLOGY_WINDOW_SECONDS = float(os.environ.get("NEUROAML_ALERT_TYPOLOGY_WINDOW", "60"))
+TYPOLOGY_BURST = int(os.environ.get("NEUROAML_ALERT_TYPOLOGY_BURST", "100"))
+HISTORY_MAX_BYTES = int(os.environ.get("NEUROAML_ALERT_LOG_BYTES", str(64 << 20)))
+HISTORY_CHUNK = 1 << 16     # bytes read per step when paging history backwards
+
+SEVERITIES = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+CRITICAL = SEVERITIES.index("CRITICAL")
+
+# Applied in order whenever an alert is raised or repeats; each rule
+# escalates an alert at most once
+ESCALATION_RULES = [
+    {"name": "repeat", "min_count": 3, "raise": 1},
+    {"name": "extreme_score", "min_score": 0.95, "severity": "CRITICAL"},
+    {"name": "multi_typology", "min_kinds": 2, "severity": "HIGH"},
+]
+
+
+def _priority(alert):
+    # Smaller sorts first: higher severity, then higher score, then older
+    return (-alert["severity"], -alert["score"], alert["alert_id"])
+
+
+def public_alert(alert):
+    return {**alert, "severity": SEVERITIES[alert["severity"]]}
+
+
+class AlertEngine:
+    """
+    Thread-safe alert store. submit_many() is the burst path: one lock,
+    one history write for any number of raised alerts.
+    """
+
+    def __init__(self, path=None, clock=time.time):
+        self.path = path or ALERT_LOG
+        self.clock = clock
+        self._lock = threading.Lock()
+
+        self._open = {}             # alert_id -> alert
+        self._by_account = {}       # account_id -> {kind: alert_id} (open)
+        self._queue = []            # (priority, alert_id), lazy deletion
+        self._floor = []            # (inverse priority, alert_id), lazy deletion
+
+        # ("account", account_id, kind) -> [expires_at, alert_id]
+        # ("typology", kind) -> [expires_at, alerts created]
+        self._windows = {}
+        self._expiry = []           # (expires_at, key): one entry per live key
+
+        self._next_id = 1
+        self.counters = {
+            "raised": 0, "deduplicated": 0, "suppressed": 0,
+            "escalated": 0, "dropped": 0, "acknowledged": 0,
+        }
+        self.suppressed_by_kind = {}
+
+        self._compact_at = HISTORY_MAX_BYTES
+        self._replay()
+
+    # -------------------------------------------------
+    # Windows
+    # -------------------------------------------------
+    def _hold(self, key, expires_at, value):
+        # Starts or extends a window; the heap keeps one entry per key
+        window = self._windows.get(key)
+        if window is None:
+            heapq.heappush(self._expiry, (expires_at, key))
+            self._windows[key] = [expires_at, value]
+        else:
+            window[0] = max(window[0], expires_at)
+
+    def _expire(self, now):
+        while self._expiry and self._expiry[0][0] <= now:
+            _, key = heapq.heappop(self._expiry)
+            expires_at = self._windows[key][0]
+            if expires_at > now:
+                # Extended since it was pushed
+                heapq.heappush(self._expiry, (expires_at, key))
+            else:
+                del self._windows[key]
+
+    # -------------------------------------------------
+    # Queue
+    # -------------------------------------------------
+    def _enqueue(self, alert):
+        alert["_rank"] = _priority(alert)
+        heapq.heappush(self._queue, (alert["_rank"], alert["alert_id"]))
+        inverse = tuple(-value for value in alert["_rank"])
+        heapq.heappush(self._floor, (inverse, alert["alert_id"]))
+
+        if len(self._queue) > 2 * len(self._open) + 64:
+            # Drop stale entries left by escalations and closed alerts
+            self._queue = [e for e in self._queue if self._live(e)]
+            heapq.heapify(self._queue)
+            self._floor = [
+                e for e in self._floor
+                if self._live((tuple(-v for v in e[0]), e[1]))
+            ]
+            heapq.heapify(self._floor)
+
+    def _live(self, entry):
+        alert = self._open.get(entry[1])
+        return alert is not None and alert["_rank"] == entry[0]
+
+    def _lowest(self):
+        while self._floor:
+            inverse, alert_id = self._floor[0]
+            if self._live((tuple(-v for v in inverse), alert_id)):
+                return self._open[alert_id]
+            heapq.heappop(self._floor)
+        return None
+
+    def _close(self, alert, status, now):
+        del self._open[alert["alert_id"]]
+        kinds = self._by_account.get(alert["account_id"], {})
+        if kinds.get(alert["kind"]) == alert["alert_id"]:
+            del kinds[alert["kind"]]
+            if not kinds:
+                del self._by_account[alert["account_id"]]
+        alert["status"] = status
+        alert["closed_at"] = now
+
+    # -------------------------------------------------
+    # Escalation
+    # -------------------------------------------------
+    def _escalate(self, alert):
+        kinds = len(set(self._by_account.get(alert["account_id"], {})) | {alert["kind"]})
+        applied = alert["escalations"]
+        severity = alert["severity"]
+
+        for rule in ESCALATION_RULES:
+            if rule["name"] in applied:
+                continue
+            if alert["count"] < rule.get("min_count", 0):
+                continue
+            if alert["score"] < rule.get("min_score", 0):
+                continue
+            if kinds < rule.get("min_kinds", 0):
+                continue
+
+            if "raise" in rule:
+                target = min(severity + rule["raise"], CRITICAL)
+            else:
+                target = max(severity, SEVERITIES.index(rule["severity"]))
+            if target > severity:
+                severity = target
+                applied.append(rule["name"])
+
+        if severity > alert["severity"]:
+            alert["severity"] = severity
+            self.counters["escalated"] += 1
+            return True
+        return False
+
+    # -------------------------------------------------
+    # Raising
+    # -------------------------------------------------
+    def submit(self, account_id, kind, severity, score, message=None, now=None):
+        return self.submit_many([{
+            "account_id": account_id, "kind": kind, "severity": severity,
+            "score": score, "message": message,
+        }], now)[0]
+
+    def submit_many(self, records, now=None):
+        """
+        records: dicts with account_id, kind, severity (a SEVERITIES
+        name), score and optional message. Returns, per record, the
+        new or updated alert (public form) or None when suppressed.
+        """
+
+        now = self.clock() if now is None else now
+        results, changed = [None] * len(records), {}
+
+        # Most severe first, so a burst over the typology budget keeps
+        # the alerts that matter
+        order = sorted(
+            range(len(records)),
+            key=lambda i: (-SEVERITIES.index(records[i]["severity"]), -records[i]["score"])
+        )
+
+        with self._lock:
+            self._expire(now)
+
+            for i in order:
+                alert = self._raise(records[i], now)
+                if alert is not None:
+                    changed[alert["alert_id"]] = alert
+                    for other in alert.pop("_changed", []):
+                        changed[other["alert_id"]] = other
+                    results[i] = public_alert(_strip(alert))
+
+            self._append(changed.values())
+
+        return results
+
+    def _raise(self, record, now):
+        account_id, kind = str(record["account_id"]), record["kind"]
+        score = round(float(record["score"]), 4)
+        key = ("account", account_id, kind)
+
+        window = self._windows.get(key)
+        if window is not None:
+            # Deduplicate into the window's alert while it is open
+            self._hold(key, now + ACCOUNT_WINDOW_SECONDS, window[1])
+            alert = self._open.get(window[1])
+            self.counters["deduplicated"] += 1
+            if alert is None:
+                return None
+
+            alert["count"] += 1
+            alert["last_seen"] = now
+            alert["score"] = max(alert["score"], score)
+            self._escalate(alert)
+            if _priority(alert) != alert["_rank"]:
+                self._enqueue(alert)
+            return alert
+
+        severity = SEVERITIES.index(record["severity"])
+
+        budget = self._windows.get(("typology", kind))
+        if budget is not None and budget[1] >= TYPOLOGY_BURST and severity < CRITICAL:
+            self.counters["suppressed"] += 1
+            self.suppressed_by_kind[kind] = self.suppressed_by_kind.get(kind, 0) + 1
+            return None
+
+        alert = {
+            "alert_id": self._next_id,
+            "account_id": account_id,
+            "kind": kind,
+            "severity": severity,
+            "score": score,
+            "message": record.get("message") or f"{kind} alert for {account_id}",
+            "count": 1,
+            "status": "open",
+            "created_at": now,
+            "last_seen": now,
+            "escalations": [],
+        }
+        self._escalate(alert)
+
+        # Bounded queue: the lowest-priority open alert makes room
+        changed = []
+        if len(self._open) >= MAX_OPEN_ALERTS:
+            lowest = self._lowest()
+            if lowest is None or _priority(lowest) <= _priority(alert):
+                self.counters["dropped"] += 1
+                return None
+            self._close(lowest, "dropped", now)
+            self.counters["dropped"] += 1
+            changed.append(lowest)
+
+        self._next_id += 1
+        self._open[alert["alert_id"]] = alert
+        self._by_account.setdefault(account_id, {})[kind] = alert["alert_id"]
+        self._enqueue(alert)
+        self._hold(key, now + ACCOUNT_WINDOW_SECONDS, alert["alert_id"])
+        self._hold(("typology", kind), now + TYPOLOGY_WINDOW_SECONDS, 0)
+        self._windows[("typology", kind)][1] += 1
+        self.counters["raised"] += 1
+
+        # A second kind on the same account may escalate its other alerts
+        for other_id in self._by_account[account_id].values():
+            other = self._open[other_id]
+            if other is not alert and self._escalate(other):
+                self._enqueue(other)
+                changed.append(other)
+
+        alert["_changed"] = changed
+        return alert
+
+    def acknowledge(self, alert_id, note=None):
+        with self._lock:
+            alert = self._open.get(alert_id)
+            if alert is None:
+                return None
+            self._close(alert, "acknowledged", self.clock())
+            if note:
+                alert["note"] = note
+            self.counters["acknowledged"] += 1
+            self._append([alert])
+            return public_alert(_strip(alert))
+
+    # -------------------------------------------------
+    # Reading
+    # -------------------------------------------------
+    def queue(self, offset=0, limit=50):
+        """
+        Open alerts in priority order: {"total", "offset", "limit",
+        "alerts"}.
+        """
+
+        with self._lock:
+            live = [entry for entry in self._queue if self._live(entry)]
+            page = heapq.nsmallest(offset + limit, live)[offset:]
+            alerts = [public_alert(_strip(self._open[alert_id])) for _, alert_id in page]
+            total = len(self._open)
+
+        return {"total": total, "offset": offset, "limit": limit, "alerts": alerts}
+
+    def history(self, offset=0, limit=50):
+        """
+        Latest state of every persisted alert, newest change first.
+        Reads the history file backwards, so recent pages are cheap.
+        """
+
+        # Appends happen under the lock, so the size seen under it ends
+        # on a complete line; later appends are left for the next call
+        with self._lock:
+            end = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+        seen, alerts = set(), []
+        for line in _reverse_lines(self.path, end):
+            try:
+                alert = json.loads(line)
+            except ValueError:
+                continue    # torn line after a crash
+            if alert["alert_id"] in seen:
+                continue
+            seen.add(alert["alert_id"])
+            if len(seen) > offset:
+                alerts.append(alert)
+                if len(alerts) >= limit:
+                    break
+
+        return {"offset": offset, "limit": limit, "alerts": alerts}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "open": len(self._open),
+                "max_open": MAX_OPEN_ALERTS,
+                "windows": len(self._windows),
+                **self.counters,
+                "suppressed_by_kind": dict(self.suppressed_by_kind),
+            }
+
+    # -------------------------------------------------
+    # History File
+    # -------------------------------------------------
+    def _append(self, alerts):
+        lines = [
+            json.dumps(public_alert(_strip(alert)), ensure_ascii=False) + "\n"
+            for alert in alerts
+        ]
+        if not lines:
+            return
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.writelines(lines)
+            size = file.tell()
+        if size > self._compact_at:
+            self._compact()
+
+    def _compact(self):
+        # Keep the latest line per alert, in the order of those lines:
+        # replay and history() read the same states from the smaller file
+        latest = {}
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    alert_id = json.loads(line)["alert_id"]
+                except ValueError:
+                    continue    # torn line after a crash
+                latest.pop(alert_id, None)
+                latest[alert_id] = line if line.endswith("\n") else line + "\n"
+
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.writelines(latest.values())
+            size = file.tell()
+        os.replace(temporary, self.path)
+        # Compacting again only pays off once the file has doubled
+        self._compact_at = max(HISTORY_MAX_BYTES, 2 * size)
+
+    def _replay(self):
+        # Rebuild open alerts and live dedup windows from the history
+        if not os.path.exists(self.path):
+            return
+
+        now = self.clock()
+        latest = {}
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    alert = json.loads(line)
+                except ValueError:
+                    continue    # torn last line after a crash
+                self._next_id = max(self._next_id, alert["alert_id"] + 1)
+
+                if alert["status"] == "open":
+                    alert["severity"] = SEVERITIES.index(alert["severity"])
+                    latest[alert["alert_id"]] = alert
+                else:
+                    latest.pop(alert["alert_id"], None)
+
+                expires_at = alert["last_seen"] + ACCOUNT_WINDOW_SECONDS
+                if expires_at > now:
+                    key = ("account", alert["account_id"], alert["kind"])
+                    self._hold(key, expires_at, alert["alert_id"])
+
+        for alert in sorted(latest.values(), key=_priority)[:MAX_OPEN_ALERTS]:
+            self._open[alert["alert_id"]] = alert
+            self._by_account.setdefault(alert["account_id"], {})[alert["kind"]] = alert["alert_id"]
+            self._enqueue(alert)
+
+        if os.path.getsize(self.path) > self._compact_at:
+            self._compact()
+
+
+def _strip(alert):
+    # Drop in-memory bookkeeping (keys starting with "_")
+    return {key: value for key, value in alert.items() if not key.startswith("_")}
+
+
+def _reverse_lines(path, end=None):
+    # Lines of a file up to byte offset end (default: its size), last
+    # line first, as bytes
+    if not os.path.exists(path):
+        return
+
+    with open(path, "rb") as file:
+        file.seek(0, os.SEEK_END)
+        position, tail = min(file.tell(), end if end is not None else file.tell()), b""
+        while position > 0:
+            step = min(HISTORY_CHUNK, position)
+            position -= step
+            file.seek(position)
+            lines = (file.read(step) + tail).split(b"\n")
+            tail = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line
+        if tail:
+            yield tail
+
+
+# -----------------------------------------------------
+# Pipeline Detectors
+# -----------------------------------------------------
+# Detector flag -> (alert kind, severity, message)
+DETECTOR_ALERTS = [
+    (lambda state: state["cycles"]["cycle_risk"], "ROUND_TRIPPING", "HIGH",
+     "🔁 Funds return to {account} through a transaction cycle"),
+    (lambda state: state["betweenness"]["broker"], "LAYERING", "HIGH",
+     "🕸️ {account} brokers money between otherwise separate groups"),
+]
+
+
+def pipeline_alerts(state, previous=None):
+    """
+    Alert records for the detector hits of one pipeline state. With the
+    previously published state, only accounts it did not flag are
+    returned, so republishing an unchanged finding is not a repeat.
+    """
+
+    import numpy as np
+
+    scores = state["final_risk"]["risk_score"]
+    records = []
+    for flags, kind, severity, message in DETECTOR_ALERTS:
+        hits = np.asarray(flags(state), dtype=bool)
+        if previous is not None:
+            before = np.asarray(flags(previous), dtype=bool)
+            n = min(len(before), len(hits))
+            hits = hits.copy()
+            hits[:n] &= ~before[:n]
+        codes = np.flatnonzero(hits)
+        for account, code in zip(state["symbols"].accounts.decode(codes), codes):
+            records.append({
+                "account_id": account,
+                "kind": kind,
+                "severity": severity,
+                "score": float(scores[code]),
+                "message": message.format(account=account),
+            })
+    return records
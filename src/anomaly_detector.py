@@ -1,31 +1,172 @@
-from sklearn.ensemble import IsolationForest
-
-def detect_anomalies(behavior_profiles):
-    users = []
-    feature_vectors = []
-
-    for user, profile in behavior_profiles.items():
-        users.append(user)
-        feature_vectors.append([
-            profile["transaction_count"],
-            profile["average_amount"],
-            profile["max_amount"],
-            profile["min_amount"]
-        ])
-
-    model = IsolationForest(
+import hashlib
+import os
+
+import joblib
+import numpy as np
+
+from src.engines import engines
+from src.velocity_features import VELOCITY_FEATURES
+from src.flow_features import FLOW_FEATURES
+
+MODEL_PATH = os.environ.get("NEUROAML_MODEL_PATH", "models/behavior_model.joblib")
+BEHAVIOR_CONTAMINATION = 0.2    # share of active accounts the forest flags
+
+FEATURES = [
+    "transaction_count",
+    "average_amount",
+    "max_amount",
+    "min_amount"
+] + VELOCITY_FEATURES + FLOW_FEATURES
+
+def build_feature_matrix(behavior_profiles):
+    return np.column_stack([
+        np.asarray(behavior_profiles[f], dtype=np.float64) for f in FEATURES
+    ])
+
+def fit_behavior_model(behavior_profiles, contamination=BEHAVIOR_CONTAMINATION):
+    active = np.flatnonzero(behavior_profiles["active"])
+    if len(active) == 0:
+        return None
+
+    # sklearn is loaded on first fit; scoring uses the compiled forest
+    model = engines.isolation_forest(
         n_estimators=100,
-        contamination=0.2,
+        contamination=contamination,
         random_state=42
     )
 
-    predictions = model.fit_predict(feature_vectors)
+    return model.fit(build_feature_matrix(behavior_profiles)[active])
+
+def detect_anomalies(behavior_profiles, model=None):
+    active = np.flatnonzero(behavior_profiles["active"])
+    risk_flags = np.zeros(len(behavior_profiles["active"]), dtype=bool)
+
+    if len(active) == 0:
+        return risk_flags
+
+    if model is None:
+        model = fit_behavior_model(behavior_profiles)
+
+    predictions = model.predict(build_feature_matrix(behavior_profiles)[active])
+
+    # True = HIGH, aligned with account codes
+    risk_flags[active] = predictions == -1
+
+    return risk_flags
+
+def _average_path_length(n_samples):
+    # Expected path length of an unsuccessful BST search, c(n)
+    n = np.asarray(n_samples, dtype=np.float64)
+    length = np.zeros_like(n)
+    length[n == 2] = 1.0
+    big = n > 2
+    length[big] = (
+        2.0 * (np.log(n[big] - 1.0) + np.euler_gamma)
+        - 2.0 * (n[big] - 1.0) / n[big]
+    )
+    return length
+
+def compile_behavior_model(model):
+    """
+    Flattens a fitted IsolationForest into stacked node arrays so small
+    batches are scored with a few vectorized steps instead of one
+    sklearn call per tree. Predictions match model.predict().
+    """
+
+    feature, threshold, left, right, leaf_value, roots = [], [], [], [], [], []
+    offset = 0
+    n_features = model.n_features_in_
+    subsample = len(model.estimators_features_[0]) != n_features
+
+    for tree, features in zip(model.estimators_, model.estimators_features_):
+        t = tree.tree_
+        n_nodes = t.node_count
+
+        # Node depth with the root at 1 (number of nodes on the path)
+        depth = np.zeros(n_nodes)
+        depth[0] = 1
+        for node in range(n_nodes):
+            if t.children_left[node] >= 0:
+                depth[t.children_left[node]] = depth[node] + 1
+                depth[t.children_right[node]] = depth[node] + 1
+
+        internal = t.children_left >= 0
+        tree_feature = np.where(
+            internal,
+            np.asarray(features)[np.maximum(t.feature, 0)] if subsample else t.feature,
+            -1
+        )
+
+        roots.append(offset)
+        feature.append(tree_feature)
+        threshold.append(t.threshold)
+        left.append(np.where(internal, t.children_left + offset, np.arange(n_nodes) + offset))
+        right.append(np.where(internal, t.children_right + offset, np.arange(n_nodes) + offset))
+        leaf_value.append(depth + _average_path_length(t.n_node_samples) - 1.0)
+        offset += n_nodes
+
+    return {
+        "feature": np.concatenate(feature),
+        "threshold": np.concatenate(threshold),
+        "left": np.concatenate(left),
+        "right": np.concatenate(right),
+        "leaf_value": np.concatenate(leaf_value),
+        "roots": np.array(roots),
+        "max_depth": max(e.tree_.max_depth for e in model.estimators_),
+        "denominator": len(model.estimators_) * float(
+            _average_path_length([model.max_samples_])[0]
+        ),
+        "offset": model.offset_,
+    }
+
+def predict_compiled(compiled, X):
+    """
+    Same output as IsolationForest.predict: -1 anomalous, 1 normal.
+    """
+
+    X = np.asarray(X, dtype=np.float32)
+    rows = np.arange(len(X))[:, None]
+    node = np.broadcast_to(compiled["roots"], (len(X), len(compiled["roots"]))).copy()
+
+    for _ in range(compiled["max_depth"]):
+        f = compiled["feature"][node]
+        internal = f >= 0
+        go_left = X[rows, np.maximum(f, 0)] <= compiled["threshold"][node]
+        node = np.where(
+            internal,
+            np.where(go_left, compiled["left"][node], compiled["right"][node]),
+            node
+        )
+
+    depths = compiled["leaf_value"][node].sum(axis=1)
+    denominator = compiled["denominator"]
+    scores = 2 ** -(depths / denominator) if denominator else np.ones(len(X))
+
+    return np.where(-scores - compiled["offset"] < 0, -1, 1)
+
+def save_behavior_model(model, path=None):
+    """
+    Persists the fitted model; returns its content version.
+    """
+
+    path = path or MODEL_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    joblib.dump(model, path)
 
-    results = {}
+    return behavior_model_version(path)
 
-    for i, user in enumerate(users):
-        results[user] = {
-            "risk_flag": "HIGH" if predictions[i] == -1 else "LOW"
-        }
+def behavior_model_version(path=None):
+    path = path or MODEL_PATH
+    if not os.path.isfile(path):
+        return None
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()[:12]
 
-    return results
+def load_behavior_model(path=None):
+    path = path or MODEL_PATH
+    if not os.path.isfile(path):
+        return None
+    return joblib.load(path)
@@ -0,0 +1,310 @@
+"""
+Historical Backfill
+Re-scores the transaction store partition by partition (day or week)
+after a model or fusion-config change. Partitions run in parallel;
+each one carries over a look-back window of earlier history so
+velocity, escalation and behaviour baselines see the context they
+would have seen at the time.
+
+Results are written per partition with the model and config versions
+recorded in a manifest, so an interrupted run resumes where it
+stopped and a version change re-scores only what is stale.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from src.symbols import SYMBOLS, take
+from src.behavior_features import FILE_PATH, load_transactions
+from src.anomaly_detector import (
+    MODEL_PATH,
+    load_behavior_model,
+    behavior_model_version
+)
+from src.risk_engine import CONFIG_PATH, FusionEngine, RISK_LEVELS
+from src.pipeline import run_layers
+from src.cycle_detection import detect_cycles
+from src.risk_propagation import (
+    RiskPropagation,
+    load_confirmed_accounts,
+    seed_vector
+)
+
+DAY_US = 86_400_000_000
+PARTITIONS = {
+    "day": DAY_US,
+    "week": 7 * DAY_US,
+}
+# 1970-01-01 was a Thursday; shift so weeks start on Monday
+_WEEK_OFFSET_US = 3 * DAY_US
+
+DEFAULT_LOOKBACK_DAYS = 30
+OUTPUT_DIR = "backfill"
+MANIFEST = "manifest.json"
+
+
+# -----------------------------------------------------
+# Partitioning
+# -----------------------------------------------------
+def partition_bounds(timestamps, partition="day"):
+    """
+    [(key, start_us, end_us)] covering the sorted timestamps.
+    """
+
+    if len(timestamps) == 0:
+        return []
+
+    width = PARTITIONS[partition]
+    offset = _WEEK_OFFSET_US if partition == "week" else 0
+
+    first = (timestamps[0] + offset) // width
+    last = (timestamps[-1] + offset) // width
+
+    bounds = []
+    for index in range(int(first), int(last) + 1):
+        start = index * width - offset
+        key = datetime.fromtimestamp(start / 1e6, tz=timezone.utc).strftime("%Y-%m-%d")
+        bounds.append((key, start, start + width))
+    return bounds
+
+
+# -----------------------------------------------------
+# Manifest
+# -----------------------------------------------------
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST)
+    if not os.path.isfile(path):
+        return {"partitions": {}}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _is_current(entry, versions):
+    return (
+        entry is not None
+        and entry.get("status") == "done"
+        and all(entry.get(k) == v for k, v in versions.items())
+    )
+
+
+# -----------------------------------------------------
+# Worker
+# -----------------------------------------------------
+_worker_input = {}
+
+
+def _init_worker(transactions, accounts, n_devices, model, config, confirmed, output_dir):
+    # Inherited without copying under fork; pickled once under spawn.
+    # Account names travel with the batch: a spawned worker's SYMBOLS
+    # is empty
+    _worker_input.update(
+        transactions=transactions,
+        accounts=accounts,
+        confirmed=confirmed,
+        n_devices=n_devices,
+        model=model,
+        engine=FusionEngine(path=None, config=config),
+        output_dir=output_dir,
+    )
+
+
+def score_partition(job):
+    key, start, end, context_start = job
+    transactions = _worker_input["transactions"]
+    timestamps = transactions["timestamp"]
+    started = time.perf_counter()
+
+    lo, first, hi = np.searchsorted(timestamps, [context_start, start, end])
+    window = take(transactions, slice(lo, hi))
+    n = 0
+    if hi > lo:
+        n = int(max(window["sender_id"].max(), window["receiver_id"].max())) + 1
+
+    layers = run_layers(window, n, _worker_input["n_devices"], model=_worker_input["model"])
+
+    confirmed = _worker_input["confirmed"]
+    seeds = seed_vector(n, confirmed[confirmed < n], layers["behavior_risk"])
+    network_risk = RiskPropagation().run(layers["graph"], seeds)
+    cycle_risk = detect_cycles(window, n, workers=1)["cycle_risk"]
+
+    fused = _worker_input["engine"].fuse({
+        "behavior": layers["behavior_risk"],
+        "graph": layers["graph_risk"],
+        "temporal": layers["temporal_risk"],
+        "linkage": layers["device_linkage"]["linkage_risk"],
+        "propagation": network_risk,
+        "cycle": cycle_risk,
+    })
+
+    # Report the accounts active inside the partition itself
+    active = np.zeros(n, dtype=bool)
+    active[transactions["sender_id"][first:hi]] = True
+    active[transactions["receiver_id"][first:hi]] = True
+    accounts = np.flatnonzero(active)
+
+    frame = pd.DataFrame({
+        "account_id": _worker_input["accounts"][accounts],
+        "risk_score": fused["risk_score"][accounts],
+        "final_risk": RISK_LEVELS[fused["final_risk"][accounts]],
+        "behavior_risk": layers["behavior_risk"][accounts],
+        "graph_risk": layers["graph_risk"][accounts],
+        "network_risk": np.round(network_risk[accounts], 4),
+        "temporal_risk": layers["temporal_risk"][accounts],
+        "linkage_risk": layers["device_linkage"]["linkage_risk"][accounts],
+        "cycle_risk": cycle_risk[accounts],
+    })
+
+    path = os.path.join(_worker_input["output_dir"], f"{key}.csv")
+    frame.to_csv(f"{path}.tmp", index=False)
+    os.replace(f"{path}.tmp", path)
+
+    return {
+        "key": key,
+        "rows": int(hi - first),
+        "context_rows": int(first - lo),
+        "accounts": len(accounts),
+        "high_risk": int((fused["final_risk"][accounts] == 2).sum()),
+        "seconds": round(time.perf_counter() - started, 3),
+        "file": os.path.basename(path),
+    }
+
+
+# -----------------------------------------------------
+# Coordinator
+# -----------------------------------------------------
+def run_backfill(path=None, output_dir=OUTPUT_DIR, partition="day",
+                 lookback_days=DEFAULT_LOOKBACK_DAYS, workers=1,
+                 model_path=None, config_path=CONFIG_PATH, resume=True,
+                 progress=sys.stderr):
+    """
+    Re-scores every partition that is missing or stale. Returns the
+    manifest.
+    """
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    model = load_behavior_model(model_path)
+    if model is None:
+        raise FileNotFoundError(
+            f"no behaviour model at {model_path or MODEL_PATH}; run the pipeline once first"
+        )
+
+    # One config snapshot for the whole run, even if the file changes
+    config = None
+    if config_path and os.path.isfile(config_path):
+        with open(config_path) as file:
+            config = json.load(file)
+    engine = FusionEngine(path=None, config=config)
+
+    # A partition is current only if scored from the same store
+    versions = {
+        "source": os.path.abspath(path or FILE_PATH),
+        "model_version": behavior_model_version(model_path),
+        "config_version": engine.version,
+        "partition": partition,
+        "lookback_days": lookback_days,
+    }
+
+    transactions = load_transactions(path)
+    order = np.argsort(transactions["timestamp"], kind="stable")
+    transactions = take(transactions, order)
+
+    manifest = load_manifest(output_dir) if resume else {"partitions": {}}
+    manifest.update(versions)
+
+    lookback = int(lookback_days * DAY_US)
+    jobs = [
+        (key, start, end, start - lookback)
+        for key, start, end in partition_bounds(transactions["timestamp"], partition)
+        if not _is_current(manifest["partitions"].get(key), versions)
+    ]
+
+    total_rows = 0
+    started = time.perf_counter()
+    confirmed = load_confirmed_accounts(SYMBOLS)
+    accounts = SYMBOLS.accounts.decode(np.arange(len(SYMBOLS.accounts)))
+    init_args = (
+        transactions, accounts, len(SYMBOLS.devices), model, config, confirmed, output_dir
+    )
+
+    def record(result, done):
+        nonlocal total_rows
+        total_rows += result["rows"]
+        manifest["partitions"][result["key"]] = dict(result, status="done", **versions)
+        save_manifest(output_dir, manifest)
+
+        elapsed = time.perf_counter() - started
+        if progress:
+            print(
+                f"[{done}/{len(jobs)}] {result['key']}: {result['rows']:,} rows, "
+                f"{result['accounts']:,} accounts, {result['high_risk']:,} high risk "
+                f"in {result['seconds']:.2f}s | {total_rows / max(elapsed, 1e-9):,.0f} rows/s",
+                file=progress, flush=True
+            )
+
+    if workers <= 1 or len(jobs) <= 1:
+        _init_worker(*init_args)
+        for done, job in enumerate(jobs, 1):
+            record(score_partition(job), done)
+    else:
+        with get_context().Pool(workers, _init_worker, init_args) as pool:
+            for done, result in enumerate(pool.imap_unordered(score_partition, jobs), 1):
+                record(result, done)
+
+    if progress:
+        elapsed = time.perf_counter() - started
+        skipped = len(partition_bounds(transactions["timestamp"], partition)) - len(jobs)
+        print(
+            f"backfill done: {len(jobs)} partitions re-scored, {skipped} up to date, "
+            f"{total_rows:,} rows in {elapsed:.1f}s",
+            file=progress, flush=True
+        )
+
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-score transaction history by time partition"
+    )
+    parser.add_argument("--path", help=f"transaction store (default {FILE_PATH})")
+    parser.add_argument("--output", default=OUTPUT_DIR)
+    parser.add_argument("--partition", choices=sorted(PARTITIONS), default="day")
+    parser.add_argument("--lookback-days", type=float, default=DEFAULT_LOOKBACK_DAYS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--model", help=f"behaviour model (default {MODEL_PATH})")
+    parser.add_argument("--config", default=CONFIG_PATH, help="risk fusion config")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="re-score every partition even if up to date")
+    args = parser.parse_args()
+
+    run_backfill(
+        path=args.path,
+        output_dir=args.output,
+        partition=args.partition,
+        lookback_days=args.lookback_days,
+        workers=args.workers,
+        model_path=args.model,
+        config_path=args.config,
+        resume=not args.no_resume,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,87 @@
-import csv
-from collections import defaultdict
+import io
+
+import numpy as np
+import pandas as pd
+
+from src.symbols import encode_transactions, empty_batch, account_count
+from src.velocity_features import compute_velocity_features
+from src.flow_features import compute_flow_features
 
 FILE_PATH = "data/transactions.csv"
 
-def load_transactions():
-    with open(FILE_PATH, newline="") as file:
-        reader = csv.DictReader(file)
-        return list(reader)
+CSV_DTYPES = {
+    "transaction_id": str,
+    "sender_id": str,
+    "receiver_id": str,
+    "amount": np.float64,
+    "timestamp": str,
+    "location": str,
+    "merchant_category": str,
+    "device_id": str,
+}
+
+def load_transactions(path=None, symbols=None):
+    frame = pd.read_csv(path or FILE_PATH, dtype=CSV_DTYPES, keep_default_na=False)
+    return encode_transactions(frame, symbols)
+
+def load_transaction_range(path=None, start=0, symbols=None):
+    """
+    Parses the complete (newline-terminated) rows from byte offset
+    start to the end of the store. Returns (batch, end offset); a row
+    still being written is left for the next call.
+    """
+
+    with open(path or FILE_PATH, "rb") as file:
+        header = file.readline()
+        start = max(start, len(header))
+        file.seek(start)
+        data = file.read()
+
+    end = data.rfind(b"\n") + 1
+    if end == 0:
+        return empty_batch(), start
+
+    frame = pd.read_csv(
+        io.BytesIO(data[:end]),
+        names=header.decode("utf-8").strip().split(","),
+        header=None,
+        dtype=CSV_DTYPES,
+        keep_default_na=False
+    )
+    return encode_transactions(frame, symbols), start + end
+
+def build_user_behavior(transactions, n_accounts=None, sketches=None):
+    n = n_accounts if n_accounts is not None else account_count(transactions)
+    senders = transactions["sender_id"]
+    amounts = transactions["amount"]
+
+    count = np.bincount(senders, minlength=n)
+    total = np.bincount(senders, weights=amounts, minlength=n)
+
+    max_amount = np.full(n, -np.inf)
+    min_amount = np.full(n, np.inf)
+    np.maximum.at(max_amount, senders, amounts)
+    np.minimum.at(min_amount, senders, amounts)
 
-def build_user_behavior(transactions):
-    user_data = defaultdict(list)
+    sent = count > 0
+    average = np.zeros(n)
+    average[sent] = np.round(total[sent] / count[sent], 2)
+    max_amount[~sent] = 0
+    min_amount[~sent] = 0
 
-    for tx in transactions:
-        user_data[tx["sender_id"]].append(float(tx["amount"]))
+    # Receive-only accounts (e.g. mules' first hop) get a profile too
+    received = np.bincount(transactions["receiver_id"], minlength=n) > 0
 
-    behavior_profiles = {}
+    # Account-aligned arrays; accounts with no activity are inactive
+    behavior_profiles = {
+        "active": sent | received,
+        "transaction_count": count,
+        "average_amount": average,
+        "max_amount": max_amount,
+        "min_amount": min_amount
+    }
 
-    for user, amounts in user_data.items():
-        behavior_profiles[user] = {
-            "transaction_count": len(amounts),
-            "average_amount": round(sum(amounts) / len(amounts), 2),
-            "max_amount": max(amounts),
-            "min_amount": min(amounts)
-        }
+    behavior_profiles.update(compute_velocity_features(transactions, n))
+    behavior_profiles.update(compute_flow_features(transactions, n, sketches))
 
     return behavior_profiles
@@ -0,0 +1,274 @@
+"""
+Broker Detection
+Approximate betweenness centrality of every account on the directed
+transaction graph: Brandes dependency accumulation from k sampled
+source accounts, scaled to the whole population, with a per-account
+standard error and a uniform Hoeffding bound. Brokers are accounts
+whose betweenness is significantly above the average account, i.e.
+accounts that sit on the money paths between otherwise separate groups.
+
+Sources are processed in batches on a process pool; each batch runs
+a level-synchronous BFS for all of its sources at once over the sparse
+graph. Results are cached per graph generation (a fingerprint of the
+edge structure) and refined incrementally: asking for more samples on
+the same generation only runs the additional sources.
+"""
+
+import hashlib
+import math
+import os
+import threading
+
+import numpy as np
+import scipy.sparse as sp
+
+from src.pools import worker_pool
+from src.tracing import current_span
+
+BETWEENNESS_SAMPLES = int(os.environ.get("NEUROAML_BETWEENNESS_SAMPLES", "128"))
+BETWEENNESS_WORKERS = int(os.environ.get("NEUROAML_BETWEENNESS_WORKERS", "1"))
+SOURCES_PER_BATCH = 16      # sources sharing one BFS (memory: accounts x batch)
+CONFIDENCE_Z = 1.96         # per-account interval, ~95%
+BOUND_FAILURE = 0.05        # probability the uniform bound fails
+BROKER_RATIO = 10.0         # lower bound at 10x the average account's betweenness
+
+
+def graph_generation(graph):
+    """
+    Fingerprint of the graph's edge structure. Amounts do not change
+    shortest paths, so only the sparsity pattern is hashed.
+    """
+
+    graph = graph.tocsr()
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(np.asarray(graph.shape, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(graph.indptr).tobytes())
+    digest.update(np.ascontiguousarray(graph.indices).tobytes())
+    return digest.hexdigest()
+
+
+def _structure(graph):
+    # Binary sender -> receiver structure without self transfers
+    structure = sp.csr_matrix(graph, copy=True)
+    structure.setdiag(0)
+    structure.eliminate_zeros()
+    structure.data = np.ones(len(structure.data), dtype=np.float64)
+    return structure
+
+
+# -----------------------------------------------------
+# Batched Brandes
+# -----------------------------------------------------
+_worker_input = {}
+
+
+def _init_worker(structure):
+    # Pickled once per worker (see src/pools.py)
+    _worker_input.update(
+        forward=structure,
+        backward=structure.T.tocsr(),
+    )
+
+
+def _spread(matrix, rows, values, touched):
+    """
+    Pushes values along the edges leaving rows. Returns the touched
+    target accounts and the summed values per target, without
+    materializing an accounts x batch result.
+    """
+
+    sub = matrix[rows]
+    touched[sub.indices] = True
+    targets = np.flatnonzero(touched)
+    touched[targets] = False
+
+    slot = np.empty(matrix.shape[1], dtype=np.int64)
+    slot[targets] = np.arange(len(targets))
+    relabeled = sp.csr_matrix(
+        (sub.data, slot[sub.indices], sub.indptr), shape=(len(rows), len(targets))
+    )
+    return targets, relabeled.T @ values
+
+
+def _accumulate(sources):
+    """
+    Dependencies of every account on the given sources (Brandes 2001).
+    Returns (sum, sum of squares) over the sources, per account.
+    """
+
+    forward = _worker_input["forward"]
+    backward = _worker_input["backward"]
+    n, width = forward.shape[0], len(sources)
+    column = np.arange(width)
+
+    touched = np.zeros(n, dtype=bool)
+
+    dist = np.full((n, width), -1, dtype=np.int16)
+    sigma = np.zeros((n, width))
+    dist[sources, column] = 0
+    sigma[sources, column] = 1.0
+
+    # Forward: shortest-path counts level by level, all sources at once
+    levels = [np.unique(sources)]
+    depth = 0
+    while True:
+        rows = levels[-1]
+        frontier = np.where(dist[rows] == depth, sigma[rows], 0.0)
+        targets, counts = _spread(forward, rows, frontier, touched)
+        new = (dist[targets] < 0) & (counts > 0)
+        if not new.any():
+            break
+        depth += 1
+        reached = new.any(axis=1)
+        targets, new = targets[reached], new[reached]
+        dist[targets] = np.where(new, depth, dist[targets])
+        sigma[targets] = np.where(new, counts[reached], sigma[targets])
+        levels.append(targets)
+
+    # Backward: dependencies from the deepest level up
+    delta = np.zeros((n, width))
+    for depth in range(len(levels) - 1, 0, -1):
+        rows = levels[depth]
+        at_level = dist[rows] == depth
+        share = np.zeros((len(rows), width))
+        np.divide(1.0 + delta[rows], sigma[rows], out=share, where=at_level)
+        targets, carried = _spread(backward, rows, share, touched)
+        parent = dist[targets] == depth - 1
+        delta[targets] += np.where(parent, sigma[targets] * carried, 0.0)
+
+    # A source does not lie between itself and anything else
+    delta[sources, column] = 0.0
+
+    return delta.sum(axis=1), np.square(delta).sum(axis=1)
+
+
+# -----------------------------------------------------
+# Estimate + Cache
+# -----------------------------------------------------
+class BetweennessCache:
+    """
+    Running sums for the current graph generation. The source order is
+    a fixed random permutation per generation, so a refinement adds the
+    next sources and k samples always mean the same k sources.
+    """
+
+    def __init__(self):
+        self.generation = None
+        self._lock = threading.Lock()
+        self._reset(None, 0)
+
+    def _reset(self, generation, n):
+        self.generation = generation
+        self.order = np.empty(0, dtype=np.int64)
+        self.sampled = 0
+        self.total = np.zeros(n)
+        self.squares = np.zeros(n)
+
+    def estimate(self, graph, samples=None, workers=None):
+        """
+        Returns {"betweenness", "stderr", "lower", "epsilon", "samples",
+        "sources", "exact", "generation", "broker"}; betweenness is the
+        raw (unnormalized) estimate per account code.
+        """
+
+        samples = samples or BETWEENNESS_SAMPLES
+        workers = workers or BETWEENNESS_WORKERS
+        generation = graph_generation(graph)
+
+        with self._lock:
+            structure = None
+            cache = "hit" if generation == self.generation else "miss"
+            if generation != self.generation:
+                structure = _structure(graph)
+                self._reset(generation, graph.shape[0])
+                senders = np.flatnonzero(np.diff(structure.indptr) > 0)
+                rng = np.random.default_rng(int(generation[:16], 16))
+                self.order = rng.permutation(senders)
+
+            wanted = min(samples, len(self.order))
+            new_sources = max(wanted - self.sampled, 0)
+            if wanted > self.sampled:
+                if structure is None:
+                    structure = _structure(graph)
+                self._run(structure, self.order[self.sampled:wanted], workers)
+                self.sampled = wanted
+
+            current_span().set(
+                cache=cache if cache == "miss" or not new_sources else "refine",
+                samples=self.sampled, new_sources=new_sources
+            )
+
+            return self._result()
+
+    def _run(self, structure, sources, workers):
+        batches = [
+            sources[i:i + SOURCES_PER_BATCH]
+            for i in range(0, len(sources), SOURCES_PER_BATCH)
+        ]
+
+        if workers <= 1 or len(batches) <= 1:
+            _init_worker(structure)
+            results = map(_accumulate, batches)
+            for total, squares in results:
+                self.total += total
+                self.squares += squares
+            _worker_input.clear()
+        else:
+            with worker_pool(min(workers, len(batches)), _init_worker,
+                             (structure,)) as pool:
+                for total, squares in pool.imap_unordered(_accumulate, batches):
+                    self.total += total
+                    self.squares += squares
+
+    def _result(self):
+        n = len(self.total)
+        m, k = len(self.order), self.sampled
+        exact = k == m
+
+        # Sources are drawn uniformly from the m accounts that send, so
+        # m * mean dependency is an unbiased estimate of betweenness
+        estimate = np.zeros(n)
+        stderr = np.zeros(n)
+        epsilon = 0.0
+        if k:
+            mean = self.total / k
+            estimate = m * mean
+            if not exact and k > 1:
+                variance = np.maximum(self.squares / k - mean ** 2, 0) * k / (k - 1)
+                # Without-replacement sampling: finite population correction
+                stderr = m * np.sqrt(variance / k * (m - k) / max(m - 1, 1))
+            if not exact and n > 2:
+                # Hoeffding + union bound over all accounts: each dependency
+                # lies in [0, n - 2], so every estimate is within epsilon of
+                # the true betweenness with probability 1 - BOUND_FAILURE
+                epsilon = m * (n - 2) * math.sqrt(
+                    math.log(2 * n / BOUND_FAILURE) / (2 * k)
+                )
+
+        lower = np.maximum(estimate - CONFIDENCE_Z * stderr, 0)
+        on_paths = estimate > 0
+        average = estimate[on_paths].mean() if on_paths.any() else 0.0
+
+        return {
+            "betweenness": estimate,
+            "stderr": stderr,
+            "lower": lower,
+            "epsilon": epsilon,
+            "samples": k,
+            "sources": m,
+            "exact": exact,
+            "generation": self.generation,
+            # True = account is a broker between otherwise separate groups
+            "broker": (lower > 0) & (lower >= BROKER_RATIO * average),
+        }
+
+
+_cache = BetweennessCache()
+
+
+def approximate_betweenness(graph, samples=None, workers=None, cache=None):
+    return (cache or _cache).estimate(graph, samples, workers)
+
+
+def broker_accounts(graph, samples=None, workers=None, cache=None):
+    return approximate_betweenness(graph, samples, workers, cache)["broker"]
@@ -0,0 +1,265 @@
+"""
+Round-Tripping Cycle Detection
+Finds time-respecting cycles of 2-6 hops in which money leaves an
+account and comes back through intermediaries, with every hop's amount
+within a tolerance of the previous one.
+
+Strongly connected components are computed first: only transfers
+between accounts of the same non-trivial component can lie on a
+cycle. The bounded DFS then runs per component (large components are
+split by starting transfer) on a process pool. A cycle is found once,
+from its earliest transfer, and carries hop-level evidence.
+"""
+
+import os
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+from src.pools import worker_pool
+
+MIN_CYCLE_LENGTH = 2
+MAX_CYCLE_LENGTH = 6
+AMOUNT_TOLERANCE = 0.2                     # hop amount within +/-20% of the previous
+MAX_CYCLE_SPAN_US = 7 * 86_400_000_000     # first to last hop
+MAX_CYCLES_PER_START = 20                  # bound on cycles from one transfer
+MAX_OPEN_PATHS = 5_000_000                 # frontier bound per search level
+STARTS_PER_JOB = 250_000
+CYCLE_WORKERS = int(os.environ.get("NEUROAML_CYCLE_WORKERS", "1"))
+
+
+# -----------------------------------------------------
+# Candidate Transfers
+# -----------------------------------------------------
+def cycle_candidates(transactions, n_accounts):
+    """
+    Transfers whose sender and receiver share a strongly connected
+    component of two or more accounts, sorted by (component, sender,
+    time), plus the component slice boundaries.
+    """
+
+    senders = transactions["sender_id"]
+    receivers = transactions["receiver_id"]
+
+    structure = sp.csr_matrix(
+        (np.ones(len(senders), dtype=np.int8), (senders, receivers)),
+        shape=(n_accounts, n_accounts)
+    )
+    _, component = connected_components(structure, directed=True, connection="strong")
+    size = np.bincount(component)
+
+    inside = (
+        (component[senders] == component[receivers])
+        & (size[component[senders]] >= MIN_CYCLE_LENGTH)
+        & (senders != receivers)
+    )
+    rows = np.flatnonzero(inside)
+
+    order = np.lexsort((
+        transactions["timestamp"][rows], senders[rows], component[senders[rows]]
+    ))
+    rows = rows[order]
+
+    labels = component[senders[rows]]
+    boundaries = np.flatnonzero(np.diff(labels)) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(rows)]])
+
+    return rows, list(zip(starts.tolist(), ends.tolist()))
+
+
+# -----------------------------------------------------
+# Bounded DFS
+# -----------------------------------------------------
+_worker_input = {}
+
+
+def _init_worker(transactions, rows):
+    # Pickled once per worker (see src/pools.py)
+    _worker_input.update(
+        sender=transactions["sender_id"][rows],
+        receiver=transactions["receiver_id"][rows],
+        amount=transactions["amount"][rows],
+        timestamp=transactions["timestamp"][rows],
+        rows=rows,
+    )
+
+
+def _expand(node_index, key, time_rank, frontier_edge, times, deadlines):
+    # Candidate next transfers of every frontier path: same component,
+    # sent by the path's last receiver, strictly later, before the deadline
+    n_edges = len(time_rank)
+    base = node_index[frontier_edge].astype(np.int64) * n_edges
+    first = np.searchsorted(key, base + np.searchsorted(time_rank, times, side="right"))
+    last = np.searchsorted(key, base + np.searchsorted(time_rank, deadlines, side="right"))
+
+    counts = np.maximum(last - first, 0)
+    owner = np.repeat(np.arange(len(frontier_edge)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, np.repeat(first, counts) + offsets
+
+
+def _component_index(lo, hi):
+    # Built once per component and worker; split jobs share it
+    cache = _worker_input.setdefault("index", {})
+    if (lo, hi) in cache:
+        return cache[(lo, hi)]
+    cache.clear()
+
+    sender = _worker_input["sender"][lo:hi]
+    receiver = _worker_input["receiver"][lo:hi]
+    timestamp = _worker_input["timestamp"][lo:hi]
+
+    # Edges are sorted by (sender, time). A composite (sender, time rank)
+    # key turns "later transfers of account X" into two binary searches.
+    nodes = np.unique(sender)
+    time_rank = np.unique(timestamp)
+    sender_index = np.searchsorted(nodes, sender)
+    key = sender_index.astype(np.int64) * len(time_rank) + np.searchsorted(time_rank, timestamp)
+
+    # Receiver's slot among senders; receivers that never send end paths
+    slot = np.minimum(np.searchsorted(nodes, receiver), len(nodes) - 1)
+    node_index = np.where(nodes[slot] == receiver, slot, -1)
+
+    cache[(lo, hi)] = (key, time_rank, node_index)
+    return cache[(lo, hi)]
+
+
+def _search_component(job):
+    lo, hi, start_lo, start_hi = job
+    sender = _worker_input["sender"][lo:hi]
+    receiver = _worker_input["receiver"][lo:hi]
+    amount = _worker_input["amount"][lo:hi]
+    timestamp = _worker_input["timestamp"][lo:hi]
+    rows = _worker_input["rows"][lo:hi]
+
+    key, time_rank, node_index = _component_index(lo, hi)
+    sends = node_index >= 0
+
+    low_ratio, high_ratio = 1 - AMOUNT_TOLERANCE, 1 + AMOUNT_TOLERANCE
+
+    # Frontier: one row per open path (edge indices in hop order)
+    paths = np.arange(start_lo - lo, start_hi - lo)[:, None]
+    paths = paths[sends[paths[:, 0]]]
+    found = []
+    per_start = {}
+    truncated = False
+
+    for length in range(2, MAX_CYCLE_LENGTH + 1):
+        if len(paths) == 0:
+            break
+        tail = paths[:, -1]
+        origin = sender[paths[:, 0]]
+        deadline = timestamp[paths[:, 0]] + MAX_CYCLE_SPAN_US
+
+        owner, candidate = _expand(
+            node_index, key, time_rank, tail, timestamp[tail], deadline
+        )
+        ratio = amount[candidate] / amount[tail[owner]]
+        keep = (ratio >= low_ratio) & (ratio <= high_ratio)
+        owner, candidate = owner[keep], candidate[keep]
+
+        target = receiver[candidate]
+        closes = target == origin[owner]
+        if closes.any():
+            for path in np.column_stack([paths[owner[closes]], candidate[closes]]):
+                start = int(path[0])
+                if per_start.get(start, 0) < MAX_CYCLES_PER_START:
+                    per_start[start] = per_start.get(start, 0) + 1
+                    found.append(rows[path])
+
+        if length == MAX_CYCLE_LENGTH:
+            break
+
+        # Simple paths only: the next account must not already be on the path
+        extend = ~closes & (node_index[candidate] >= 0)
+        owner, candidate, target = owner[extend], candidate[extend], target[extend]
+        on_path = (receiver[paths[owner]] == target[:, None]).any(axis=1)
+        on_path |= sender[paths[owner, 0]] == target
+        paths = np.column_stack([paths[owner[~on_path]], candidate[~on_path]])
+
+        if len(paths) > MAX_OPEN_PATHS:
+            # Pathologically dense component: keep the search bounded
+            paths = paths[:MAX_OPEN_PATHS]
+            truncated = True
+
+    return found, truncated
+
+
+# -----------------------------------------------------
+# Detector
+# -----------------------------------------------------
+def _jobs(components):
+    jobs = []
+    for lo, hi in components:
+        for start in range(lo, hi, STARTS_PER_JOB):
+            jobs.append((lo, hi, start, min(start + STARTS_PER_JOB, hi)))
+    return jobs
+
+
+def detect_cycles(transactions, n_accounts, workers=None):
+    """
+    Returns {"cycles": [row index arrays, one per cycle, in hop order],
+    "cycle_risk": bool per account, "cycle_count": cycles per account,
+    "truncated": whether any search level hit MAX_OPEN_PATHS}.
+    """
+
+    workers = workers or CYCLE_WORKERS
+    rows, components = cycle_candidates(transactions, n_accounts)
+    jobs = _jobs(components)
+
+    if workers <= 1 or len(jobs) <= 1:
+        _init_worker(transactions, rows)
+        results = [_search_component(job) for job in jobs]
+    else:
+        with worker_pool(min(workers, len(jobs)), _init_worker,
+                         (transactions, rows)) as pool:
+            results = pool.map(_search_component, jobs)
+
+    cycles = [cycle for found, _ in results for cycle in found]
+
+    cycle_count = np.zeros(n_accounts, dtype=np.int64)
+    if cycles:
+        members = np.concatenate([transactions["sender_id"][c] for c in cycles])
+        cycle_count = np.bincount(members, minlength=n_accounts)
+
+    # True = HIGH: account is on at least one round-tripping cycle
+    return {
+        "cycles": cycles,
+        "cycle_risk": cycle_count > 0,
+        "cycle_count": cycle_count,
+        "truncated": any(truncated for _, truncated in results),
+    }
+
+
+def cycle_evidence(transactions, cycle, symbols):
+    """
+    Decoded hop-level evidence for one cycle.
+    """
+
+    senders = symbols.accounts.decode(transactions["sender_id"][cycle])
+    receivers = symbols.accounts.decode(transactions["receiver_id"][cycle])
+    amounts = transactions["amount"][cycle]
+    timestamps = transactions["timestamp"][cycle]
+
+    hops = [
+        {
+            "transaction_id": transactions["transaction_id"][row].decode(),
+            "sender_id": sender,
+            "receiver_id": receiver,
+            "amount": float(amount),
+            "timestamp": str(np.datetime64(int(ts), "us")),
+        }
+        for row, sender, receiver, amount, ts in zip(
+            cycle, senders, receivers, amounts, timestamps
+        )
+    ]
+
+    return {
+        "accounts": [hop["sender_id"] for hop in hops] + [hops[0]["sender_id"]],
+        "length": len(hops),
+        "span_seconds": float((timestamps[-1] - timestamps[0]) / 1e6),
+        "amount_retained": round(float(amounts[-1] / amounts[0]), 4),
+        "hops": hops,
+    }
@@ -1,6 +1,12 @@
+import argparse
+import os
 import random
 import uuid
 from datetime import datetime, timedelta
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
 
 # Generate a single fake transaction
 def generate_transaction():
@@ -22,3 +28,202 @@ def generate_transaction():
 # Generate multiple transactions
 def generate_transactions(count=10):
     return [generate_transaction() for _ in range(count)]
+
+
+# =========================================================
+# BENCHMARK CORPUS GENERATOR (VECTORIZED, CHUNKED)
+# =========================================================
+FIELDNAMES = [
+    "transaction_id", "sender_id", "receiver_id", "amount", "timestamp",
+    "location", "merchant_category", "device_id"
+]
+LOCATIONS = ["Chennai", "Bangalore", "Mumbai", "Delhi"]
+MERCHANT_CATEGORIES = ["Groceries", "Electronics", "Fuel", "Shopping", "Food"]
+
+DEFAULT_CORPUS_CONFIG = {
+    "users": 100_000,
+    "devices": 40_000,
+    "alpha": 0.8,            # power-law exponent of sender/receiver activity
+    "span_days": 30,         # corpus covers this many days
+    "start": "2026-01-01T00:00:00",
+    "chunk_size": 500_000,
+    "seed": 42,
+}
+
+
+def _power_law_weights(n, alpha, rng):
+    # Rank-based (Zipf-like) activity, shuffled so low ids aren't all hubs
+    weights = np.arange(1, n + 1, dtype=np.float64) ** -alpha
+    weights /= weights.sum()
+    return rng.permutation(weights)
+
+
+def _corpus_tables(config):
+    # Same seed for every worker -> identical hub assignment in every chunk
+    rng = np.random.default_rng([config["seed"], 0])
+    sender_w = _power_law_weights(config["users"], config["alpha"], rng)
+    receiver_w = _power_law_weights(config["users"], config["alpha"], rng)
+
+    return {
+        "sender_cdf": np.cumsum(sender_w),
+        "receiver_cdf": np.cumsum(receiver_w),
+        # Id strings are rendered once and gathered per row
+        "user_names": np.array(
+            [f"user_{i}" for i in range(1, config["users"] + 1)], dtype=object
+        ),
+        "device_names": np.array(
+            [f"device_{i}" for i in range(1, config["devices"] + 1)], dtype=object
+        ),
+    }
+
+
+_TABLES_CACHE = {}
+
+
+def _cached_tables(config):
+    key = (config["seed"], config["users"], config["devices"], config["alpha"])
+    if key not in _TABLES_CACHE:
+        _TABLES_CACHE.clear()
+        _TABLES_CACHE[key] = _corpus_tables(config)
+    return _TABLES_CACHE[key]
+
+
+def _sample(cdf, size, rng):
+    idx = np.searchsorted(cdf, rng.random(size) * cdf[-1], side="right")
+    return np.minimum(idx, len(cdf) - 1)
+
+
+def generate_chunk(chunk_index, rows, config):
+    """
+    Generates one chunk of the corpus as a DataFrame.
+
+    Each chunk has its own RNG stream derived from (seed, chunk_index),
+    so output is reproducible regardless of worker count.
+    """
+
+    tables = _cached_tables(config)
+    rng = np.random.default_rng([config["seed"], 1, chunk_index])
+
+    senders = _sample(tables["sender_cdf"], rows, rng)
+    receivers = _sample(tables["receiver_cdf"], rows, rng)
+    # No self transfers
+    clash = senders == receivers
+    receivers[clash] = (receivers[clash] + 1) % config["users"]
+
+    # Poisson arrivals: chunk k covers its slice of the corpus time span.
+    # Gaps are rescaled to end exactly at the slice boundary, so chunk
+    # k's last timestamp is before chunk k + 1's first
+    total_rows = config["total_rows"]
+    span_us = config["span_days"] * 86_400_000_000
+    mean_gap_us = span_us / max(total_rows, 1)
+    slot_us = rows * mean_gap_us
+    start_us = (
+        pd.Timestamp(config["start"]).value // 1000
+        + chunk_index * config["chunk_size"] * mean_gap_us
+    )
+    arrivals = np.cumsum(rng.exponential(mean_gap_us, rows + 1))
+    timestamps = (start_us + arrivals[:-1] * (slot_us / arrivals[-1])).astype(np.int64)
+
+    # Log-normal amounts centred around a few thousand
+    amounts = np.round(rng.lognormal(mean=8.0, sigma=1.0, size=rows), 2)
+
+    # Each user mostly transacts from a "home" device and location
+    home_device = senders % config["devices"]
+    other_device = rng.integers(0, config["devices"], rows)
+    devices = np.where(rng.random(rows) < 0.9, home_device, other_device)
+    locations = np.where(
+        rng.random(rows) < 0.85,
+        senders % len(LOCATIONS),
+        rng.integers(0, len(LOCATIONS), rows)
+    )
+    merchants = rng.integers(0, len(MERCHANT_CATEGORIES), rows)
+
+    first_id = chunk_index * config["chunk_size"]
+    ids = np.arange(first_id, first_id + rows)
+
+    return pd.DataFrame({
+        "transaction_id": np.char.add("tx_", ids.astype("U")),
+        "sender_id": tables["user_names"][senders],
+        "receiver_id": tables["user_names"][receivers],
+        "amount": amounts,
+        "timestamp": np.datetime_as_string(timestamps.astype("datetime64[us]")),
+        "location": np.array(LOCATIONS)[locations],
+        "merchant_category": np.array(MERCHANT_CATEGORIES)[merchants],
+        "device_id": tables["device_names"][devices],
+    }, columns=FIELDNAMES)
+
+
+def _render_chunk(args):
+    chunk_index, rows, config = args
+    return generate_chunk(chunk_index, rows, config).to_csv(
+        index=False, header=False
+    )
+
+
+def generate_corpus(path, rows, workers=1, **overrides):
+    """
+    Writes a synthetic transaction corpus of `rows` rows to `path`.
+
+    Chunks are generated in parallel by `workers` processes and written
+    in order, so the file is identical for a given seed and config.
+    """
+
+    config = dict(DEFAULT_CORPUS_CONFIG, **overrides)
+    config["total_rows"] = rows
+
+    chunk_size = config["chunk_size"]
+    jobs = [
+        (i, min(chunk_size, rows - start), config)
+        for i, start in enumerate(range(0, rows, chunk_size))
+    ]
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path, "w", newline="") as file:
+        file.write(",".join(FIELDNAMES) + "\n")
+
+        if workers > 1:
+            with Pool(workers) as pool:
+                for text in pool.imap(_render_chunk, jobs):
+                    file.write(text)
+        else:
+            for job in jobs:
+                file.write(_render_chunk(job))
+
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic NeuroAML benchmark corpus"
+    )
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--users", type=int, default=DEFAULT_CORPUS_CONFIG["users"])
+    parser.add_argument("--devices", type=int, default=DEFAULT_CORPUS_CONFIG["devices"])
+    parser.add_argument("--alpha", type=float, default=DEFAULT_CORPUS_CONFIG["alpha"])
+    parser.add_argument("--span-days", type=float, default=DEFAULT_CORPUS_CONFIG["span_days"])
+    parser.add_argument("--start", default=DEFAULT_CORPUS_CONFIG["start"])
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CORPUS_CONFIG["chunk_size"])
+    parser.add_argument("--seed", type=int, default=DEFAULT_CORPUS_CONFIG["seed"])
+    args = parser.parse_args()
+
+    generate_corpus(
+        args.path,
+        args.rows,
+        workers=args.workers,
+        users=args.users,
+        devices=args.devices,
+        alpha=args.alpha,
+        span_days=args.span_days,
+        start=args.start,
+        chunk_size=args.chunk_size,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
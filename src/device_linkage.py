@@ -0,0 +1,195 @@
+"""
+Shared-Device Linkage
+Inverted index between accounts and the devices they transact from,
+plus a detector for devices shared by an unusual number of accounts
+and the account groups they connect.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+MIN_SHARED_ACCOUNTS = 3        # a device needs at least this many accounts
+SHARED_DEVICE_PERCENTILE = 99.5
+MAX_PROJECTION_DEGREE = 500    # skip bigger devices when projecting groups
+PENDING_FRACTION = 8           # pending pairs fold in past 1/8 of the index
+MIN_PENDING = 1 << 13          # ... or past this many pairs
+
+_SHIFT = np.int64(32)
+_MASK = np.int64(0xFFFFFFFF)
+
+
+class LinkageIndex:
+    """
+    Incremental account <-> value (device) inverted index.
+
+    Distinct pairs are kept as two sorted int64 key arrays, one ordered
+    by account and one by value, so both directions are a binary search.
+    New pairs go to a small sorted pending run that is folded into the
+    main arrays once it passes 1/PENDING_FRACTION of their size, so an
+    update costs O(batch log index) plus an amortized merge instead of
+    re-sorting the whole index. Arrays are replaced, never modified in
+    place: copy.copy() gives an independent index.
+    """
+
+    def __init__(self):
+        self._by_account = np.empty(0, dtype=np.int64)
+        self._by_value = np.empty(0, dtype=np.int64)
+        self._pending_by_account = np.empty(0, dtype=np.int64)
+        self._pending_by_value = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._by_account) + len(self._pending_by_account)
+
+    def update(self, accounts, values):
+        accounts = np.asarray(accounts, dtype=np.int64)
+        values = np.asarray(values, dtype=np.int64)
+        self._add(np.unique((accounts << _SHIFT) | values))
+
+    def merge(self, other):
+        self._add(np.concatenate([other._by_account, other._pending_by_account]))
+
+    def _add(self, keys):
+        # keys: distinct account-ordered pairs; the ones already indexed
+        # are dropped, so the main and pending runs stay disjoint
+        keys = keys[~_contains(self._by_account, keys)]
+        if len(keys) == 0:
+            return
+
+        self._pending_by_account = np.union1d(self._pending_by_account, keys)
+        self._pending_by_value = np.union1d(
+            self._pending_by_value, ((keys & _MASK) << _SHIFT) | (keys >> _SHIFT)
+        )
+
+        pending = len(self._pending_by_account)
+        if pending * PENDING_FRACTION > max(len(self._by_account), MIN_PENDING):
+            self._by_account = _merge_runs(self._by_account, self._pending_by_account)
+            self._by_value = _merge_runs(self._by_value, self._pending_by_value)
+            self._pending_by_account = np.empty(0, dtype=np.int64)
+            self._pending_by_value = np.empty(0, dtype=np.int64)
+
+    @staticmethod
+    def _range(keys, high):
+        lo = np.searchsorted(keys, np.int64(high) << _SHIFT)
+        hi = np.searchsorted(keys, (np.int64(high) + 1) << _SHIFT)
+        return keys[lo:hi] & _MASK
+
+    def values_for(self, account):
+        return np.sort(np.concatenate([
+            self._range(self._by_account, account),
+            self._range(self._pending_by_account, account),
+        ]))
+
+    def accounts_for(self, value):
+        return np.sort(np.concatenate([
+            self._range(self._by_value, value),
+            self._range(self._pending_by_value, value),
+        ]))
+
+    def incidence(self, n_accounts=None, n_values=None):
+        """
+        Binary account x value CSR matrix.
+        """
+
+        keys = np.concatenate([self._by_account, self._pending_by_account])
+        accounts = keys >> _SHIFT
+        values = keys & _MASK
+
+        if n_accounts is None:
+            n_accounts = int(accounts.max()) + 1 if len(accounts) else 0
+        if n_values is None:
+            n_values = int(values.max()) + 1 if len(values) else 0
+
+        return sp.csr_matrix(
+            (np.ones(len(accounts), dtype=np.int32), (accounts, values)),
+            shape=(n_accounts, n_values)
+        )
+
+    def save(self, path):
+        np.savez(
+            path,
+            by_account=_merge_runs(self._by_account, self._pending_by_account),
+            by_value=_merge_runs(self._by_value, self._pending_by_value),
+        )
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        index = cls()
+        index._by_account = data["by_account"]
+        index._by_value = data["by_value"]
+        return index
+
+
+def _contains(sorted_keys, keys):
+    position = np.searchsorted(sorted_keys, keys)
+    found = np.zeros(len(keys), dtype=bool)
+    inside = position < len(sorted_keys)
+    found[inside] = sorted_keys[position[inside]] == keys[inside]
+    return found
+
+
+def _merge_runs(left, right):
+    # Two sorted runs: the stable sort merges them in linear time
+    if len(right) == 0:
+        return left
+    return np.sort(np.concatenate([left, right]), kind="stable")
+
+
+def build_linkage_indexes(transactions):
+    """
+    Device index for the initiating (sender) account.
+    """
+
+    devices = LinkageIndex()
+    devices.update(transactions["sender_id"], transactions["device_id"])
+
+    return {"devices": devices}
+
+
+def detect_device_linkage(device_index, n_accounts, n_devices=None):
+    """
+    Flags devices used by an unusual number of accounts and the account
+    groups connected through them.
+
+    Returns account-aligned arrays plus per-device account counts.
+    """
+
+    B = device_index.incidence(n_accounts, n_devices)
+
+    accounts_per_device = np.asarray(B.sum(axis=0)).ravel()
+    used = accounts_per_device[accounts_per_device > 0]
+
+    threshold = MIN_SHARED_ACCOUNTS
+    if len(used):
+        threshold = max(
+            threshold, np.percentile(used, SHARED_DEVICE_PERCENTILE)
+        )
+    suspicious_devices = accounts_per_device >= threshold
+
+    # Bipartite projection over the suspicious devices only:
+    # P[a, b] = number of suspicious devices accounts a and b share
+    projectable = suspicious_devices & (accounts_per_device <= MAX_PROJECTION_DEGREE)
+    B_suspicious = B[:, np.flatnonzero(projectable)]
+    P = (B_suspicious @ B_suspicious.T).tocsr()
+
+    _, group = connected_components(P, directed=False)
+    group_size = np.bincount(group, minlength=1)[group]
+
+    shared_device_count = np.asarray(
+        B[:, np.flatnonzero(suspicious_devices)].sum(axis=1)
+    ).ravel()
+    linked = shared_device_count > 0
+
+    group = np.where(linked, group, -1)
+    group_size = np.where(linked, group_size, 0)
+
+    # True = HIGH: account transacts from at least one suspicious device
+    return {
+        "accounts_per_device": accounts_per_device,
+        "suspicious_devices": suspicious_devices,
+        "shared_device_count": shared_device_count,
+        "group": group,
+        "group_size": group_size,
+        "linkage_risk": linked
+    }
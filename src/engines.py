@@ -0,0 +1,93 @@
+"""
+Engine Registry
+Detector engines are registered by name and imported on first use, so
+importing the API costs only FastAPI and NumPy: health checks answer
+immediately and freshly spawned workers start fast. warm_up() imports
+every engine ahead of time, e.g. in a pre-fork master process
+(NEUROAML_PRELOAD=1) so the workers share the loaded modules.
+"""
+
+import importlib
+import os
+import threading
+import time
+
+PRELOAD = os.environ.get("NEUROAML_PRELOAD") == "1"
+
+# name -> "module:attribute"
+ENGINES = {
+    "load_transaction_range": "src.behavior_features:load_transaction_range",
+    "inject_fraud": "src.fraud_simulator:inject_fraud",
+    "run_layers": "src.pipeline:run_layers",
+    "run_sharded_pipeline": "src.sharding:run_sharded_pipeline",
+    "load_confirmed_accounts": "src.risk_propagation:load_confirmed_accounts",
+    "seed_vector": "src.risk_propagation:seed_vector",
+    "propagate_network_risk": "src.risk_propagation:propagate_network_risk",
+    "detect_cycles": "src.cycle_detection:detect_cycles",
+    "cycle_evidence": "src.cycle_detection:cycle_evidence",
+    "approximate_betweenness": "src.betweenness:approximate_betweenness",
+    "classify_account_typologies": "intelligence.typology_engine:classify_account_typologies",
+    "typology_records": "intelligence.typology_engine:typology_records",
+    "save_snapshot": "src.snapshot:save_snapshot",
+    "load_snapshot": "src.snapshot:load_snapshot",
+    # sklearn: only needed when the behaviour model is fitted
+    "isolation_forest": "sklearn.ensemble:IsolationForest",
+}
+
+
+class EngineRegistry:
+    """
+    Attribute access resolves a registered engine, importing its module
+    the first time: engines.detect_cycles(transactions, n).
+    """
+
+    def __init__(self, engines):
+        self._targets = dict(engines)
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, target):
+        with self._lock:
+            self._targets[name] = target
+            self._loaded.pop(name, None)
+
+    def get(self, name):
+        engine = self._loaded.get(name)
+        if engine is not None:
+            return engine
+
+        module, attribute = self._targets[name].split(":")
+        engine = getattr(importlib.import_module(module), attribute)
+        self._loaded[name] = engine
+        return engine
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self.get(name)
+        except KeyError:
+            raise AttributeError(f"no engine registered as {name!r}") from None
+
+    def loaded(self):
+        return sorted(self._loaded)
+
+    def warm_up(self, names=None):
+        """
+        Imports the given (default: all) engines. Returns the seconds
+        spent per engine.
+        """
+
+        timings = {}
+        for name in names or list(self._targets):
+            started = time.perf_counter()
+            self.get(name)
+            timings[name] = round(time.perf_counter() - started, 4)
+        return timings
+
+
+engines = EngineRegistry(ENGINES)
+
+
+def warm_up(names=None):
+    return engines.warm_up(names)
@@ -1,22 +1,42 @@
-def generate_explanation(user, behavior_risk, graph_risk, final_risk, temporal_risk=None):
+from src.risk_engine import RISK_LEVELS
+
+NETWORK_RISK_EXPLAIN = 0.5   # propagated network risk worth mentioning
+
+def generate_explanation(user, behavior_risk, graph_risk, final_risk, temporal_risk=None, linkage_risk=None, network_risk=None, cycle_risk=None):
+    # user is an account code; risk inputs are code-aligned arrays
     explanations = []
 
-    if behavior_risk.get(user, {}).get("risk_flag") == "HIGH":
+    if behavior_risk[user]:
         explanations.append(
             "The account shows abnormal transaction behavior compared to typical users."
         )
 
-    if graph_risk.get(user) == "HIGH":
+    if graph_risk[user]:
         explanations.append(
             "The account is part of a suspicious transaction network indicating possible money mule activity."
         )
 
-    if temporal_risk and temporal_risk.get(user) == "HIGH":
+    if temporal_risk is not None and temporal_risk[user]:
         explanations.append(
             "The account shows a sudden escalation in transaction amounts over a short time period."
         )
 
-    if final_risk[user]["final_risk"] == "HIGH":
+    if linkage_risk is not None and linkage_risk[user]:
+        explanations.append(
+            "The account transacts from a device shared by an unusual number of other accounts."
+        )
+
+    if network_risk is not None and network_risk[user] >= NETWORK_RISK_EXPLAIN:
+        explanations.append(
+            "The account is closely connected, by transaction value, to confirmed or anomalous accounts."
+        )
+
+    if cycle_risk is not None and cycle_risk[user]:
+        explanations.append(
+            "Funds sent by the account return to it through intermediaries (round-tripping)."
+        )
+
+    if RISK_LEVELS[final_risk["final_risk"][user]] == "HIGH":
         explanations.append(
             "Based on combined behavioral, network, and temporal indicators, this account is classified as high risk."
         )
@@ -0,0 +1,100 @@
+"""
+Inbound-Flow & Pass-Through Features
+Fan-in / fan-out, inbound and outbound totals, pass-through ratio and
+median dwell time between receiving and forwarding funds, for every
+account that sends or receives.
+"""
+
+import numpy as np
+
+from src.symbols import account_count
+
+FLOW_FEATURES = [
+    "fan_in",
+    "fan_out",
+    "inbound_total",
+    "outbound_total",
+    "pass_through_ratio",
+    "median_dwell_seconds",
+]
+
+NO_DWELL = -1.0   # account never forwarded funds after receiving
+
+
+def _median_dwell(transactions, n):
+    senders = transactions["sender_id"]
+    receivers = transactions["receiver_id"]
+    timestamps = transactions["timestamp"]
+    rows = len(senders)
+
+    # Event stream: incoming (receiver side) and outgoing (sender side)
+    account = np.concatenate([receivers, senders])
+    time = np.concatenate([timestamps, timestamps])
+    is_in = np.concatenate([np.ones(rows, dtype=bool), np.zeros(rows, dtype=bool)])
+
+    # by account, then time, incoming before outgoing at the same instant
+    order = np.lexsort((~is_in, time, account))
+    account, time, is_in = account[order], time[order], is_in[order]
+
+    position = np.arange(len(account))
+    group_start = np.zeros(len(account), dtype=np.int64)
+    boundary = np.flatnonzero(np.diff(account)) + 1
+    group_start[boundary] = boundary
+    group_start = np.maximum.accumulate(group_start)
+
+    # Most recent incoming event at or before each position
+    last_in = np.maximum.accumulate(np.where(is_in, position, -1))
+    forwarded = ~is_in & (last_in >= group_start)
+
+    dwell_account = account[forwarded]
+    dwell = (time[forwarded] - time[last_in[forwarded]]) / 1_000_000
+
+    median = np.full(n, NO_DWELL)
+    if len(dwell) == 0:
+        return median
+
+    order = np.lexsort((dwell, dwell_account))
+    dwell_account, dwell = dwell_account[order], dwell[order]
+
+    counts = np.bincount(dwell_account, minlength=n)
+    present = np.flatnonzero(counts)
+    starts = np.concatenate([[0], np.cumsum(counts)])[present]
+    c = counts[present]
+    median[present] = (dwell[starts + (c - 1) // 2] + dwell[starts + c // 2]) / 2
+
+    return median
+
+
+def compute_flow_features(transactions, n_accounts=None, sketches=None):
+    n = n_accounts if n_accounts is not None else account_count(transactions)
+    senders = transactions["sender_id"]
+    receivers = transactions["receiver_id"]
+    amounts = transactions["amount"]
+
+    inbound_total = np.bincount(receivers, weights=amounts, minlength=n)
+    outbound_total = np.bincount(senders, weights=amounts, minlength=n)
+
+    if sketches is not None:
+        # Sketch mode: HyperLogLog estimates over the full history
+        fan_out = sketches.distinct_receivers(n)
+        fan_in = sketches.distinct_senders(n)
+    else:
+        # Distinct counterparties from unique (sender, receiver) pairs
+        pairs = np.unique(
+            (senders.astype(np.int64) << 32) | receivers.astype(np.int64)
+        )
+        fan_out = np.bincount(pairs >> 32, minlength=n)
+        fan_in = np.bincount(pairs & 0xFFFFFFFF, minlength=n)
+
+    pass_through = np.zeros(n)
+    has_inflow = inbound_total > 0
+    pass_through[has_inflow] = outbound_total[has_inflow] / inbound_total[has_inflow]
+
+    return {
+        "fan_in": fan_in,
+        "fan_out": fan_out,
+        "inbound_total": inbound_total,
+        "outbound_total": outbound_total,
+        "pass_through_ratio": pass_through,
+        "median_dwell_seconds": _median_dwell(transactions, n),
+    }
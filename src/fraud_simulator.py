@@ -1,6 +1,13 @@
+import argparse
+import os
 import random
 from datetime import datetime, timedelta
 
+import numpy as np
+import pandas as pd
+
+from src.symbols import encode_transactions, concat_batches
+
 def inject_fraud(transactions):
     """
     FRAUD SIMULATION ENGINE (DEMO MODE)
@@ -10,9 +17,11 @@ def inject_fraud(transactions):
     2. Sudden burst fraud (behavioral + temporal fraud)
 
     This is intentionally aggressive for demo purposes.
+    Takes and returns an encoded transaction batch.
     """
 
     now = datetime.now()
+    fraud = []
 
     # =========================================================
     # 🔴 1. STRONG MONEY MULE CHAIN (REPEATED TRANSFERS)
@@ -22,7 +31,7 @@ def inject_fraud(transactions):
 
     for round_num in range(3):  # repeat transfers to amplify signal
         for i in range(len(mule_chain) - 1):
-            transactions.append({
+            fraud.append({
                 "transaction_id": f"fraud_mule_{round_num}_{i}",
                 "sender_id": mule_chain[i],
                 "receiver_id": mule_chain[i + 1],
@@ -41,7 +50,7 @@ def inject_fraud(transactions):
     burst_user = "user_99"
 
     for i in range(6):
-        transactions.append({
+        fraud.append({
             "transaction_id": f"fraud_burst_{i}",
             "sender_id": burst_user,
             "receiver_id": f"user_{random.randint(1, 20)}",
@@ -52,4 +61,338 @@ def inject_fraud(transactions):
             "device_id": "fraud_device_burst"
         })
 
-    return transactions
+    return concat_batches(transactions, encode_transactions(fraud))
+
+
+# =========================================================
+# SCENARIO LIBRARY (LABELLED, VECTORIZED)
+# =========================================================
+SCENARIO_FIELDNAMES = [
+    "transaction_id", "sender_id", "receiver_id", "amount", "timestamp",
+    "location", "merchant_category", "device_id"
+]
+LABEL_FIELDNAMES = ["account_id", "typology", "scenario_id", "role"]
+
+MINUTE_US = 60_000_000
+
+DEFAULT_SCENARIOS = {
+    # a0 -> a1 -> ... -> a(n-1), repeated over several rounds
+    "mule_chain": {
+        "instances": 10, "chain_length": 4, "rounds": 3,
+        "amount": (40000, 50000), "gap_minutes": 5
+    },
+    # dormant account suddenly sends many large payments
+    "burst": {
+        "instances": 10, "transactions": 6,
+        "amount": (45000, 60000), "gap_minutes": 1
+    },
+    # many transfers just below a reporting threshold
+    "smurfing": {
+        "instances": 10, "transactions": 12, "receivers": 4,
+        "threshold": 10000, "margin": 0.1, "window_minutes": 24 * 60
+    },
+    # many sources -> hub -> many destinations
+    "fan_in_fan_out": {
+        "instances": 10, "fan_in": 8, "fan_out": 8,
+        "amount": (5000, 9000), "window_minutes": 6 * 60
+    },
+    # funds leave and return to the origin through intermediaries
+    "round_trip": {
+        "instances": 10, "length": 4, "amount": (20000, 40000),
+        "decay": 0.03, "gap_minutes": 30
+    },
+}
+
+
+class _AccountPool:
+    """
+    Hands out distinct accounts so scenario instances never overlap.
+    Falls back to fresh synthetic ids once the pool is exhausted.
+    """
+
+    def __init__(self, accounts, rng):
+        self.accounts = rng.permutation(np.asarray(accounts, dtype=object))
+        self.next = 0
+        self.synthetic = 0
+
+    def take(self, shape):
+        count = int(np.prod(shape))
+        taken = self.accounts[self.next:self.next + count]
+        self.next += len(taken)
+
+        missing = count - len(taken)
+        if missing:
+            fresh = np.array(
+                [f"sim_user_{self.synthetic + i}" for i in range(missing)],
+                dtype=object
+            )
+            self.synthetic += missing
+            taken = np.concatenate([taken, fresh])
+
+        return taken.reshape(shape)
+
+
+def _uniform_amounts(rng, bounds, shape):
+    low, high = bounds
+    return np.round(rng.uniform(low, high, shape), 2)
+
+
+def _mule_chain(params, pool, anchors, rng):
+    n, length, rounds = params["instances"], params["chain_length"], params["rounds"]
+    chains = pool.take((n, length))
+
+    hop = np.arange(length - 1)
+    rnd = np.arange(rounds)
+    # (instance, round, hop)
+    senders = np.broadcast_to(chains[:, None, :-1], (n, rounds, length - 1))
+    receivers = np.broadcast_to(chains[:, None, 1:], (n, rounds, length - 1))
+    offsets = (rnd[:, None] * length + hop[None, :]) * params["gap_minutes"] * MINUTE_US
+    timestamps = anchors[:, None, None] + offsets[None, :, :]
+    amounts = _uniform_amounts(rng, params["amount"], senders.shape)
+
+    roles = np.full(chains.shape, "mule", dtype=object)
+    roles[:, 0] = "originator"
+    roles[:, -1] = "beneficiary"
+
+    return senders, receivers, amounts, timestamps, chains, roles
+
+
+def _burst(params, pool, anchors, rng):
+    n, k = params["instances"], params["transactions"]
+    bursters = pool.take((n, 1))
+    targets = pool.take((n, k))
+
+    senders = np.broadcast_to(bursters, (n, k))
+    offsets = np.arange(k) * params["gap_minutes"] * MINUTE_US
+    timestamps = anchors[:, None] + offsets[None, :]
+    amounts = _uniform_amounts(rng, params["amount"], (n, k))
+
+    accounts = np.concatenate([bursters, targets], axis=1)
+    roles = np.full(accounts.shape, "beneficiary", dtype=object)
+    roles[:, 0] = "burst_sender"
+
+    return senders, targets, amounts, timestamps, accounts, roles
+
+
+def _smurfing(params, pool, anchors, rng):
+    n, k, r = params["instances"], params["transactions"], params["receivers"]
+    smurfs = pool.take((n, 1))
+    receivers_pool = pool.take((n, r))
+
+    senders = np.broadcast_to(smurfs, (n, k))
+    pick = rng.integers(0, r, (n, k))
+    receivers = np.take_along_axis(receivers_pool, pick, axis=1)
+
+    threshold = params["threshold"]
+    amounts = np.round(
+        threshold * (1 - rng.uniform(0.001, params["margin"], (n, k))), 2
+    )
+    offsets = np.sort(
+        rng.integers(0, params["window_minutes"] * MINUTE_US, (n, k)), axis=1
+    )
+    timestamps = anchors[:, None] + offsets
+
+    accounts = np.concatenate([smurfs, receivers_pool], axis=1)
+    roles = np.full(accounts.shape, "beneficiary", dtype=object)
+    roles[:, 0] = "structurer"
+
+    return senders, receivers, amounts, timestamps, accounts, roles
+
+
+def _fan_in_fan_out(params, pool, anchors, rng):
+    n, fin, fout = params["instances"], params["fan_in"], params["fan_out"]
+    hubs = pool.take((n, 1))
+    sources = pool.take((n, fin))
+    sinks = pool.take((n, fout))
+
+    window = params["window_minutes"] * MINUTE_US
+    in_offsets = np.sort(rng.integers(0, window // 2, (n, fin)), axis=1)
+    out_offsets = np.sort(rng.integers(window // 2, window, (n, fout)), axis=1)
+
+    senders = np.concatenate([sources, np.broadcast_to(hubs, (n, fout))], axis=1)
+    receivers = np.concatenate([np.broadcast_to(hubs, (n, fin)), sinks], axis=1)
+    timestamps = anchors[:, None] + np.concatenate([in_offsets, out_offsets], axis=1)
+    amounts = _uniform_amounts(rng, params["amount"], senders.shape)
+
+    accounts = np.concatenate([hubs, sources, sinks], axis=1)
+    roles = np.empty(accounts.shape, dtype=object)
+    roles[:, 0] = "hub"
+    roles[:, 1:1 + fin] = "source"
+    roles[:, 1 + fin:] = "destination"
+
+    return senders, receivers, amounts, timestamps, accounts, roles
+
+
+def _round_trip(params, pool, anchors, rng):
+    n, length = params["instances"], params["length"]
+    ring = pool.take((n, length))
+
+    senders = ring
+    receivers = np.roll(ring, -1, axis=1)
+
+    start = _uniform_amounts(rng, params["amount"], (n, 1))
+    # each hop keeps slightly less (fees / skimming)
+    amounts = np.round(start * (1 - params["decay"]) ** np.arange(length), 2)
+    offsets = np.arange(length) * params["gap_minutes"] * MINUTE_US
+    timestamps = anchors[:, None] + offsets[None, :]
+
+    roles = np.full(ring.shape, "intermediary", dtype=object)
+    roles[:, 0] = "originator"
+
+    return senders, receivers, amounts, timestamps, ring, roles
+
+
+SCENARIO_BUILDERS = {
+    "mule_chain": _mule_chain,
+    "burst": _burst,
+    "smurfing": _smurfing,
+    "fan_in_fan_out": _fan_in_fan_out,
+    "round_trip": _round_trip,
+}
+
+
+def generate_scenarios(accounts, start, end, scenarios=None, seed=0):
+    """
+    Builds N independent, labelled instances of each fraud typology.
+
+    Parameters:
+    - accounts: population to draw participants from (without overlap)
+    - start, end: time range (anything pd.Timestamp accepts) for anchors
+    - scenarios: {typology: params} overriding DEFAULT_SCENARIOS;
+      set "instances" to 0 to disable a typology
+    - seed: RNG seed
+
+    Returns:
+    - (transactions DataFrame, labels DataFrame)
+    """
+
+    rng = np.random.default_rng(seed)
+    pool = _AccountPool(accounts, rng)
+
+    start_us = pd.Timestamp(start).value // 1000
+    end_us = max(pd.Timestamp(end).value // 1000, start_us + 1)
+
+    frames = []
+    label_frames = []
+
+    for typology, defaults in DEFAULT_SCENARIOS.items():
+        params = dict(defaults, **(scenarios or {}).get(typology, {}))
+        n = params["instances"]
+        if n <= 0:
+            continue
+
+        anchors = rng.integers(start_us, end_us, n)
+        senders, receivers, amounts, timestamps, members, roles = (
+            SCENARIO_BUILDERS[typology](params, pool, anchors, rng)
+        )
+
+        per_instance = senders[0].size
+        instance = np.repeat(np.arange(n), per_instance)
+        hop = np.tile(np.arange(per_instance), n)
+        scenario_ids = np.char.add(f"{typology}_", np.arange(n).astype("U"))
+
+        device = np.char.add(f"sim_device_{typology}_", instance.astype("U"))
+
+        frames.append(pd.DataFrame({
+            "transaction_id": np.char.add(
+                np.char.add(f"sim_{typology}_", instance.astype("U")),
+                np.char.add("_", hop.astype("U"))
+            ),
+            "sender_id": senders.ravel(),
+            "receiver_id": receivers.ravel(),
+            "amount": amounts.ravel(),
+            "timestamp": np.datetime_as_string(
+                timestamps.ravel().astype("datetime64[us]")
+            ),
+            "location": rng.choice(["Chennai", "Bangalore", "Mumbai", "Delhi"], n)[instance],
+            "merchant_category": "Transfer",
+            "device_id": device,
+        }, columns=SCENARIO_FIELDNAMES))
+
+        label_frames.append(pd.DataFrame({
+            "account_id": members.ravel(),
+            "typology": typology,
+            "scenario_id": np.repeat(scenario_ids, members.shape[1]),
+            "role": roles.ravel(),
+        }, columns=LABEL_FIELDNAMES))
+
+    if not frames:
+        return (
+            pd.DataFrame(columns=SCENARIO_FIELDNAMES),
+            pd.DataFrame(columns=LABEL_FIELDNAMES)
+        )
+
+    return (
+        pd.concat(frames, ignore_index=True),
+        pd.concat(label_frames, ignore_index=True)
+    )
+
+
+def inject_scenarios(transactions, scenarios=None, seed=0):
+    """
+    Appends labelled scenario instances to a transactions DataFrame,
+    drawing participants from its existing accounts and time range.
+    """
+
+    accounts = pd.unique(
+        pd.concat([transactions["sender_id"], transactions["receiver_id"]])
+    )
+    times = pd.to_datetime(transactions["timestamp"])
+
+    injected, labels = generate_scenarios(
+        accounts, times.min(), times.max(), scenarios=scenarios, seed=seed
+    )
+
+    return pd.concat([transactions, injected], ignore_index=True), labels
+
+
+def inject_scenarios_into_corpus(path, labels_path, users, start, span_days,
+                                 scenarios=None, seed=0):
+    """
+    Appends scenario rows to a generated corpus file on disk (without
+    reading it back) and writes the ground-truth account labels.
+    Assumes the corpus uses user_1 .. user_<users> account ids.
+    """
+
+    accounts = np.array(
+        [f"user_{i}" for i in range(1, users + 1)], dtype=object
+    )
+    end = pd.Timestamp(start) + pd.Timedelta(days=span_days)
+
+    injected, labels = generate_scenarios(
+        accounts, start, end, scenarios=scenarios, seed=seed
+    )
+
+    injected.to_csv(path, mode="a", index=False, header=not os.path.isfile(path))
+    labels.to_csv(labels_path, index=False)
+
+    return len(injected), labels
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Inject labelled fraud scenarios into a NeuroAML corpus"
+    )
+    parser.add_argument("path")
+    parser.add_argument("--labels", required=True)
+    parser.add_argument("--instances", type=int, default=10,
+                        help="instances per typology")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--start", default="2026-01-01T00:00:00")
+    parser.add_argument("--span-days", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    scenarios = {
+        typology: {"instances": args.instances}
+        for typology in DEFAULT_SCENARIOS
+    }
+
+    inject_scenarios_into_corpus(
+        args.path, args.labels, args.users, args.start, args.span_days,
+        scenarios=scenarios, seed=args.seed
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Monitoring View
+Population aggregates (risk level counts, score histogram, flagged
+components, top movers) and a sorted, paged account table for one
+pipeline state. Aggregates are computed once per published state and
+sort orders once per sort key, so a dashboard refresh costs the same
+for a thousand or ten million accounts.
+"""
+
+import threading
+
+import numpy as np
+
+from src.risk_engine import RISK_LEVELS
+
+HISTOGRAM_BINS = 20
+TOP_MOVERS = 10
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+SORT_KEYS = ("risk_score", "change", "network_risk", "account_id")
+
+# Summary flag name -> code-aligned bool array in the pipeline state
+FLAGS = {
+    "behavior": lambda state: state["behavior_risk"],
+    "graph": lambda state: state["graph_risk"],
+    "temporal": lambda state: state["temporal_risk"],
+    "linkage": lambda state: state["device_linkage"]["linkage_risk"],
+    "cycle": lambda state: state["cycles"]["cycle_risk"],
+    "broker": lambda state: state["betweenness"]["broker"],
+}
+
+
+class MonitoringView:
+    """
+    Read-only view over one pipeline state. Positions index
+    state["accounts"] (the active account codes).
+    """
+
+    def __init__(self, state):
+        self.state = state
+        self.accounts = state["accounts"]
+        final = state["final_risk"]
+        n = len(final["risk_score"])
+
+        self.scores = final["risk_score"][self.accounts]
+        self.labels = final["final_risk"][self.accounts]
+
+        # Change since the state this one caught up from: new accounts
+        # count from 0, and a cold build has no change at all
+        previous = state.get("previous_risk_score")
+        if previous is None:
+            self.change = np.zeros(len(self.accounts))
+        else:
+            before = np.zeros(n)
+            known = min(n, len(previous))
+            before[:known] = previous[:known]
+            self.change = np.round(self.scores - before[self.accounts], 2)
+
+        self._orders = {}
+        self._lock = threading.Lock()
+        self._summary = self._build_summary()
+
+    # -------------------------------------------------
+    # Aggregates
+    # -------------------------------------------------
+    def _build_summary(self):
+        state = self.state
+        counts = np.bincount(self.labels, minlength=len(RISK_LEVELS))
+
+        top = max(float(self.scores.max()) if len(self.scores) else 1.0, 1.0)
+        histogram, edges = np.histogram(self.scores, bins=HISTOGRAM_BINS, range=(0.0, top))
+
+        movers = np.flatnonzero(self.change)
+        if len(movers) > TOP_MOVERS:
+            movers = movers[np.argpartition(-np.abs(self.change[movers]), TOP_MOVERS)[:TOP_MOVERS]]
+        movers = movers[np.argsort(-np.abs(self.change[movers]), kind="stable")]
+
+        return {
+            "accounts": int(len(self.accounts)),
+            "levels": dict(zip(RISK_LEVELS.tolist(), counts.tolist())),
+            "flags": {
+                name: int(np.asarray(values(state), dtype=bool)[self.accounts].sum())
+                for name, values in FLAGS.items()
+            },
+            "histogram": {
+                "edges": np.round(edges, 4).tolist(),
+                "counts": histogram.tolist(),
+            },
+            "top_movers": self.rows(movers),
+            "transactions": int(len(state["transactions"]["amount"])),
+            "watermark": state.get("watermark"),
+        }
+
+    def summary(self):
+        return self._summary
+
+    # -------------------------------------------------
+    # Paged Table
+    # -------------------------------------------------
+    def _sort_values(self, sort):
+        if sort == "risk_score":
+            return self.scores
+        if sort == "change":
+            return self.change
+        if sort == "network_risk":
+            return self.state["network_risk"][self.accounts]
+        return self.state["symbols"].accounts.decode(self.accounts)
+
+    def _order(self, sort, level):
+        # Ascending positions for (sort, level), computed on first use
+        key = (sort, level)
+        order = self._orders.get(key)
+        if order is not None:
+            return order
+
+        with self._lock:
+            if key not in self._orders:
+                full = self._orders.get((sort, None))
+                if full is None:
+                    full = np.argsort(self._sort_values(sort), kind="stable").astype(np.int32)
+                    self._orders[(sort, None)] = full
+                if level is not None:
+                    self._orders[key] = full[self.labels[full] == level]
+            return self._orders[key]
+
+    def page(self, offset=0, limit=DEFAULT_PAGE_SIZE, sort="risk_score",
+             descending=True, level=None):
+        """
+        One page of the account table. level is a RISK_LEVELS name or
+        None for every account.
+        """
+
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+        if level is not None:
+            if level not in RISK_LEVELS:
+                raise ValueError(f"level must be one of {', '.join(RISK_LEVELS)}")
+            level = int(np.flatnonzero(RISK_LEVELS == level)[0])
+
+        offset = max(int(offset), 0)
+        limit = min(max(int(limit), 0), MAX_PAGE_SIZE)
+
+        order = self._order(sort, level)
+        total = len(order)
+        if descending:
+            positions = order[::-1][offset:offset + limit]
+        else:
+            positions = order[offset:offset + limit]
+
+        return {
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "sort": sort,
+            "order": "desc" if descending else "asc",
+            "rows": self.rows(positions),
+        }
+
+    def rows(self, positions):
+        state = self.state
+        codes = self.accounts[positions]
+        names = state["symbols"].accounts.decode(codes)
+
+        flags = {
+            name: np.asarray(values(state), dtype=bool)[codes]
+            for name, values in FLAGS.items()
+        }
+
+        return [
+            {
+                "account_id": name,
+                "risk_score": float(self.scores[p]),
+                "final_risk": str(RISK_LEVELS[self.labels[p]]),
+                "change": float(self.change[p]),
+                "network_risk": round(float(state["network_risk"][code]), 4),
+                "flags": [f for f, values in flags.items() if values[i]],
+            }
+            for i, (name, p, code) in enumerate(zip(names, positions, codes))
+        ]
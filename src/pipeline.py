@@ -0,0 +1,62 @@
+"""
+Pipeline Layers
+Runs the per-account detection layers (behaviour, graph, temporal,
+device linkage) over one encoded transaction batch. Shared by the API
+state builder and the historical backfill.
+"""
+
+from src.behavior_features import build_user_behavior
+from src.anomaly_detector import fit_behavior_model, detect_anomalies
+from src.transaction_graph import (
+    build_corridor_graph, build_transaction_graph, detect_graph_anomalies
+)
+from src.temporal_detector import detect_temporal_anomalies
+from src.device_linkage import build_linkage_indexes, detect_device_linkage
+from src.tracing import span, traced
+
+
+@traced("pipeline.layers")
+def run_layers(transactions, n_accounts, n_devices=None, sketches=None, model=None,
+               linkage_indexes=None):
+    """
+    Layer outputs, code-aligned to n_accounts. A given behaviour model
+    is used as-is; otherwise one is fitted on this batch. Given linkage
+    indexes must already cover the batch (e.g. a catch-up's previous
+    index with the new rows folded in).
+    """
+
+    with span("layers.behavior_features", accounts=n_accounts, sketches=sketches is not None):
+        behavior_profiles = build_user_behavior(transactions, n_accounts, sketches)
+
+    with span("layers.behavior_model", model="reused" if model is not None else "fitted"):
+        behavior_model = model if model is not None else fit_behavior_model(behavior_profiles)
+        behavior_risk = detect_anomalies(behavior_profiles, behavior_model)
+
+    with span("layers.graph", corridors=sketches is not None):
+        if sketches is not None:
+            graph = build_corridor_graph(sketches, n_accounts)
+        else:
+            graph = build_transaction_graph(transactions, n_accounts)
+        graph_risk = detect_graph_anomalies(graph, sketches)
+
+    with span("layers.temporal"):
+        temporal_risk = detect_temporal_anomalies(transactions, n_accounts)
+
+    with span("layers.device_linkage", reused=linkage_indexes is not None):
+        if linkage_indexes is None:
+            linkage_indexes = build_linkage_indexes(transactions)
+        device_linkage = detect_device_linkage(
+            linkage_indexes["devices"], n_accounts, n_devices
+        )
+
+    return {
+        "behavior_profiles": behavior_profiles,
+        "behavior_model": behavior_model,
+        "behavior_risk": behavior_risk,
+        "graph": graph,
+        "graph_risk": graph_risk,
+        "temporal_risk": temporal_risk,
+        "linkage_indexes": linkage_indexes,
+        "device_linkage": device_linkage,
+        "sketches": sketches,
+    }
@@ -0,0 +1,21 @@
+"""
+Worker Pools
+Process pools for the sharded pipeline, cycle search and broker
+detection. These run inside the API process, whose request, writer
+and catch-up threads may hold locks at any moment; a forked child
+would inherit such a lock held forever. Pools therefore start their
+workers from a clean forkserver (spawn where forkserver is not
+available), and worker inputs are pickled once per worker.
+"""
+
+import os
+from multiprocessing import get_all_start_methods, get_context
+
+POOL_START_METHOD = os.environ.get(
+    "NEUROAML_POOL_START_METHOD",
+    "forkserver" if "forkserver" in get_all_start_methods() else "spawn",
+)
+
+
+def worker_pool(workers, initializer, initargs):
+    return get_context(POOL_START_METHOD).Pool(workers, initializer, initargs)
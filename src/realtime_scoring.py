@@ -0,0 +1,365 @@
+"""
+Real-Time Transaction Scoring
+Scores single transactions or small batches against in-memory
+per-account state (profile aggregates, velocity windows, counterparty
+risk) and the persisted behaviour model. Concurrent requests are
+micro-batched so the model runs once per batch.
+"""
+
+import math
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime
+
+import numpy as np
+
+from src.symbols import encode_transactions, grow
+from src.anomaly_detector import FEATURES, compile_behavior_model, predict_compiled
+from src.velocity_features import VelocityState
+from src.flow_features import NO_DWELL
+from src.risk_engine import compute_final_risk, RISK_LEVELS
+from src.explainability import NETWORK_RISK_EXPLAIN
+
+MAX_BATCH = 256
+MAX_WAIT_MS = 2.0
+MAX_QUEUE = 10_000
+LATENCY_WINDOW = 10_000      # latencies kept for percentiles
+HIGH_LEVEL = int(np.flatnonzero(RISK_LEVELS == "HIGH")[0])
+
+REQUIRED_FIELDS = ("sender_id", "receiver_id", "amount")
+MAX_AMOUNT = 1e12           # larger amounts would overflow the running totals
+
+REASONS = {
+    "behavior": "Transaction makes the sender's behaviour profile anomalous.",
+    "network": "Sender is part of a suspicious transaction network.",
+    "propagation": "Sender is closely connected to confirmed or anomalous accounts.",
+    "counterparty": "Receiver is currently classified as high risk.",
+    "temporal": "Sender shows a sudden escalation in transaction amounts.",
+    "linkage": "Sender transacts from a device shared by an unusual number of accounts.",
+    "cycle": "Sender is on a round-tripping cycle of transfers.",
+}
+
+
+def normalize_transaction(record):
+    """
+    Validates an incoming transaction dict and fills optional fields.
+    Raises ValueError on missing or malformed required fields.
+    """
+
+    missing = [f for f in REQUIRED_FIELDS if record.get(f) in (None, "")]
+    if missing:
+        raise ValueError(f"missing required fields: {', '.join(missing)}")
+
+    try:
+        amount = float(record["amount"])
+    except (TypeError, ValueError):
+        raise ValueError(f"amount is not numeric: {record['amount']!r}")
+    # NaN / inf would corrupt the per-account totals and the store
+    if not math.isfinite(amount) or amount < 0 or amount > MAX_AMOUNT:
+        raise ValueError(f"amount must be between 0 and {MAX_AMOUNT:g}: {record['amount']!r}")
+
+    timestamp = str(record.get("timestamp") or datetime.now().isoformat())
+    try:
+        np.datetime64(timestamp, "us")
+    except ValueError:
+        raise ValueError(f"timestamp is not ISO-8601: {timestamp!r}")
+
+    normalized = {
+        "transaction_id": str(record.get("transaction_id") or uuid.uuid4()),
+        "sender_id": str(record["sender_id"]),
+        "receiver_id": str(record["receiver_id"]),
+        "amount": amount,
+        "timestamp": timestamp,
+        "location": str(record.get("location") or "unknown"),
+        "merchant_category": str(record.get("merchant_category") or "unknown"),
+        "device_id": str(record.get("device_id") or "unknown"),
+    }
+
+    # One record per store line
+    for field, value in normalized.items():
+        if isinstance(value, str) and ("\n" in value or "\r" in value):
+            raise ValueError(f"{field} must not contain line breaks")
+
+    return normalized
+
+
+# -----------------------------------------------------
+# Per-Account State
+# -----------------------------------------------------
+class ScoringState:
+    """
+    Incrementally maintained copy of the behaviour features plus the
+    last batch run's network / temporal / linkage flags.
+    """
+
+    def __init__(self, pipeline_state, model):
+        transactions = pipeline_state["transactions"]
+        profiles = pipeline_state["behavior_profiles"]
+        n = len(profiles["active"])
+
+        # Flattened forest: vectorized inference on small batches
+        self.model = compile_behavior_model(model) if model is not None else None
+        self.symbols = pipeline_state["symbols"]
+
+        senders = transactions["sender_id"]
+        receivers = transactions["receiver_id"]
+        amounts = transactions["amount"]
+
+        self.count = np.bincount(senders, minlength=n).astype(np.int64)
+        self.total = np.bincount(senders, weights=amounts, minlength=n)
+        self.max_amount = profiles["max_amount"].copy()
+        self.min_amount = np.where(
+            self.count > 0, profiles["min_amount"], np.inf
+        )
+        self.inbound_total = profiles["inbound_total"].astype(np.float64)
+        self.outbound_total = profiles["outbound_total"].astype(np.float64)
+        self.fan_in = np.asarray(profiles["fan_in"], dtype=np.float64)
+        self.fan_out = np.asarray(profiles["fan_out"], dtype=np.float64)
+        # Median dwell is refreshed when the next published pipeline
+        # state replaces this scoring state
+        self.median_dwell = profiles["median_dwell_seconds"].copy()
+        self.pairs = np.unique(
+            (senders.astype(np.int64) << 32) | receivers.astype(np.int64)
+        )
+
+        self.velocity = VelocityState()
+        self.velocity.update(transactions, n)
+
+        self.graph_risk = pipeline_state["graph_risk"].copy()
+        self.network_risk = pipeline_state["network_risk"].copy()
+        self.temporal_risk = pipeline_state["temporal_risk"].copy()
+        self.linkage_risk = pipeline_state["device_linkage"]["linkage_risk"].copy()
+        self.cycle_risk = pipeline_state["cycles"]["cycle_risk"].copy()
+        self.high_risk = pipeline_state["final_risk"]["final_risk"] == HIGH_LEVEL
+
+    def _resize(self, n):
+        self.count = grow(self.count, n, 0)
+        self.total = grow(self.total, n, 0.0)
+        self.max_amount = grow(self.max_amount, n, 0.0)
+        self.min_amount = grow(self.min_amount, n, np.inf)
+        self.inbound_total = grow(self.inbound_total, n, 0.0)
+        self.outbound_total = grow(self.outbound_total, n, 0.0)
+        self.fan_in = grow(self.fan_in, n, 0.0)
+        self.fan_out = grow(self.fan_out, n, 0.0)
+        self.median_dwell = grow(self.median_dwell, n, NO_DWELL)
+        self.graph_risk = grow(self.graph_risk, n, False)
+        self.network_risk = grow(self.network_risk, n, 0.0)
+        self.temporal_risk = grow(self.temporal_risk, n, False)
+        self.linkage_risk = grow(self.linkage_risk, n, False)
+        self.cycle_risk = grow(self.cycle_risk, n, False)
+        self.high_risk = grow(self.high_risk, n, False)
+
+    def _apply(self, batch, n):
+        senders = batch["sender_id"]
+        receivers = batch["receiver_id"]
+        amounts = batch["amount"]
+
+        self.count += np.bincount(senders, minlength=n)
+        self.total += np.bincount(senders, weights=amounts, minlength=n)
+        np.maximum.at(self.max_amount, senders, amounts)
+        np.minimum.at(self.min_amount, senders, amounts)
+        self.inbound_total += np.bincount(receivers, weights=amounts, minlength=n)
+        self.outbound_total += np.bincount(senders, weights=amounts, minlength=n)
+
+        keys = np.unique(
+            (senders.astype(np.int64) << 32) | receivers.astype(np.int64)
+        )
+        new_keys = keys[~np.isin(keys, self.pairs, assume_unique=True)]
+        if len(new_keys):
+            self.fan_out += np.bincount(new_keys >> 32, minlength=n)
+            self.fan_in += np.bincount(new_keys & 0xFFFFFFFF, minlength=n)
+            self.pairs = np.union1d(self.pairs, new_keys)
+
+        self.velocity.update(batch, n)
+
+    def _features(self, accounts):
+        count = self.count[accounts]
+        sent = count > 0
+        inflow = self.inbound_total[accounts]
+
+        columns = {
+            "transaction_count": count,
+            "average_amount": np.where(
+                sent, np.round(self.total[accounts] / np.maximum(count, 1), 2), 0
+            ),
+            "max_amount": np.where(sent, self.max_amount[accounts], 0),
+            "min_amount": np.where(sent, self.min_amount[accounts], 0),
+            "fan_in": self.fan_in[accounts],
+            "fan_out": self.fan_out[accounts],
+            "inbound_total": inflow,
+            "outbound_total": self.outbound_total[accounts],
+            "pass_through_ratio": np.where(
+                inflow > 0, self.outbound_total[accounts] / np.maximum(inflow, 1e-9), 0
+            ),
+            "median_dwell_seconds": self.median_dwell[accounts],
+        }
+        for name, values in self.velocity.features.items():
+            columns[name] = values[accounts]
+
+        return np.column_stack([
+            np.asarray(columns[f], dtype=np.float64) for f in FEATURES
+        ])
+
+    def score(self, records):
+        """
+        Applies the transactions to the account state and scores them.
+        """
+
+        batch = encode_transactions(records, self.symbols)
+        n = len(self.symbols.accounts)
+        self._resize(n)
+        self._apply(batch, n)
+
+        senders = batch["sender_id"]
+        receivers = batch["receiver_id"]
+
+        behavior = np.zeros(len(senders), dtype=bool)
+        if self.model is not None:
+            behavior = predict_compiled(self.model, self._features(senders)) == -1
+
+        counterparty = self.high_risk[receivers]
+        network = self.graph_risk[senders] | counterparty
+        temporal = self.temporal_risk[senders]
+        linkage = self.linkage_risk[senders]
+        propagation = self.network_risk[senders]
+        cycle = self.cycle_risk[senders]
+
+        fused = compute_final_risk(
+            behavior, network, temporal, linkage,
+            propagation=propagation, cycle_risk=cycle
+        )
+
+        flags = {
+            "behavior": behavior,
+            "network": self.graph_risk[senders],
+            "propagation": propagation >= NETWORK_RISK_EXPLAIN,
+            "counterparty": counterparty,
+            "temporal": temporal,
+            "linkage": linkage,
+            "cycle": cycle,
+        }
+
+        results = []
+        for i, record in enumerate(records):
+            reasons = [REASONS[k] for k, v in flags.items() if v[i]]
+            results.append({
+                "transaction_id": record["transaction_id"],
+                "sender_id": record["sender_id"],
+                "receiver_id": record["receiver_id"],
+                "risk_score": float(fused["risk_score"][i]),
+                "risk_level": str(RISK_LEVELS[fused["final_risk"][i]]),
+                "reasons": reasons or [
+                    "No significant risk indicators for this transaction."
+                ],
+            })
+
+        return results
+
+
+# -----------------------------------------------------
+# Latency Metrics
+# -----------------------------------------------------
+class LatencyTracker:
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.latencies_ms = deque(maxlen=window)
+        self.requests = 0
+        self.transactions = 0
+        self.batches = 0
+        self._lock = threading.Lock()
+
+    def record_batch(self, request_latencies_ms, transactions):
+        with self._lock:
+            self.latencies_ms.extend(request_latencies_ms)
+            self.requests += len(request_latencies_ms)
+            self.transactions += transactions
+            self.batches += 1
+
+    def snapshot(self):
+        with self._lock:
+            latencies = np.array(self.latencies_ms)
+            requests, transactions, batches = (
+                self.requests, self.transactions, self.batches
+            )
+
+        summary = {
+            "requests": requests,
+            "transactions": transactions,
+            "batches": batches,
+            "avg_batch_size": round(transactions / batches, 2) if batches else 0,
+        }
+        for p in (50, 95, 99):
+            summary[f"p{p}_latency_ms"] = (
+                round(float(np.percentile(latencies, p)), 3)
+                if len(latencies) else None
+            )
+        return summary
+
+
+# -----------------------------------------------------
+# Micro-Batching
+# -----------------------------------------------------
+class MicroBatcher:
+    """
+    Collects concurrent requests for up to MAX_WAIT_MS (or MAX_BATCH
+    transactions) and scores them together on one worker thread.
+    """
+
+    def __init__(self, scorer, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS,
+                 max_queue=MAX_QUEUE):
+        self.scorer = scorer
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.metrics = LatencyTracker()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, records):
+        future = Future()
+        self.queue.put((records, future, time.perf_counter()), timeout=1)
+        return future
+
+    def _collect(self):
+        pending = [self.queue.get()]
+        size = len(pending[0][0])
+        deadline = time.perf_counter() + self.max_wait
+
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            size += len(item[0])
+
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            records = [r for item in pending for r in item[0]]
+
+            try:
+                results = self.scorer.score(records)
+            except Exception as error:
+                for _, future, _ in pending:
+                    future.set_exception(error)
+                continue
+
+            done = time.perf_counter()
+            offset = 0
+            latencies = []
+            for request_records, future, started in pending:
+                future.set_result(results[offset:offset + len(request_records)])
+                offset += len(request_records)
+                latencies.append((done - started) * 1000)
+
+            self.metrics.record_batch(latencies, len(records))
@@ -1,34 +1,342 @@
-def compute_final_risk(behavior_risk, graph_risk, temporal_risk):
-    final_scores = {}
+"""
+Risk Fusion Engine
+Fuses code-aligned component flags / scores into a continuous risk
+score and a LOW / MEDIUM / HIGH label for the whole population in one
+call. Weights, thresholds and escalation rules come from a JSON config
+(NEUROAML_RISK_CONFIG) that is reloaded when the file changes.
+"""
 
-    users = set(
-        list(behavior_risk.keys()) +
-        list(graph_risk.keys()) +
-        list(temporal_risk.keys())
-    )
+import ast
+import hashlib
+import json
+import os
+import threading
 
-    for user in users:
-        score = 0
+import numpy as np
 
-        if behavior_risk.get(user, {}).get("risk_flag") == "HIGH":
-            score += 0.4
+RISK_LEVELS = np.array(["LOW", "MEDIUM", "HIGH"])
 
-        if graph_risk.get(user) == "HIGH":
-            score += 0.3
+MAX_TABLE_BITS = 12     # boolean components fused through a lookup table
 
-        if temporal_risk.get(user) == "HIGH":
-            score += 0.3
+# Score-valued components; every other component is a flag
+CONTINUOUS_COMPONENTS = {"propagation"}
 
-        if score >= 0.6:
-            label = "HIGH"
-        elif score >= 0.3:
-            label = "MEDIUM"
-        else:
-            label = "LOW"
+CONFIG_PATH = os.environ.get("NEUROAML_RISK_CONFIG", "config/risk_fusion.json")
 
-        final_scores[user] = {
-            "risk_score": round(score, 2),
+DEFAULT_FUSION_CONFIG = {
+    "weights": {
+        "behavior": 0.4,
+        "graph": 0.3,
+        "temporal": 0.3,
+        "linkage": 0.3,
+        # continuous personalized-PageRank network risk in [0, 1]
+        "propagation": 0.3,
+        "cycle": 0.3,
+    },
+    "max_score": 1.0,
+    # minimum (unrounded) score for each level above LOW
+    "thresholds": {
+        "MEDIUM": 0.3,
+        "HIGH": 0.6,
+    },
+    # {"name", "when": expression, "min_level" and/or "add"}
+    "rules": [],
+}
+
+
+# -----------------------------------------------------
+# Rule Expressions
+# -----------------------------------------------------
+_ALLOWED_NODES = (
+    ast.Expression, ast.Name, ast.Load, ast.Constant,
+    ast.BinOp, ast.BitAnd, ast.BitOr, ast.BitXor,
+    ast.Add, ast.Sub, ast.Mult, ast.Div,
+    ast.UnaryOp, ast.Invert, ast.USub,
+    ast.Compare, ast.Gt, ast.GtE, ast.Lt, ast.LtE, ast.Eq, ast.NotEq,
+)
+
+
+def compile_rule(expression, names):
+    """
+    Compiles a rule such as "behavior & (linkage | (score >= 0.5))" into
+    a function of the component arrays. Only component names, numbers,
+    & | ^ ~, arithmetic and comparisons are allowed.
+    """
+
+    tree = ast.parse(expression, mode="eval")
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(
+                f"unsupported syntax in rule {expression!r}: {type(node).__name__}"
+            )
+        if isinstance(node, ast.Name) and node.id not in names:
+            raise ValueError(f"unknown name in rule {expression!r}: {node.id}")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise ValueError(f"only numeric constants are allowed: {expression!r}")
+        if isinstance(node, ast.Compare) and len(node.ops) > 1:
+            raise ValueError(f"chained comparisons are not supported: {expression!r}")
+
+    code = compile(tree, "<risk rule>", "eval")
+    return lambda arrays: np.asarray(eval(code, {"__builtins__": {}}, arrays))
+
+
+def _number(value, what):
+    number = float(value)
+    if not np.isfinite(number):
+        raise ValueError(f"{what} must be a finite number, got {value!r}")
+    return number
+
+
+def _check_rule(name, when, components):
+    # Dry run with flag components and with the continuous ones as
+    # scores, so a rule that parses but cannot be fused (e.g.
+    # "behavior - graph") fails at load time, not in fuse
+    for continuous in (set(), CONTINUOUS_COMPONENTS):
+        arrays = {
+            component: np.zeros(2, dtype=np.float64 if component in continuous else bool)
+            for component in components
+        }
+        arrays["score"] = np.zeros(2)
+        try:
+            np.broadcast_to(when(arrays).astype(bool), (2,))
+        except Exception as error:
+            raise ValueError(f"rule {name!r} cannot be evaluated: {error}") from error
+
+
+def _validate(config):
+    if not isinstance(config, dict):
+        raise ValueError("fusion config must be a JSON object")
+    merged = dict(DEFAULT_FUSION_CONFIG)
+    merged.update(config)
+    for key in ("weights", "thresholds"):
+        if not isinstance(merged[key], dict):
+            raise ValueError(f"{key} must be an object")
+    if not isinstance(merged["rules"], list):
+        raise ValueError("rules must be a list")
+
+    # Weights and thresholds override the defaults key by key
+    unknown = set(merged["weights"]) - set(DEFAULT_FUSION_CONFIG["weights"])
+    if unknown:
+        raise ValueError(f"unknown components in weights: {sorted(unknown)}")
+    weights = {
+        k: _number(v, f"weight {k!r}")
+        for k, v in {**DEFAULT_FUSION_CONFIG["weights"], **merged["weights"]}.items()
+    }
+    thresholds = {
+        k: _number(v, f"threshold {k!r}")
+        for k, v in {**DEFAULT_FUSION_CONFIG["thresholds"], **merged["thresholds"]}.items()
+    }
+    unknown = set(thresholds) - set(RISK_LEVELS[1:])
+    if unknown:
+        raise ValueError(f"unknown risk levels in thresholds: {sorted(unknown)}")
+    cutoffs = np.array([thresholds[level] for level in RISK_LEVELS[1:]])
+    if np.any(np.diff(cutoffs) < 0):
+        raise ValueError("thresholds must increase from MEDIUM to HIGH")
+
+    names = set(weights) | {"score"}
+    rules = []
+    for rule in merged["rules"]:
+        if not isinstance(rule, dict) or not isinstance(rule.get("when"), str):
+            raise ValueError(f"rule must be an object with a 'when' expression: {rule!r}")
+        name = rule.get("name", rule["when"])
+        level = rule.get("min_level")
+        if level is not None and level not in RISK_LEVELS:
+            raise ValueError(f"unknown min_level in rule {name!r}: {level}")
+        when = compile_rule(rule["when"], names)
+        _check_rule(name, when, weights)
+        rules.append({
+            "name": name,
+            "when": when,
+            "min_level": None if level is None else int(np.flatnonzero(RISK_LEVELS == level)[0]),
+            "add": _number(rule.get("add", 0.0), f"add in rule {name!r}"),
+        })
+
+    return {
+        "weights": weights,
+        "max_score": _number(merged["max_score"], "max_score"),
+        # Level cut-offs in label order (MEDIUM, HIGH)
+        "cutoffs": cutoffs,
+        "rules": rules,
+    }
+
+
+def _config_version(config):
+    canonical = json.dumps(config, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(canonical).hexdigest()[:12]
+
+
+# -----------------------------------------------------
+# Fusion Engine
+# -----------------------------------------------------
+class FusionEngine:
+    """
+    Compiled fusion config plus file-change hot reload. A config that
+    fails to load keeps the previous one and is reported in last_error.
+    """
+
+    def __init__(self, path=CONFIG_PATH, config=None):
+        self.path = path
+        self.last_error = None
+        self._mtime = None
+        self._lock = threading.Lock()
+        self.config = _validate(config or {})
+        self.version = _config_version(config or DEFAULT_FUSION_CONFIG)
+        if config is None:
+            self.reload_if_changed()
+
+    def reload_if_changed(self):
+        if not self.path:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+
+        with self._lock:
+            if mtime == self._mtime:
+                return False
+            self._mtime = mtime
+            try:
+                with open(self.path) as file:
+                    raw = json.load(file)
+                self.config = _validate(raw)
+                self.version = _config_version(raw)
+                self.last_error = None
+            except Exception as error:
+                # Any bad file keeps the previous config; _mtime is already
+                # recorded, so report it rather than retrying every call
+                self.last_error = f"{self.path}: {error}"
+                return False
+        return True
+
+    def fuse(self, components):
+        """
+        components: {name: code-aligned bool or float array}
+        Returns {"risk_score", "final_risk"} for the whole population.
+        """
+
+        self.reload_if_changed()
+        config = self.config
+
+        n = max((len(v) for v in components.values()), default=0)
+        arrays = {
+            name: _aligned(components.get(name, ()), n)
+            for name in config["weights"]
+        }
+
+        if all(a.dtype == bool for a in arrays.values()) and len(arrays) <= MAX_TABLE_BITS:
+            return self._fuse_flags(config, arrays, n)
+
+        score, label = _fuse_arrays(config, arrays, n)
+        return {
+            "risk_score": np.round(score, 2),
             "final_risk": label
         }
 
-    return final_scores
+    def _fuse_flags(self, config, arrays, n):
+        # Boolean components only: fuse every flag combination once and
+        # gather the population's results from the lookup table
+        names = list(arrays)
+        combos = np.arange(1 << len(names))
+        table_score, table_label = _fuse_arrays(
+            config,
+            {name: (combos >> bit) & 1 == 1 for bit, name in enumerate(names)},
+            len(combos)
+        )
+
+        dtype = np.uint8 if len(names) <= 8 else np.uint16
+        code = np.zeros(n, dtype=dtype)
+        for bit, name in enumerate(names):
+            code |= arrays[name].view(np.uint8).astype(dtype, copy=False) << dtype(bit)
+
+        return {
+            "risk_score": np.round(table_score, 2)[code],
+            "final_risk": table_label[code]
+        }
+
+
+def _fuse_arrays(config, arrays, n):
+    score = np.zeros(n)
+    for name, weight in config["weights"].items():
+        if weight:
+            score += weight * arrays[name]
+
+    escalate = np.zeros(n, dtype=np.int8)
+    if config["rules"]:
+        arrays = dict(arrays, score=score.copy())
+        for rule in config["rules"]:
+            hit = np.broadcast_to(rule["when"](arrays).astype(bool), (n,))
+            if rule["add"]:
+                score += rule["add"] * hit
+            if rule["min_level"] is not None:
+                np.maximum(escalate, hit * np.int8(rule["min_level"]), out=escalate)
+
+    np.minimum(score, config["max_score"], out=score)
+
+    # 0 = LOW, 1 = MEDIUM, 2 = HIGH (index into RISK_LEVELS)
+    label = np.zeros(n, dtype=np.int8)
+    for cutoff in config["cutoffs"]:
+        label += score >= cutoff
+    np.maximum(label, escalate, out=label)
+
+    return score, label
+
+
+def _aligned(values, n):
+    values = np.asarray(values)
+    dtype = np.float64 if values.dtype.kind == "f" else bool
+    if len(values) == n and values.dtype == dtype:
+        return values
+    out = np.zeros(n, dtype=dtype)
+    out[:len(values)] = values
+    return out
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_fusion_engine():
+    global _engine
+
+    with _engine_lock:
+        if _engine is None:
+            _engine = FusionEngine()
+
+    return _engine
+
+
+def compute_final_risk(behavior_risk, graph_risk, temporal_risk, linkage_risk=None,
+                       propagation=None, cycle_risk=None, engine=None,
+                       **extra_components):
+    components = {
+        "behavior": behavior_risk,
+        "graph": graph_risk,
+        "temporal": temporal_risk,
+        **extra_components,
+    }
+    if linkage_risk is not None:
+        components["linkage"] = linkage_risk
+    if propagation is not None:
+        components["propagation"] = propagation
+    if cycle_risk is not None:
+        components["cycle"] = cycle_risk
+
+    return (engine or get_fusion_engine()).fuse(components)
+
+
+def decode_final_risk(final_risk, accounts, symbols):
+    """
+    {account_id: {"risk_score", "final_risk"}} for the given account codes.
+    """
+
+    names = symbols.accounts.decode(accounts)
+    scores = final_risk["risk_score"][accounts].tolist()
+    labels = RISK_LEVELS[final_risk["final_risk"][accounts]].tolist()
+
+    return {
+        name: {"risk_score": score, "final_risk": label}
+        for name, score, label in zip(names, scores, labels)
+    }
@@ -0,0 +1,328 @@
+"""
+Risk Evolution Service
+One backend clock for the live risk view. Every tick drifts all
+account scores in a single vectorized step (faster for accounts that
+are already risky), assigns levels, statuses and narratives, records
+a short score history and hands new escalations to the alert engine
+(src/alerts.py), then publishes a new versioned snapshot. Dashboards
+only read snapshots, so every analyst sees the same numbers and the
+work is done once per tick instead of once per browser session.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+EVOLUTION_TICK_SECONDS = float(os.environ.get("NEUROAML_EVOLUTION_TICK_SECONDS", "5"))
+HISTORY_TICKS = int(os.environ.get("NEUROAML_EVOLUTION_HISTORY", "20"))
+DRIFT_RANGE = (0.01, 0.05)  # per-tick drift before acceleration
+DEMO_MULTIPLIER = 2.5       # drift multiplier in demo mode
+MEDIUM_SCORE = 0.35
+HIGH_SCORE = 0.7
+REVIEW_TICKS = 3            # MEDIUM for this many ticks -> under review
+MAX_INJECT_DELTA = 1.0      # largest score increase one inject may apply
+
+log = logging.getLogger(__name__)
+
+# (score at least, drift multiplier), checked in order
+ACCELERATION = ((0.6, 1.5), (0.3, 1.2))
+
+STATUSES = np.array([
+    "🟢 Monitoring",
+    "⚠️ Watchlisted",
+    "🕵️ Under Review",
+    "🚨 Escalated",
+])
+
+EXPLANATIONS = np.array([
+    "✅ The account currently shows normal transaction behavior with no "
+    "significant laundering indicators. It remains under continuous monitoring.",
+
+    "⚠️ Abnormal transaction patterns detected compared to baseline users. "
+    "Enhanced monitoring and due diligence are advised.",
+
+    "⚠️ The account displays suspicious behavior and is directly "
+    "connected to one or more high-risk accounts, indicating possible "
+    "risk propagation or early-stage laundering.",
+
+    "🚨 The account shows persistent high-risk behavior with rapid risk "
+    "escalation over time. Transactional exposure to other high-risk "
+    "accounts suggests potential money laundering, layering, or "
+    "mule-network activity.",
+])
+
+
+def risk_levels(scores):
+    # 0 = LOW, 1 = MEDIUM, 2 = HIGH (index into RISK_LEVELS)
+    return (scores >= MEDIUM_SCORE).astype(np.int8) + (scores >= HIGH_SCORE)
+
+
+class RiskEvolution:
+    """
+    Code-aligned evolving scores for every active account. sync()
+    follows the served pipeline state, step() advances one tick and
+    snapshot() is the last published, read-only view.
+    """
+
+    def __init__(self, seed=None, alerts=None):
+        self._lock = threading.Lock()
+        self._rng = np.random.default_rng(seed)
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.demo = False
+        self.version = 0
+        self.tick = 0
+        self.source = None
+        self.symbols = None
+        self.adjacency = None
+        self.alerts = alerts        # AlertEngine, optional
+        self.last_error = None      # last failed tick of the background clock
+
+        self.scores = np.zeros(0)
+        self.ticks = np.zeros(0, dtype=np.int32)
+        self.active = np.zeros(0, dtype=bool)
+        self.escalated = np.zeros(0, dtype=bool)
+        self.history = np.zeros((HISTORY_TICKS, 0), dtype=np.float32)
+        self.accounts = np.empty(0, dtype=np.int64)
+        self.times = deque(maxlen=HISTORY_TICKS)
+        self._snapshot = None
+        self._publish()
+
+    def _resize(self, n):
+        # Grow code-aligned arrays; new codes start inactive at score 0
+        def grow(array, fill, dtype):
+            grown = np.full(array.shape[:-1] + (n,), fill, dtype=dtype)
+            grown[..., :array.shape[-1]] = array
+            return grown
+
+        if n > len(self.scores):
+            self.scores = grow(self.scores, 0.0, np.float64)
+            self.ticks = grow(self.ticks, 0, np.int32)
+            self.active = grow(self.active, False, bool)
+            self.escalated = grow(self.escalated, False, bool)
+            self.history = grow(self.history, 0.0, np.float32)
+
+    # -------------------------------------------------
+    # Pipeline State
+    # -------------------------------------------------
+    def sync(self, state):
+        """
+        Starts tracking accounts that are new in this pipeline state
+        from their fused risk score. Scores of tracked accounts keep
+        evolving; they are not reset by a pipeline rebuild.
+        """
+
+        if state is self.source:
+            return
+
+        with self._lock:
+            base = state["final_risk"]["risk_score"]
+            self._resize(len(base))
+
+            new = state["accounts"][~self.active[state["accounts"]]]
+            self.scores[new] = np.minimum(base[new], 1.0)
+            self.active[new] = True
+            self.accounts = np.flatnonzero(self.active)
+
+            # Undirected neighbours: money in either direction links accounts
+            graph = state["graph"]
+            self.adjacency = (graph + graph.T).astype(bool).astype(np.float32)
+            self.symbols = state["symbols"]
+            self.source = state
+
+    def _linked_to_high(self, high):
+        n = self.adjacency.shape[0]
+        linked = np.zeros(len(self.scores), dtype=bool)
+        linked[:n] = (self.adjacency @ high[:n].astype(np.float32)) > 0
+        return linked
+
+    # -------------------------------------------------
+    # Tick
+    # -------------------------------------------------
+    def step(self):
+        """
+        Advances every active account by one tick and publishes.
+        """
+
+        records = []
+
+        with self._lock:
+            accounts = self.accounts
+            scores = self.scores[accounts]
+
+            drift = self._rng.uniform(*DRIFT_RANGE, len(accounts))
+            drift *= DEMO_MULTIPLIER if self.demo else 1.0
+            factor = np.ones(len(accounts))
+            for threshold, multiplier in reversed(ACCELERATION):
+                factor[scores >= threshold] = multiplier
+
+            scores = np.minimum(scores + drift * factor, 1.0)
+            self.scores[accounts] = scores
+
+            # Newly escalated accounts raise one alert each
+            high = np.round(scores, 3) >= HIGH_SCORE
+            fresh = accounts[high & ~self.escalated[accounts]]
+            self.escalated[fresh] = True
+            if len(fresh) and self.alerts is not None:
+                records = [
+                    {
+                        "account_id": user,
+                        "kind": "ESCALATION",
+                        "severity": "HIGH",
+                        "score": score,
+                        "message": f"🚨 Risk escalated to HIGH for {user}",
+                    }
+                    for user, score in zip(
+                        self.symbols.accounts.decode(fresh), self.scores[fresh].tolist()
+                    )
+                ]
+
+            stamp = time.strftime("%H:%M:%S")
+
+            self.history[self.tick % HISTORY_TICKS, accounts] = np.round(scores, 3)
+            self.times.append(stamp)
+            self.ticks[accounts] += 1
+            self.tick += 1
+
+            self._publish()
+
+        # Outside the lock: the alert engine writes its history file
+        if records:
+            self.alerts.submit_many(records)
+
+    def inject(self, codes, delta, message=None, kind="SIMULATION"):
+        """
+        Simulated scenario: raises the given accounts' scores by delta
+        (0 < delta <= MAX_INJECT_DELTA) and alerts on each of them as kind.
+        """
+
+        delta = float(delta)
+        if not (math.isfinite(delta) and 0 < delta <= MAX_INJECT_DELTA):
+            raise ValueError(f"delta must be in (0, {MAX_INJECT_DELTA}], got {delta}")
+
+        with self._lock:
+            codes = np.asarray(codes, dtype=np.int64)
+            codes = codes[(codes >= 0) & (codes < len(self.scores))]
+            codes = codes[self.active[codes]]
+
+            self.scores[codes] = np.minimum(self.scores[codes] + delta, 1.0)
+            self._publish()
+
+            records = [
+                {
+                    "account_id": user,
+                    "kind": kind,
+                    "severity": "MEDIUM",
+                    "score": score,
+                    "message": message,
+                }
+                for user, score in zip(
+                    self.symbols.accounts.decode(codes) if len(codes) else [],
+                    self.scores[codes].tolist()
+                )
+            ]
+
+        if records and self.alerts is not None:
+            self.alerts.submit_many(records)
+        return len(codes)
+
+    def set_demo(self, enabled):
+        with self._lock:
+            self.demo = bool(enabled)
+            self._publish()
+
+    # -------------------------------------------------
+    # Published View
+    # -------------------------------------------------
+    def _publish(self):
+        # Caller holds the lock (or is __init__). The snapshot holds
+        # copies, so readers never see a half-applied tick
+        accounts = self.accounts
+        scores = np.round(self.scores[accounts], 3)
+        levels = risk_levels(scores)
+
+        status = levels.astype(np.int8)
+        status[(levels == 1) & (self.ticks[accounts] >= REVIEW_TICKS)] = 2
+        status[levels == 2] = 3
+
+        explanation = levels.astype(np.int8)
+        explanation[levels == 2] = 3
+        if self.adjacency is not None and (levels == 1).any():
+            high = np.zeros(len(self.scores), dtype=bool)
+            high[accounts] = scores >= HIGH_SCORE
+            linked = self._linked_to_high(high)[accounts]
+            explanation[(levels == 1) & linked] = 2
+
+        self.version += 1
+        self._snapshot = {
+            "version": self.version,
+            "tick": self.tick,
+            "updated_at": time.time(),
+            "demo": self.demo,
+            "accounts": accounts,
+            "scores": scores,
+            "levels": levels,
+            "status": status,
+            "explanation": explanation,
+            "escalated": self.escalated[accounts].copy(),
+        }
+
+    def snapshot(self):
+        return self._snapshot
+
+    def account_history(self, code):
+        """
+        [{"time", "score"}] for the recorded ticks of one account,
+        oldest first.
+        """
+
+        with self._lock:
+            if code < 0 or code >= len(self.scores) or not self.active[code]:
+                return []
+
+            kept = min(int(self.ticks[code]), self.tick, HISTORY_TICKS)
+            rows = [(self.tick - kept + i) % HISTORY_TICKS for i in range(kept)]
+            times = list(self.times)[-kept:] if kept else []
+            return [
+                {"time": stamp, "score": round(float(self.history[row, code]), 3)}
+                for stamp, row in zip(times, rows)
+            ]
+
+    # -------------------------------------------------
+    # Background Clock
+    # -------------------------------------------------
+    def start(self, source, tick_seconds=None):
+        """
+        Ticks in a daemon thread: follows source() (the served pipeline
+        state) and steps every tick_seconds.
+        """
+
+        tick_seconds = tick_seconds or EVOLUTION_TICK_SECONDS
+
+        def run():
+            while True:
+                # A failed tick (e.g. the store is unreadable) is logged
+                # and retried on the next one; the clock never stops
+                try:
+                    self.sync(source())
+                    self.step()
+                    self.last_error = None
+                except Exception as error:
+                    self.last_error = f"{type(error).__name__}: {error}"
+                    log.exception("risk evolution tick failed")
+                if self._stop.wait(tick_seconds):
+                    return
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=run, daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,232 @@
+"""
+Sharded Pipeline
+Hash-partitions transactions by sender into N shards and computes the
+per-account layers (behaviour, temporal, local graph degree, linkage
+pairs) in worker processes, then merges them on the coordinator.
+
+Every account is owned by the shard its id hashes to. A shard receives
+its owned rows (sender owned) plus the inbound cross-shard rows
+(receiver owned), so receiver-side features such as fan-in, inbound
+totals and dwell time are exact for the accounts it owns. The merge
+step sums disjoint edge sets into the global graph, normalizes degree
+by the global node count and fits the behaviour model and device
+linkage over the whole population.
+"""
+
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from src.behavior_features import build_user_behavior
+from src.anomaly_detector import fit_behavior_model, detect_anomalies
+from src.transaction_graph import (
+    build_corridor_graph,
+    build_transaction_graph,
+    degree_counts,
+    normalize_degree,
+    GRAPH_CENTRALITY_THRESHOLD
+)
+from src.temporal_detector import detect_temporal_anomalies
+from src.device_linkage import LinkageIndex, detect_device_linkage
+from src.sketches import CounterpartySketches
+from src.symbols import take
+from src.pools import worker_pool
+
+ROWS_PER_SHARD = 2_000_000     # shards grow with the data beyond this
+
+
+def shard_count(rows, workers):
+    return max(workers, math.ceil(rows / ROWS_PER_SHARD))
+
+
+def account_shards(symbols, shards):
+    """
+    Shard of every account code, from a stable hash of the account id
+    (independent of the order codes were assigned in).
+    """
+
+    values = np.asarray(symbols.accounts.values(), dtype=object)
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int32)
+    hashes = pd.util.hash_array(values)
+    return (hashes % np.uint64(shards)).astype(np.int32)
+
+
+# -----------------------------------------------------
+# Worker
+# -----------------------------------------------------
+_worker_input = {}
+
+
+def _init_worker(transactions, owner, n_accounts, sketch_mode):
+    # Pickled once per worker (see src/pools.py)
+    _worker_input.update(
+        transactions=transactions,
+        owner=owner,
+        n_accounts=n_accounts,
+        sketch_mode=sketch_mode,
+    )
+
+
+def _shard_sketches(transactions, owned_rows, inbound_rows):
+    sketches = CounterpartySketches()
+    # Pair counts from owned rows only, so shards never double count an edge
+    sketches.update(take(transactions, owned_rows))
+    # Complete distinct-sender registers for owned receivers
+    sketches.senders.update(
+        transactions["receiver_id"][inbound_rows],
+        transactions["sender_id"][inbound_rows]
+    )
+    return sketches
+
+
+def process_shard(shard):
+    transactions = _worker_input["transactions"]
+    owner = _worker_input["owner"]
+    n = _worker_input["n_accounts"]
+
+    sender_owned = owner[transactions["sender_id"]] == shard
+    receiver_owned = owner[transactions["receiver_id"]] == shard
+    owned_rows = np.flatnonzero(sender_owned)
+    inbound_rows = np.flatnonzero(receiver_owned & ~sender_owned)
+    rows = np.flatnonzero(sender_owned | receiver_owned)
+    local = take(transactions, rows)
+
+    sketches = None
+    if _worker_input["sketch_mode"]:
+        sketches = _shard_sketches(transactions, owned_rows, inbound_rows)
+
+    profiles = build_user_behavior(local, n, sketches)
+    # Every account is owned by exactly one shard, active or not
+    accounts = np.flatnonzero(owner[:n] == shard)
+
+    owned = take(transactions, owned_rows)
+    if sketches is not None:
+        # Sketch mode: no exact edges; the merged corridors form the graph
+        degree = sketches.distinct_receivers(n) + sketches.distinct_senders(n)
+        edges = None
+    else:
+        degree = degree_counts(build_transaction_graph(local, n))
+        # Edges this shard is responsible for: sender owned, summed per pair
+        edges = build_transaction_graph(owned, n).tocoo()
+        edges = (edges.row, edges.col, edges.data)
+    temporal = detect_temporal_anomalies(local, n)
+
+    devices = LinkageIndex()
+    devices.update(owned["sender_id"], owned["device_id"])
+
+    return {
+        "shard": shard,
+        "accounts": accounts,
+        "profiles": {name: values[accounts] for name, values in profiles.items()},
+        "degree": degree[accounts],
+        "temporal": temporal[accounts],
+        "edges": edges,
+        "device_pairs": devices,
+        "sketches": sketches,
+    }
+
+
+# -----------------------------------------------------
+# Merge
+# -----------------------------------------------------
+def _merge_indexes(indexes):
+    merged = LinkageIndex()
+    for index in indexes:
+        merged.merge(index)
+    return merged
+
+
+def merge_shards(results, n_accounts, n_devices):
+    profiles = {}
+    degree = np.zeros(n_accounts)
+    temporal = np.zeros(n_accounts, dtype=bool)
+    rows, cols, data = [], [], []
+    sketches = None
+
+    for result in results:
+        accounts = result["accounts"]
+        for name, values in result["profiles"].items():
+            if name not in profiles:
+                profiles[name] = np.zeros(n_accounts, dtype=values.dtype)
+            profiles[name][accounts] = values
+
+        degree[accounts] = result["degree"]
+        temporal[accounts] = result["temporal"]
+
+        if result["edges"] is not None:
+            r, c, d = result["edges"]
+            rows.append(r)
+            cols.append(c)
+            data.append(d)
+
+        if result["sketches"] is not None:
+            if sketches is None:
+                sketches = result["sketches"]
+            else:
+                sketches.merge(result["sketches"])
+
+    if sketches is not None:
+        graph = build_corridor_graph(sketches, n_accounts)
+    else:
+        graph = sp.csr_matrix(
+            (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(n_accounts, n_accounts)
+        )
+        graph.sum_duplicates()
+
+    behavior_model = fit_behavior_model(profiles)
+    behavior_risk = detect_anomalies(profiles, behavior_model)
+
+    # Global normalization: node count spans every shard
+    graph_risk = normalize_degree(degree) > GRAPH_CENTRALITY_THRESHOLD
+
+    linkage_indexes = {
+        "devices": _merge_indexes([r["device_pairs"] for r in results]),
+    }
+    device_linkage = detect_device_linkage(
+        linkage_indexes["devices"], n_accounts, n_devices
+    )
+
+    return {
+        "behavior_profiles": profiles,
+        "behavior_model": behavior_model,
+        "behavior_risk": behavior_risk,
+        "graph": graph,
+        "graph_risk": graph_risk,
+        "temporal_risk": temporal,
+        "linkage_indexes": linkage_indexes,
+        "device_linkage": device_linkage,
+        "sketches": sketches,
+    }
+
+
+# -----------------------------------------------------
+# Coordinator
+# -----------------------------------------------------
+def run_sharded_pipeline(transactions, symbols, shards=None, workers=None,
+                         sketch_mode=False):
+    """
+    Runs the per-account layers over hash partitions with a local
+    process pool and merges them. Returns the same layer outputs as
+    the single-process pipeline.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    shards = shards or shard_count(len(transactions["sender_id"]), workers)
+
+    n_accounts = len(symbols.accounts)
+    owner = account_shards(symbols, shards)
+    init_args = (transactions, owner, n_accounts, sketch_mode)
+
+    if workers == 1 or shards == 1:
+        _init_worker(*init_args)
+        results = [process_shard(shard) for shard in range(shards)]
+    else:
+        with worker_pool(min(workers, shards), _init_worker, init_args) as pool:
+            results = pool.map(process_shard, range(shards))
+
+    return merge_shards(results, n_accounts, len(symbols.devices))
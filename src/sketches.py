@@ -0,0 +1,263 @@
+"""
+Counterparty Sketches
+Bounded-memory alternatives to exact distinct-counterparty and per-pair
+counts for very long histories:
+
+- Sparse HyperLogLog registers per account (distinct receivers / senders)
+- Count-Min sketch for (sender, receiver) pair frequencies
+- Heavy-hitters list of the top corridors on top of the Count-Min sketch;
+  in sketch mode the graph layer runs on these corridors only
+
+All sketches are mergeable (shards with a shared symbol table) and
+serializable with NumPy's .npz format.
+"""
+
+import os
+
+import numpy as np
+
+SKETCH_MODE = os.environ.get("NEUROAML_SKETCH_MODE") == "1"
+
+HLL_PRECISION = 7          # 2^7 registers per account, ~9% standard error
+CM_WIDTH = 1 << 20
+CM_DEPTH = 4
+# Corridors kept as graph edges in sketch mode
+TOP_CORRIDORS = int(os.environ.get("NEUROAML_SKETCH_CORRIDORS", 100_000))
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def _hash64(values, seed=0):
+    # splitmix64 finalizer; uint64 arithmetic wraps around
+    x = np.asarray(values).astype(np.uint64) + np.uint64(
+        (0x9E3779B97F4A7C15 * (seed + 1)) & 0xFFFFFFFFFFFFFFFF
+    )
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _bit_length(x):
+    length = np.zeros(len(x), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = x >= (np.uint64(1) << np.uint64(shift))
+        length += big * shift
+        x = np.where(big, x >> np.uint64(shift), x)
+    return length + (x > 0)
+
+
+def pair_keys(senders, receivers):
+    return (
+        (np.asarray(senders, dtype=np.int64) << 32)
+        | np.asarray(receivers, dtype=np.int64)
+    )
+
+
+# -----------------------------------------------------
+# HyperLogLog (sparse registers)
+# -----------------------------------------------------
+class HyperLogLogArray:
+    """
+    One HyperLogLog per account. Only non-zero registers are stored, as
+    sorted (account << precision | bucket) keys with their ranks, so an
+    account costs memory for the registers it has touched, not 2^precision.
+    """
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.keys = np.empty(0, dtype=np.int64)
+        self.ranks = np.empty(0, dtype=np.uint8)
+
+    def __len__(self):
+        if len(self.keys) == 0:
+            return 0
+        return int(self.keys[-1] >> self.precision) + 1
+
+    def _fold(self, keys, ranks):
+        # Keep the highest rank per register
+        keys = np.concatenate([self.keys, keys])
+        ranks = np.concatenate([self.ranks, ranks])
+        order = np.lexsort((ranks, keys))
+        keys, ranks = keys[order], ranks[order]
+
+        last = np.ones(len(keys), dtype=bool)
+        last[:-1] = keys[1:] != keys[:-1]
+        self.keys, self.ranks = keys[last], ranks[last]
+
+    def update(self, accounts, items):
+        accounts = np.asarray(accounts, dtype=np.int64)
+        if len(accounts) == 0:
+            return
+
+        p = self.precision
+        h = _hash64(items)
+        bucket = (h >> np.uint64(64 - p)).astype(np.int64)
+        rest = h & ((np.uint64(1) << np.uint64(64 - p)) - np.uint64(1))
+        rank = ((64 - p) - _bit_length(rest) + 1).astype(np.uint8)
+
+        self._fold((accounts << p) | bucket, rank)
+
+    def estimate(self, n):
+        """
+        Distinct-count estimates for account codes 0..n-1.
+        """
+
+        m = 1 << self.precision
+        alpha = 0.7213 / (1 + 1.079 / m)
+
+        accounts = self.keys >> self.precision
+        inside = accounts < n
+        accounts = accounts[inside]
+        ranks = self.ranks[inside].astype(np.float64)
+
+        touched = np.bincount(accounts, minlength=n)
+        zeros = m - touched
+        # Untouched registers contribute 2^0 each
+        harmonic = zeros + np.bincount(accounts, weights=np.exp2(-ranks), minlength=n)
+        raw = alpha * m * m / harmonic
+
+        small = (raw <= 2.5 * m) & (zeros > 0)
+        raw[small] = m * np.log(m / zeros[small])
+        raw[zeros == m] = 0.0
+
+        return raw
+
+    def merge(self, other):
+        self._fold(other.keys, other.ranks)
+
+
+# -----------------------------------------------------
+# Count-Min Sketch
+# -----------------------------------------------------
+class CountMinSketch:
+
+    def __init__(self, width=CM_WIDTH, depth=CM_DEPTH):
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _columns(self, keys, row):
+        return (_hash64(keys, seed=row) % np.uint64(self.table.shape[1])).astype(np.int64)
+
+    def update(self, keys, counts=None):
+        keys = np.asarray(keys, dtype=np.int64)
+        if counts is None:
+            counts = np.ones(len(keys), dtype=np.int64)
+        for row in range(self.table.shape[0]):
+            self.table[row] += np.bincount(
+                self._columns(keys, row), weights=counts,
+                minlength=self.table.shape[1]
+            ).astype(np.int64)
+
+    def query(self, keys):
+        keys = np.asarray(keys, dtype=np.int64)
+        estimates = [
+            self.table[row][self._columns(keys, row)]
+            for row in range(self.table.shape[0])
+        ]
+        return np.min(estimates, axis=0)
+
+    def merge(self, other):
+        self.table += other.table
+
+
+# -----------------------------------------------------
+# Heavy Hitters (top corridors)
+# -----------------------------------------------------
+class HeavyHitters:
+    """
+    Keeps the k pair keys with the largest Count-Min estimates.
+    """
+
+    def __init__(self, k=TOP_CORRIDORS):
+        self.k = k
+        self.keys = np.empty(0, dtype=np.int64)
+
+    def update(self, candidate_keys, cms):
+        candidates = np.union1d(self.keys, candidate_keys)
+        estimates = cms.query(candidates)
+        if len(candidates) > self.k:
+            top = np.argpartition(-estimates, self.k - 1)[:self.k]
+            candidates = candidates[top]
+        self.keys = np.sort(candidates)
+
+    def top(self, cms):
+        estimates = cms.query(self.keys)
+        order = np.argsort(-estimates, kind="stable")
+        return self.keys[order], estimates[order]
+
+
+# -----------------------------------------------------
+# Bundle used by the behaviour and graph layers
+# -----------------------------------------------------
+class CounterpartySketches:
+
+    def __init__(self, precision=HLL_PRECISION, width=CM_WIDTH,
+                 depth=CM_DEPTH, top_k=TOP_CORRIDORS):
+        self.receivers = HyperLogLogArray(precision=precision)
+        self.senders = HyperLogLogArray(precision=precision)
+        self.pairs = CountMinSketch(width, depth)
+        self.corridors = HeavyHitters(top_k)
+
+    def update(self, transactions):
+        senders = transactions["sender_id"]
+        receivers = transactions["receiver_id"]
+
+        self.receivers.update(senders, receivers)
+        self.senders.update(receivers, senders)
+
+        keys = pair_keys(senders, receivers)
+        unique_keys, counts = np.unique(keys, return_counts=True)
+        self.pairs.update(unique_keys, counts)
+        self.corridors.update(unique_keys, self.pairs)
+
+    def merge(self, other):
+        self.receivers.merge(other.receivers)
+        self.senders.merge(other.senders)
+        self.pairs.merge(other.pairs)
+        self.corridors.update(other.corridors.keys, self.pairs)
+
+    def distinct_receivers(self, n):
+        return self.receivers.estimate(n)
+
+    def distinct_senders(self, n):
+        return self.senders.estimate(n)
+
+    def pair_frequency(self, senders, receivers):
+        return self.pairs.query(pair_keys(senders, receivers))
+
+    def top_corridors(self):
+        """
+        (sender_codes, receiver_codes, estimated_counts), heaviest first.
+        """
+
+        keys, estimates = self.corridors.top(self.pairs)
+        return keys >> 32, keys & 0xFFFFFFFF, estimates
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            precision=self.receivers.precision,
+            receiver_keys=self.receivers.keys,
+            receiver_ranks=self.receivers.ranks,
+            sender_keys=self.senders.keys,
+            sender_ranks=self.senders.ranks,
+            pairs=self.pairs.table,
+            corridors=self.corridors.keys,
+            top_k=self.corridors.k,
+        )
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        sketches = cls(
+            precision=int(data["precision"]),
+            width=data["pairs"].shape[1],
+            depth=data["pairs"].shape[0],
+            top_k=int(data["top_k"]),
+        )
+        sketches.receivers.keys = data["receiver_keys"]
+        sketches.receivers.ranks = data["receiver_ranks"]
+        sketches.senders.keys = data["sender_keys"]
+        sketches.senders.ranks = data["sender_ranks"]
+        sketches.pairs.table = data["pairs"]
+        sketches.corridors.keys = data["corridors"]
+        return sketches
@@ -0,0 +1,271 @@
+"""
+State Snapshots
+Persists the complete computed pipeline state after each run (symbol
+tables, transactions, behaviour features and model, graph arrays,
+scores) together with the store watermark it covers, and maps it back
+at startup so the API serves immediately.
+
+Arrays are plain .npy files loaded as copy-on-write memory maps, so a
+restart touches only the pages a request reads. Catching up afterwards
+means parsing just the rows appended after the watermark.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import joblib
+import numpy as np
+import scipy.sparse as sp
+
+from src.symbols import ENCODED_FIELDS, Symbols
+from src.device_linkage import LinkageIndex
+from src.sketches import CounterpartySketches
+
+SNAPSHOT_DIR = os.environ.get("NEUROAML_SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_FORMAT = 3
+KEEP_SNAPSHOTS = 2          # the current snapshot plus one fallback
+CURRENT = "CURRENT"         # pointer file naming the current snapshot
+MANIFEST = "manifest.json"
+FINGERPRINT_BYTES = 64 << 10  # store bytes just below the watermark that are hashed
+
+
+class SnapshotMismatch(Exception):
+    """Raised when a snapshot cannot be mapped onto this process."""
+
+
+# -----------------------------------------------------
+# Writing
+# -----------------------------------------------------
+def _write(value, name, folder):
+    # One manifest entry per state value; containers recurse
+    path = os.path.join(folder, name)
+
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        np.save(f"{path}.npy", value, allow_pickle=False)
+        return {"kind": "array"}
+
+    if sp.issparse(value):
+        csr = value.tocsr()
+        for part in ("indptr", "indices", "data"):
+            np.save(f"{path}.{part}.npy", getattr(csr, part), allow_pickle=False)
+        return {"kind": "csr", "shape": list(csr.shape)}
+
+    if isinstance(value, dict):
+        return {
+            "kind": "dict",
+            "items": {
+                key: _write(item, f"{name}.{key}", folder)
+                for key, item in value.items()
+            },
+        }
+
+    if isinstance(value, list) and all(isinstance(v, np.ndarray) for v in value):
+        # Ragged list (e.g. cycles): flat values plus offsets
+        lengths = np.array([len(v) for v in value], dtype=np.int64)
+        flat = np.concatenate(value) if value else np.empty(0, dtype=np.int64)
+        np.save(f"{path}.values.npy", flat, allow_pickle=False)
+        np.save(f"{path}.offsets.npy", np.concatenate([[0], np.cumsum(lengths)]))
+        return {"kind": "ragged"}
+
+    if isinstance(value, Symbols):
+        for field in sorted(set(ENCODED_FIELDS.values())):
+            values = getattr(value, field).values()
+            np.save(f"{path}.{field}.npy", np.array(values, dtype=str), allow_pickle=False)
+        return {"kind": "symbols"}
+
+    if isinstance(value, LinkageIndex):
+        value.save(f"{path}.npz")
+        return {"kind": "linkage_index"}
+
+    if isinstance(value, CounterpartySketches):
+        value.save(f"{path}.npz")
+        return {"kind": "sketches"}
+
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return {"kind": "value", "value": value}
+
+    # Fitted models and anything else
+    joblib.dump(value, f"{path}.joblib")
+    return {"kind": "object"}
+
+
+def store_fingerprint(source, watermark):
+    """
+    Identifies the store prefix a snapshot covers: the file's inode plus
+    a hash of the bytes just below the watermark. A store regenerated
+    at the same path no longer matches, even when it is larger.
+    """
+
+    start = max(int(watermark) - FINGERPRINT_BYTES, 0)
+    with open(source, "rb") as file:
+        file.seek(start)
+        prefix = file.read(int(watermark) - start)
+        inode = os.fstat(file.fileno()).st_ino
+
+    return {
+        "inode": inode,
+        "prefix_sha256": hashlib.sha256(prefix).hexdigest(),
+    }
+
+
+def save_snapshot(state, source, directory=None):
+    """
+    Writes the state as a new snapshot and makes it current. state
+    must carry the store "watermark" (byte offset) it was built up to.
+    Returns the snapshot directory.
+    """
+
+    directory = directory or SNAPSHOT_DIR
+    os.makedirs(directory, exist_ok=True)
+
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}-{state['watermark']}"
+    staging = os.path.join(directory, f".{name}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "created_at": time.time(),
+        "source": os.path.abspath(source),
+        "watermark": int(state["watermark"]),
+        "fingerprint": store_fingerprint(source, state["watermark"]),
+        "rows": int(len(state["transactions"]["amount"])),
+        "state": {key: _write(value, key, staging) for key, value in state.items()},
+    }
+    with open(os.path.join(staging, MANIFEST), "w") as file:
+        json.dump(manifest, file, indent=2)
+
+    final = os.path.join(directory, name)
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(staging, final)
+
+    pointer = os.path.join(directory, CURRENT)
+    with open(f"{pointer}.tmp", "w") as file:
+        file.write(name)
+    os.replace(f"{pointer}.tmp", pointer)
+
+    _prune(directory, name)
+    return final
+
+
+def _prune(directory, current):
+    snapshots = sorted(
+        entry for entry in os.listdir(directory)
+        if os.path.isfile(os.path.join(directory, entry, MANIFEST))
+    )
+    for entry in snapshots[:-KEEP_SNAPSHOTS]:
+        if entry != current:
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+
+
+# -----------------------------------------------------
+# Reading
+# -----------------------------------------------------
+def _map(path):
+    # Copy-on-write: callers may modify arrays without touching the file
+    array = np.load(path, mmap_mode="c", allow_pickle=False)
+    return array if array.size else np.array(array)
+
+
+def _restore_symbols(path, symbols):
+    """
+    Re-interns the snapshot's values so codes match. The live tables
+    must be empty or a prefix of the snapshot's.
+    """
+
+    tables = {
+        field: np.load(f"{path}.{field}.npy").tolist()
+        for field in sorted(set(ENCODED_FIELDS.values()))
+    }
+
+    for field, values in tables.items():
+        live = getattr(symbols, field).values()
+        if live != values[:len(live)]:
+            raise SnapshotMismatch(f"{field} symbol table differs from the snapshot")
+
+    for field, values in tables.items():
+        table = getattr(symbols, field)
+        known = len(table)
+        if len(values) > known:
+            table.encode(values[known:])
+
+    return symbols
+
+
+def _read(entry, name, folder, symbols):
+    path = os.path.join(folder, name)
+    kind = entry["kind"]
+
+    if kind == "array":
+        return _map(f"{path}.npy")
+    if kind == "csr":
+        return sp.csr_matrix(
+            tuple(_map(f"{path}.{part}.npy") for part in ("data", "indices", "indptr")),
+            shape=tuple(entry["shape"])
+        )
+    if kind == "dict":
+        return {
+            key: _read(item, f"{name}.{key}", folder, symbols)
+            for key, item in entry["items"].items()
+        }
+    if kind == "ragged":
+        values = _map(f"{path}.values.npy")
+        offsets = np.load(f"{path}.offsets.npy")
+        return [values[lo:hi] for lo, hi in zip(offsets[:-1], offsets[1:])]
+    if kind == "symbols":
+        return _restore_symbols(path, symbols)
+    if kind == "linkage_index":
+        return LinkageIndex.load(f"{path}.npz")
+    if kind == "sketches":
+        return CounterpartySketches.load(f"{path}.npz")
+    if kind == "value":
+        return entry["value"]
+    if kind == "object":
+        return joblib.load(f"{path}.joblib")
+
+    raise SnapshotMismatch(f"unknown snapshot entry kind {kind!r} for {name}")
+
+
+def load_snapshot(source, symbols, directory=None):
+    """
+    The current snapshot's state for this store, or None when there is
+    none, it was taken from another store (or an earlier file at the
+    same path), or its symbol codes cannot be reproduced in this process.
+    """
+
+    directory = directory or SNAPSHOT_DIR
+    try:
+        with open(os.path.join(directory, CURRENT)) as file:
+            folder = os.path.join(directory, file.read().strip())
+        with open(os.path.join(folder, MANIFEST)) as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        return None
+    if manifest["source"] != os.path.abspath(source):
+        return None
+    try:
+        if (os.path.getsize(source) < manifest["watermark"]
+                or store_fingerprint(source, manifest["watermark"]) != manifest.get("fingerprint")):
+            # The store was replaced or rewritten since the snapshot
+            return None
+    except OSError:
+        return None
+
+    try:
+        if "symbols" in manifest["state"]:
+            # Symbols first: every other entry is aligned to their codes
+            _read(manifest["state"]["symbols"], "symbols", folder, symbols)
+        return {
+            key: symbols if key == "symbols" else _read(entry, key, folder, symbols)
+            for key, entry in manifest["state"].items()
+        }
+    except (SnapshotMismatch, OSError, ValueError, KeyError):
+        return None
@@ -1,16 +1,208 @@
+"""
+Transaction Store
+Append-only CSV store for transactions. Bulk ingest goes through a
+single writer thread that group-commits queued batches: one write and
+one fsync per batch window, with offsets (0-based row numbers in the
+store) handed back to the callers.
+"""
+
 import csv
+import io
 import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from src.symbols import FIELDNAMES
 
 FILE_PATH = "data/transactions.csv"
 
-def save_transactions(transactions):
-    file_exists = os.path.isfile(FILE_PATH)
+COMMIT_MAX_ROWS = 50_000      # rows per group commit
+COMMIT_WAIT_MS = 5.0          # how long a commit waits for more batches
+MAX_PENDING_BATCHES = 1_000   # write queue bound; full queue = backpressure
+ENQUEUE_TIMEOUT_S = 0.5
+
+
+def encode_rows(transactions):
+    """
+    Serializes transaction dicts to CSV bytes in store column order.
+    """
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(
+        buffer, fieldnames=FIELDNAMES, extrasaction="ignore", lineterminator="\n"
+    )
+    writer.writerows(transactions)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _header():
+    return (",".join(FIELDNAMES) + "\n").encode("utf-8")
+
+
+def count_rows(path=None):
+    """
+    Number of data rows in the store (records after the header). Line
+    breaks inside quoted fields do not end a record.
+    """
+
+    path = path or FILE_PATH
+    if not os.path.isfile(path):
+        return 0
+
+    lines = 0
+    quoted = False
+    last = b"\n"
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            if not quoted and b'"' not in chunk:
+                lines += chunk.count(b"\n")
+            else:
+                # Quote parity at every byte; "" escapes toggle twice
+                data = np.frombuffer(chunk, dtype=np.uint8)
+                inside = (np.cumsum(data == ord('"')) + quoted) % 2 == 1
+                lines += int(np.count_nonzero((data == ord("\n")) & ~inside))
+                quoted = bool(inside[-1])
+            last = chunk[-1:]
+
+    if last != b"\n":
+        lines += 1        # unterminated final row
+    return max(lines - 1, 0)
+
+
+def _open_for_append(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    file = open(path, "ab")
+    if file.tell() == 0:
+        file.write(_header())
+    else:
+        # Never glue a new row onto an unterminated last line
+        with open(path, "rb") as existing:
+            existing.seek(-1, os.SEEK_END)
+            if existing.read(1) != b"\n":
+                file.write(b"\n")
+    return file
+
+
+def save_transactions(transactions, path=None):
+    """
+    Appends transactions synchronously with a single write and fsync.
+    """
+
+    if not transactions:
+        return
+
+    with _open_for_append(path or FILE_PATH) as file:
+        file.write(encode_rows(transactions))
+        file.flush()
+        os.fsync(file.fileno())
+
+
+# -----------------------------------------------------
+# Group-Commit Writer
+# -----------------------------------------------------
+class StoreFull(Exception):
+    """Raised when the write queue cannot take another batch."""
+
+
+class TransactionWriter:
+    """
+    Single writer thread in front of the store. submit() enqueues an
+    encoded batch and returns a Future resolving to (first, last)
+    offsets once the batch is durable.
+    """
+
+    def __init__(self, path=None, max_rows=COMMIT_MAX_ROWS,
+                 max_wait_ms=COMMIT_WAIT_MS, max_pending=MAX_PENDING_BATCHES):
+        self.path = path or FILE_PATH
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.next_offset = count_rows(self.path)
+        self.commits = 0
+        self.rows_written = 0
+        self._file = _open_for_append(self.path)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, payload, rows, timeout=ENQUEUE_TIMEOUT_S):
+        future = Future()
+        try:
+            self.queue.put((payload, rows, future), timeout=timeout)
+        except queue.Full:
+            raise StoreFull(f"write queue full ({self.queue.maxsize} batches pending)")
+        return future
+
+    def stats(self):
+        return {
+            "pending_batches": self.queue.qsize(),
+            "commits": self.commits,
+            "rows_written": self.rows_written,
+            "next_offset": self.next_offset,
+        }
+
+    def _collect(self):
+        pending = [self.queue.get()]
+        rows = pending[0][1]
+        deadline = time.perf_counter() + self.max_wait
+
+        while rows < self.max_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            rows += item[1]
+
+        return pending, rows
+
+    def _rollback(self, size):
+        # Cut off whatever part of a failed commit reached the file, so
+        # the store and next_offset agree; recount if that fails too
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        self._file = None
+        if size is not None:
+            try:
+                os.truncate(self.path, size)
+            except OSError:
+                self.next_offset = count_rows(self.path)
+
+    def _run(self):
+        while True:
+            pending, rows = self._collect()
 
-    with open(FILE_PATH, mode="a", newline="") as file:
-        writer = csv.DictWriter(file, fieldnames=transactions[0].keys())
+            size = None
+            try:
+                if self._file is None:
+                    self._file = _open_for_append(self.path)
+                size = self._file.tell()
+                self._file.write(b"".join(payload for payload, _, _ in pending))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as error:
+                if self._file is not None:
+                    self._rollback(size)
+                for _, _, future in pending:
+                    future.set_exception(error)
+                continue
 
-        if not file_exists:
-            writer.writeheader()
+            offset = self.next_offset
+            for _, batch_rows, future in pending:
+                future.set_result((offset, offset + batch_rows - 1))
+                offset += batch_rows
 
-        for tx in transactions:
-            writer.writerow(tx)
+            self.next_offset = offset
+            self.commits += 1
+            self.rows_written += rows
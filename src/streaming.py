@@ -0,0 +1,557 @@
+"""
+Streaming Ingest
+Source connectors that decode newline-delimited transactions in batches
+into a bounded queue, and an incremental scorer that consumes it:
+
+- FileTailConnector: follows a growing CSV / JSONL file from a saved
+  byte offset (restart-safe through the checkpoint file)
+- StdinConnector: reads records piped into the process
+- UnixSocketConnector: accepts newline-delimited records from local
+  clients (e.g. a message relay) on a Unix domain socket
+
+Offsets are checkpointed only after a batch has been scored, so a
+restart replays at most the batches that were in flight.
+"""
+
+import abc
+import argparse
+import csv
+import io
+import json
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+from src.symbols import FIELDNAMES
+from src.realtime_scoring import normalize_transaction
+
+BATCH_SIZE = 1_000            # records per decoded batch
+BATCH_WAIT_S = 0.05           # flush a partial batch after this long
+POLL_INTERVAL_S = 0.2         # file tail poll when at end of file
+READ_CHUNK_BYTES = BATCH_SIZE * 256   # file tail read size
+MAX_LINE_BYTES = 1 << 20      # longer lines are rejected and skipped
+MAX_QUEUED_BATCHES = 64       # bounded queue; full queue blocks connectors
+RATE_WINDOW_S = 10.0
+CHECKPOINT_PATH = "data/stream_checkpoints.json"
+
+
+# -----------------------------------------------------
+# Decoding
+# -----------------------------------------------------
+def _source_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return "csv" if str(path).endswith(".csv") else "jsonl"
+
+
+def decode_lines(lines, fmt="jsonl", fieldnames=None):
+    """
+    Decodes raw lines into validated transaction dicts.
+    Returns (records, rejected_count).
+    """
+
+    if fmt == "csv":
+        rows = csv.DictReader(
+            io.StringIO("".join(lines)), fieldnames=fieldnames or FIELDNAMES
+        )
+    else:
+        rows = (_parse_json(line) for line in lines if line.strip())
+
+    records = []
+    rejected = 0
+    for row in _tolerant(rows):
+        if row is None:
+            rejected += 1
+            continue
+        try:
+            records.append(normalize_transaction(row))
+        except (ValueError, AttributeError):
+            rejected += 1
+
+    return records, rejected
+
+
+def _parse_json(line):
+    # Parsed per line: a bad line is rejected on its own, never the rest of the batch
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def _tolerant(rows):
+    # A malformed line (bad JSON) should not take the connector down
+    iterator = iter(rows)
+    while True:
+        try:
+            yield next(iterator)
+        except StopIteration:
+            return
+        except ValueError:
+            yield None
+
+
+# -----------------------------------------------------
+# Gauges
+# -----------------------------------------------------
+class ConnectorGauges:
+    """
+    Per-connector throughput and lag counters.
+    """
+
+    def __init__(self):
+        self.records = 0
+        self.rejected = 0
+        self.batches = 0
+        self.blocked_seconds = 0.0
+        self.lag_bytes = None
+        self.last_event_time = None
+        self._rates = deque()
+        self._lock = threading.Lock()
+
+    def record_batch(self, records, rejected, blocked_seconds):
+        now = time.monotonic()
+        with self._lock:
+            self.records += len(records)
+            self.rejected += rejected
+            self.batches += 1
+            self.blocked_seconds += blocked_seconds
+            if records:
+                self.last_event_time = records[-1]["timestamp"]
+            self._rates.append((now, len(records)))
+            while self._rates and self._rates[0][0] < now - RATE_WINDOW_S:
+                self._rates.popleft()
+
+    def record_rejected(self, count):
+        # Lines dropped before decoding (e.g. longer than MAX_LINE_BYTES)
+        with self._lock:
+            self.rejected += count
+
+    def snapshot(self):
+        with self._lock:
+            window = sum(count for _, count in self._rates)
+            return {
+                "records": self.records,
+                "rejected": self.rejected,
+                "batches": self.batches,
+                "records_per_second": round(window / RATE_WINDOW_S, 1),
+                "blocked_seconds": round(self.blocked_seconds, 3),
+                "lag_bytes": self.lag_bytes,
+                "last_event_time": self.last_event_time,
+            }
+
+
+# -----------------------------------------------------
+# Checkpoints
+# -----------------------------------------------------
+class CheckpointStore:
+    """
+    Connector name -> committed offset, persisted as JSON with an
+    atomic replace.
+    """
+
+    def __init__(self, path=CHECKPOINT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.offsets = {}
+        if path and os.path.isfile(path):
+            with open(path) as file:
+                self.offsets = json.load(file)
+
+    def get(self, name, default=0):
+        return self.offsets.get(name, default)
+
+    def commit(self, name, offset):
+        with self._lock:
+            self.offsets[name] = offset
+            if not self.path:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as file:
+                json.dump(self.offsets, file)
+            os.replace(tmp, self.path)
+
+
+# -----------------------------------------------------
+# Connectors
+# -----------------------------------------------------
+class Connector(abc.ABC):
+    """
+    Base connector: read_lines() yields (lines, end_offset) chunks;
+    run() decodes them into batches on the shared queue.
+    """
+
+    fmt = "jsonl"
+    fieldnames = None
+
+    def __init__(self, name):
+        self.name = name
+        self.gauges = ConnectorGauges()
+        self.stopped = threading.Event()
+
+    @abc.abstractmethod
+    def read_lines(self):
+        ...
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self, out_queue):
+        for lines, end_offset in self.read_lines():
+            records, rejected = decode_lines(lines, self.fmt, self.fieldnames)
+
+            started = time.monotonic()
+            while not self.stopped.is_set():
+                try:
+                    # Blocks while the queue is full: backpressure to the source
+                    out_queue.put((self, records, end_offset), timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            self.gauges.record_batch(records, rejected, time.monotonic() - started)
+
+            if self.stopped.is_set():
+                return
+
+
+class LineConnector(Connector):
+    """
+    Connector fed by reader threads that push raw lines onto a bounded
+    line buffer; batches are flushed when full or after BATCH_WAIT_S.
+    """
+
+    _EOF = object()
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._lines = queue.Queue(maxsize=BATCH_SIZE * MAX_QUEUED_BATCHES)
+        self.lines_read = 0
+
+    def _pump(self, stream, eof=True):
+        for line in stream:
+            # Blocks when the connector falls behind the producer
+            self._lines.put(line)
+            if self.stopped.is_set():
+                return
+        if eof:
+            self._lines.put(self._EOF)
+
+    def read_lines(self):
+        lines = []
+        deadline = time.monotonic() + BATCH_WAIT_S
+        while not self.stopped.is_set():
+            try:
+                line = self._lines.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                line = None
+            if line is self._EOF:
+                break
+            if line is not None:
+                lines.append(line)
+            if lines and (len(lines) >= BATCH_SIZE or time.monotonic() >= deadline):
+                self.lines_read += len(lines)
+                yield lines, self.lines_read
+                lines = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + BATCH_WAIT_S
+        if lines:
+            self.lines_read += len(lines)
+            yield lines, self.lines_read
+
+
+class FileTailConnector(Connector):
+    """
+    Follows a growing file from a byte offset. Only complete lines are
+    consumed; a truncated (rotated) file is read again from the start.
+    """
+
+    def __init__(self, path, offset=0, fmt=None, follow=True, name=None):
+        super().__init__(name or f"file:{path}")
+        self.path = path
+        self.offset = offset
+        self.fmt = _source_format(path, fmt)
+        self.follow = follow
+
+    def _read_header(self, file):
+        file.seek(0)
+        header = file.readline()
+        self.fieldnames = header.decode("utf-8").strip().split(",")
+        return file.tell()
+
+    def _decode(self, raw_lines):
+        # Undecodable lines are rejected one by one, like bad JSON
+        lines = []
+        for raw in raw_lines:
+            try:
+                lines.append(raw.rstrip(b"\n").decode("utf-8") + "\n")
+            except UnicodeDecodeError:
+                self.gauges.record_rejected(1)
+        return lines
+
+    def _long_line(self, file, chunk):
+        # chunk filled a whole read without a newline: read on until the
+        # line ends. Returns (line bytes or None when over MAX_LINE_BYTES,
+        # end offset), or (None, None) when the line is still incomplete
+        parts, size = [chunk], len(chunk)
+        while True:
+            more = file.read(READ_CHUNK_BYTES)
+            if not more:
+                file.seek(self.offset)
+                return None, None
+            newline = more.find(b"\n")
+            if newline >= 0:
+                end = self.offset + size + newline + 1
+                file.seek(end)
+                if size + newline + 1 > MAX_LINE_BYTES:
+                    return None, end
+                return b"".join(parts) + more[:newline + 1], end
+            size += len(more)
+            if size <= MAX_LINE_BYTES:
+                parts.append(more)
+            else:
+                parts = []
+
+    def read_lines(self):
+        while not os.path.isfile(self.path):
+            if self.stopped.wait(POLL_INTERVAL_S):
+                return
+
+        with open(self.path, "rb") as file:
+            if self.fmt == "csv":
+                header_end = self._read_header(file)
+                self.offset = max(self.offset, header_end)
+            file.seek(self.offset)
+
+            while not self.stopped.is_set():
+                size = os.fstat(file.fileno()).st_size
+                if size < self.offset:
+                    # Truncated or replaced in place: start over
+                    self.offset = self._read_header(file) if self.fmt == "csv" else 0
+                    file.seek(self.offset)
+
+                chunk = file.read(READ_CHUNK_BYTES)
+                # Keep partial trailing lines for the next read
+                complete = chunk.rfind(b"\n") + 1
+                if complete == 0 and len(chunk) == READ_CHUNK_BYTES:
+                    line, end = self._long_line(file, chunk)
+                    if end is not None:
+                        if line is None:
+                            self.gauges.record_rejected(1)
+                        self.offset = end
+                        self.gauges.lag_bytes = size - self.offset
+                        yield (self._decode([line]) if line else []), self.offset
+                        continue
+                if complete == 0:
+                    self.gauges.lag_bytes = size - self.offset
+                    if not self.follow:
+                        return
+                    self.stopped.wait(POLL_INTERVAL_S)
+                    file.seek(self.offset)
+                    continue
+
+                file.seek(self.offset + complete)
+                self.offset += complete
+                self.gauges.lag_bytes = size - self.offset
+                # Split on \n only: U+2028 or a stray \r can sit inside a record
+                lines = self._decode(chunk[:complete].split(b"\n")[:-1])
+                yield lines, self.offset
+
+
+class StdinConnector(LineConnector):
+    """
+    Reads records piped into the process; the offset is a line count.
+    """
+
+    def __init__(self, fmt="jsonl", stream=None, name="stdin"):
+        super().__init__(name)
+        self.fmt = fmt
+        self.stream = stream or sys.stdin
+
+    def read_lines(self):
+        if self.fmt == "csv":
+            self.fieldnames = self.stream.readline().strip().split(",")
+        threading.Thread(target=self._pump, args=(self.stream,), daemon=True).start()
+        yield from super().read_lines()
+
+
+class UnixSocketConnector(LineConnector):
+    """
+    Listens on a Unix domain socket; every client streams
+    newline-delimited records (JSONL by default).
+    """
+
+    def __init__(self, path, fmt="jsonl", name=None):
+        super().__init__(name or f"unix:{path}")
+        self.path = path
+        self.fmt = fmt
+
+    def _serve(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.path)
+        server.listen()
+        server.settimeout(POLL_INTERVAL_S)
+
+        with server:
+            while not self.stopped.is_set():
+                try:
+                    client, _ = server.accept()
+                except socket.timeout:
+                    continue
+                threading.Thread(
+                    target=self._read_client, args=(client,), daemon=True
+                ).start()
+        os.unlink(self.path)
+
+    def _read_client(self, client):
+        with client, client.makefile("r", encoding="utf-8") as stream:
+            # A disconnecting client is not the end of the stream
+            self._pump(stream, eof=False)
+
+    def read_lines(self):
+        threading.Thread(target=self._serve, daemon=True).start()
+        yield from super().read_lines()
+
+
+# -----------------------------------------------------
+# Incremental Scorer
+# -----------------------------------------------------
+class StreamProcessor:
+    """
+    Runs the connectors and feeds their batches to a scorer (anything
+    with score(records), e.g. realtime_scoring.ScoringState).
+    """
+
+    def __init__(self, connectors, scorer, checkpoints=None,
+                 on_results=None, max_queued=MAX_QUEUED_BATCHES):
+        self.connectors = connectors
+        self.scorer = scorer
+        self.checkpoints = checkpoints or CheckpointStore(None)
+        self.on_results = on_results
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.scored = 0
+        self._threads = []
+
+    def start(self):
+        for connector in self.connectors:
+            thread = threading.Thread(target=connector.run, args=(self.queue,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for connector in self.connectors:
+            connector.stop()
+
+    def alive(self):
+        return any(t.is_alive() for t in self._threads) or not self.queue.empty()
+
+    def process_next(self, timeout=POLL_INTERVAL_S):
+        try:
+            connector, records, end_offset = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return False
+
+        if records:
+            results = self.scorer.score(records)
+            self.scored += len(results)
+            if self.on_results:
+                self.on_results(results)
+
+        # Commit only after the batch has been scored
+        self.checkpoints.commit(connector.name, end_offset)
+        return True
+
+    def run(self):
+        self.start()
+        while self.alive():
+            self.process_next()
+
+    def metrics(self):
+        return {
+            "queued_batches": self.queue.qsize(),
+            "scored": self.scored,
+            "connectors": {c.name: c.gauges.snapshot() for c in self.connectors},
+        }
+
+
+def build_connectors(sources, checkpoints, fmt=None, follow=True):
+    """
+    Parses source specs: 'stdin', 'unix:/path/to.sock' or a file path.
+    """
+
+    connectors = []
+    for source in sources:
+        if source == "stdin":
+            connector = StdinConnector(fmt or "jsonl")
+        elif source.startswith("unix:"):
+            connector = UnixSocketConnector(source[len("unix:"):], fmt or "jsonl")
+        else:
+            path = source[len("file:"):] if source.startswith("file:") else source
+            connector = FileTailConnector(path, fmt=fmt, follow=follow)
+            connector.offset = checkpoints.get(connector.name)
+        connectors.append(connector)
+    return connectors
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream transactions into the NeuroAML incremental scorer"
+    )
+    parser.add_argument("sources", nargs="+",
+                        help="'stdin', 'unix:/path.sock' or a CSV/JSONL file to tail")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--checkpoints", default=CHECKPOINT_PATH)
+    parser.add_argument("--no-follow", action="store_true",
+                        help="stop file sources at end of file")
+    parser.add_argument("--min-level", default="HIGH",
+                        choices=["LOW", "MEDIUM", "HIGH"],
+                        help="print scored transactions at or above this level")
+    parser.add_argument("--metrics-every", type=float, default=10.0)
+    args = parser.parse_args()
+
+    # Batch state is the warm start for the incremental scorer
+    from api import get_pipeline_state
+    from src.realtime_scoring import ScoringState
+
+    levels = ["LOW", "MEDIUM", "HIGH"]
+    minimum = levels.index(args.min_level)
+
+    def emit(results):
+        for result in results:
+            if levels.index(result["risk_level"]) >= minimum:
+                print(json.dumps(result), flush=True)
+
+    checkpoints = CheckpointStore(args.checkpoints)
+    state = get_pipeline_state()
+    scorer = ScoringState(state, state["behavior_model"])
+    processor = StreamProcessor(
+        build_connectors(args.sources, checkpoints, args.format, not args.no_follow),
+        scorer,
+        checkpoints,
+        on_results=emit,
+    )
+
+    processor.start()
+    next_report = time.monotonic() + args.metrics_every
+    try:
+        while processor.alive():
+            processor.process_next()
+            if time.monotonic() >= next_report:
+                print(json.dumps(processor.metrics()), file=sys.stderr, flush=True)
+                next_report = time.monotonic() + args.metrics_every
+    except KeyboardInterrupt:
+        processor.stop()
+
+    print(json.dumps(processor.metrics()), file=sys.stderr, flush=True)
+
+
+if __name__ == "__main__":
+    main()
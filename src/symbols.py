@@ -0,0 +1,238 @@
+"""
+Shared Symbol Table
+Interns account, device, location and merchant values to int32 codes
+once at ingest. Every pipeline stage works on the codes; strings only
+come back at the API boundary via decode().
+"""
+
+import threading
+
+import numpy as np
+
+# pandas is imported where it is used: it dominates the import time of
+# the API, which only needs it once transactions are encoded
+
+FIELDNAMES = [
+    "transaction_id", "sender_id", "receiver_id", "amount", "timestamp",
+    "location", "merchant_category", "device_id"
+]
+
+# Transaction field -> symbol table it is encoded with
+ENCODED_FIELDS = {
+    "sender_id": "accounts",
+    "receiver_id": "accounts",
+    "device_id": "devices",
+    "location": "locations",
+    "merchant_category": "merchants",
+}
+
+
+class SymbolTable:
+    """
+    Bidirectional value <-> int32 code mapping. Codes are dense and
+    assigned in first-seen order, so they index aligned NumPy arrays.
+    """
+
+    def __init__(self, values=()):
+        self._codes = {}
+        self._values = []
+        self._decode_cache = None
+        self._lock = threading.Lock()
+        if len(values):
+            self.encode(values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, value):
+        return value in self._codes
+
+    def encode(self, values):
+        import pandas as pd
+
+        if not isinstance(values, pd.Series):
+            values = np.asarray(values, dtype=object)
+        inverse, uniques = pd.factorize(values, use_na_sentinel=False)
+
+        # Python work is O(unique values), the gather is vectorized
+        unique_codes = np.empty(len(uniques), dtype=np.int32)
+        with self._lock:
+            for i, value in enumerate(uniques):
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self._values)
+                    self._codes[value] = code
+                    self._values.append(value)
+                    self._decode_cache = None
+                unique_codes[i] = code
+
+        return unique_codes[inverse]
+
+    def code(self, value, default=-1):
+        return self._codes.get(value, default)
+
+    def value(self, code):
+        return self._values[code]
+
+    def values(self):
+        return list(self._values)
+
+    def decode(self, codes):
+        cache = self._decode_cache
+        if cache is None or len(cache) != len(self._values):
+            with self._lock:
+                cache = np.array(self._values, dtype=object)
+                self._decode_cache = cache
+        return cache[np.asarray(codes, dtype=np.int64)]
+
+
+class Symbols:
+    """
+    One symbol table per encoded dimension.
+    """
+
+    def __init__(self):
+        self.accounts = SymbolTable()
+        self.devices = SymbolTable()
+        self.locations = SymbolTable()
+        self.merchants = SymbolTable()
+
+    def table(self, field):
+        return getattr(self, ENCODED_FIELDS[field])
+
+
+# Process-wide table: codes stay stable for the lifetime of the service
+SYMBOLS = Symbols()
+
+
+# -----------------------------------------------------
+# Encoded Transaction Batches
+# -----------------------------------------------------
+def _timestamps_us(values):
+    import pandas as pd
+
+    if not isinstance(values, pd.Series):
+        # NumPy parses naive ISO-8601 directly, far cheaper for small batches
+        try:
+            return np.array(values, dtype="datetime64[us]").astype(np.int64)
+        except ValueError:
+            values = pd.Series(values)
+    parsed = pd.to_datetime(values, format="ISO8601")
+    return parsed.to_numpy(dtype="datetime64[us]").astype(np.int64)
+
+
+def encode_transactions(records, symbols=None):
+    """
+    Encodes transactions (list of dicts or DataFrame) into a columnar
+    batch: dict of equal-length NumPy arrays keyed by field name.
+
+    sender_id / receiver_id / device_id / location / merchant_category
+    become int32 codes, amount float64 and timestamp int64 microseconds
+    since the epoch.
+    """
+
+    import pandas as pd
+
+    symbols = symbols or SYMBOLS
+
+    if not isinstance(records, pd.DataFrame):
+        # Plain column lists; avoids DataFrame construction per request
+        records = list(records)
+        records = {f: [r[f] for r in records] for f in FIELDNAMES}
+
+    if len(records["amount"]) == 0:
+        return empty_batch()
+
+    batch = {
+        "transaction_id": np.char.encode(np.asarray(records["transaction_id"], dtype=str)),
+        "amount": np.asarray(records["amount"], dtype=np.float64),
+        "timestamp": _timestamps_us(records["timestamp"]),
+    }
+
+    for field in ENCODED_FIELDS:
+        batch[field] = symbols.table(field).encode(records[field])
+
+    return batch
+
+
+def empty_batch():
+    batch = {
+        "transaction_id": np.empty(0, dtype="S1"),
+        "amount": np.empty(0, dtype=np.float64),
+        "timestamp": np.empty(0, dtype=np.int64),
+    }
+    for field in ENCODED_FIELDS:
+        batch[field] = np.empty(0, dtype=np.int32)
+    return batch
+
+
+def batch_size(batch):
+    return len(batch["amount"])
+
+
+def concat_batches(*batches):
+    return {
+        field: np.concatenate([b[field] for b in batches])
+        for field in batches[0]
+    }
+
+
+def take(batch, index):
+    return {field: values[index] for field, values in batch.items()}
+
+
+def grow(values, n, fill):
+    """
+    Pads an account-aligned array to length n (new accounts appeared).
+    """
+
+    if len(values) >= n:
+        return values
+    grown = np.full((n,) + values.shape[1:], fill, dtype=values.dtype)
+    grown[:len(values)] = values
+    return grown
+
+
+def account_count(batch):
+    """
+    Minimum length of account-aligned arrays for this batch.
+    """
+
+    if batch_size(batch) == 0:
+        return 0
+
+    return int(max(batch["sender_id"].max(), batch["receiver_id"].max())) + 1
+
+
+def active_accounts(batch, n_accounts=None):
+    """
+    Boolean mask of accounts that appear as sender or receiver.
+    """
+
+    n = n_accounts if n_accounts is not None else account_count(batch)
+    seen = np.zeros(n, dtype=bool)
+    seen[batch["sender_id"]] = True
+    seen[batch["receiver_id"]] = True
+    return seen
+
+
+def decode_transactions(batch, symbols=None):
+    """
+    Back to a list of string-keyed dicts (API boundary / persistence).
+    """
+
+    import pandas as pd
+
+    symbols = symbols or SYMBOLS
+
+    columns = {
+        "transaction_id": np.char.decode(batch["transaction_id"]),
+        "amount": batch["amount"],
+        "timestamp": np.datetime_as_string(
+            batch["timestamp"].astype("datetime64[us]")
+        ),
+    }
+    for field in ENCODED_FIELDS:
+        columns[field] = symbols.table(field).decode(batch[field])
+
+    return pd.DataFrame(columns, columns=FIELDNAMES).to_dict("records")
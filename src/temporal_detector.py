@@ -1,35 +1,39 @@
-from collections import defaultdict
-from datetime import datetime
+import numpy as np
 
-def detect_temporal_anomalies(transactions):
-    user_transactions = defaultdict(list)
+from src.symbols import account_count
 
-    # Group transactions by sender
-    for tx in transactions:
-        user = tx["sender_id"]
-        amount = float(tx["amount"])
-        timestamp = datetime.fromisoformat(tx["timestamp"])
+TEMPORAL_RATIO = 2.0        # later-half average over earlier-half average
+MIN_TRANSACTIONS = 3        # sent transactions needed to compare halves
 
-        user_transactions[user].append((timestamp, amount))
+def spending_halves(transactions, n_accounts=None):
+    # Average amount of each sender's earlier and later transactions;
+    # zero for senders with fewer than MIN_TRANSACTIONS
+    n = n_accounts if n_accounts is not None else account_count(transactions)
+    senders = transactions["sender_id"]
 
-    temporal_risk = {}
+    # Group transactions by sender, sorted by time within each sender
+    order = np.lexsort((transactions["timestamp"], senders))
+    amounts = transactions["amount"][order]
 
-    for user, txs in user_transactions.items():
-        # Sort by time
-        txs.sort(key=lambda x: x[0])
+    counts = np.bincount(senders, minlength=n)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    half = counts // 2
 
-        amounts = [amt for _, amt in txs]
+    cumulative = np.concatenate([[0.0], np.cumsum(amounts)])
+    early_sum = cumulative[starts + half] - cumulative[starts]
+    late_sum = cumulative[starts + counts] - cumulative[starts + half]
 
-        if len(amounts) < 3:
-            temporal_risk[user] = "LOW"
-            continue
+    avg_early = np.zeros(n)
+    avg_late = np.zeros(n)
+    eligible = counts >= MIN_TRANSACTIONS
 
-        avg_early = sum(amounts[:len(amounts)//2]) / (len(amounts)//2)
-        avg_late = sum(amounts[len(amounts)//2:]) / (len(amounts)//2)
+    avg_early[eligible] = early_sum[eligible] / half[eligible]
+    avg_late[eligible] = late_sum[eligible] / half[eligible]
 
-        if avg_late > avg_early * 2:
-            temporal_risk[user] = "HIGH"
-        else:
-            temporal_risk[user] = "LOW"
+    return avg_early, avg_late
 
-    return temporal_risk
+def detect_temporal_anomalies(transactions, n_accounts=None, ratio=TEMPORAL_RATIO):
+    avg_early, avg_late = spending_halves(transactions, n_accounts)
+
+    # True = HIGH, aligned with account codes
+    return avg_late > avg_early * ratio
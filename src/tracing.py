@@ -0,0 +1,262 @@
+"""
+Tracing
+Lightweight local spans for request and pipeline latency breakdowns.
+
+    with span("pipeline.load", rows=n) as s:
+        ...
+        s.set(bytes=size)
+
+Spans nest through a context variable, so a span opened while another
+is active (in the same thread, or a request's endpoint thread) becomes
+its child. A finished root span closes its trace: the trace goes to an
+in-memory ring buffer (GET /debug/traces) and a size-rotated JSON-lines
+file. With tracing off, span() returns a shared no-op and costs one
+attribute check. Standard library only, so importing it is free.
+"""
+
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+TRACING = os.environ.get("NEUROAML_TRACING", "1") != "0"
+TRACE_BUFFER = int(os.environ.get("NEUROAML_TRACE_BUFFER", "256"))       # traces kept in memory
+TRACE_FILE = os.environ.get("NEUROAML_TRACE_FILE", "traces/traces.jsonl")  # "" disables the file
+TRACE_FILE_BYTES = int(os.environ.get("NEUROAML_TRACE_FILE_BYTES", str(16 << 20)))
+TRACE_FILE_BACKUPS = 3
+MAX_SPANS_PER_TRACE = 1000  # further spans are counted, not kept
+
+_current = contextvars.ContextVar("neuroaml_span", default=None)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attributes):
+        return self
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _Trace:
+    __slots__ = ("trace_id", "spans", "dropped", "ids")
+
+    def __init__(self):
+        self.trace_id = os.urandom(8).hex()
+        self.spans = []
+        self.dropped = 0
+        self.ids = itertools.count(1)   # next() is atomic under the GIL
+
+
+class Span:
+    __slots__ = (
+        "name", "attributes", "trace", "span_id", "parent_id",
+        "started_at", "_start", "duration_ms", "error", "_token",
+    )
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    def __enter__(self):
+        parent = _current.get()
+        self.trace = parent.trace if parent is not None else _Trace()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.span_id = next(self.trace.ids)
+        self.started_at = time.time()
+        self._token = _current.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current.reset(self._token)
+
+        trace = self.trace
+        if len(trace.spans) < MAX_SPANS_PER_TRACE:
+            trace.spans.append(self)
+        else:
+            trace.dropped += 1
+
+        if self.parent_id is None:
+            tracer.finish(self)
+        return False
+
+    def record(self, root):
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "offset_ms": round((self.started_at - root.started_at) * 1000, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            **({"error": self.error} if self.error else {}),
+        }
+
+
+class Tracer:
+    """
+    Collects finished traces into the ring buffer and the trace file.
+    """
+
+    def __init__(self, enabled=TRACING, buffer=TRACE_BUFFER, path=TRACE_FILE):
+        self.enabled = enabled
+        self.path = path
+        self.traces = deque(maxlen=buffer)
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_bytes = 0
+        self.write_errors = 0
+        self.file_error = None
+
+    def finish(self, root):
+        spans = sorted(root.trace.spans, key=lambda s: s.span_id)
+        trace = {
+            "trace_id": root.trace.trace_id,
+            "name": root.name,
+            "started_at": root.started_at,
+            "duration_ms": round(root.duration_ms, 3),
+            "attributes": root.attributes,
+            "spans": [s.record(root) for s in spans],
+            "dropped_spans": root.trace.dropped,
+        }
+        if root.error:
+            trace["error"] = root.error
+
+        with self._lock:
+            self.traces.append(trace)
+            if self.path:
+                try:
+                    self._write(trace)
+                except OSError as error:
+                    # A failing sink (full disk, bad path) must not fail
+                    # the traced request; keep the ring buffer only
+                    self.write_errors += 1
+                    self.file_error = f"{self.path}: {error}"
+                    self.path = None
+                    self._close()
+
+    def _close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def _write(self, trace):
+        line = json.dumps(trace, default=str) + "\n"
+
+        if self._file is not None and self._file_bytes + len(line) > TRACE_FILE_BYTES:
+            self._close()
+            for i in range(TRACE_FILE_BACKUPS - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{i}"):
+                    os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+
+        if self._file is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._file_bytes = self._file.tell()
+
+        self._file.write(line)
+        self._file.flush()
+        self._file_bytes += len(line)
+
+    def slowest(self, limit=20, name=None, min_ms=0.0):
+        with self._lock:
+            traces = list(self.traces)
+        traces = [
+            t for t in traces
+            if t["duration_ms"] >= min_ms and (name is None or t["name"].startswith(name))
+        ]
+        traces.sort(key=lambda t: t["duration_ms"], reverse=True)
+        return traces[:limit]
+
+
+tracer = Tracer()
+
+
+def span(name, **attributes):
+    if not tracer.enabled:
+        return NOOP_SPAN
+    return Span(name, attributes)
+
+
+def traced(name):
+    """
+    Decorator: runs the function inside span(name). Attributes can be
+    added from inside with current_span().set(...).
+    """
+
+    def wrap(function):
+        @functools.wraps(function)
+        def call(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            with Span(name, {}):
+                return function(*args, **kwargs)
+        return call
+
+    return wrap
+
+
+def current_span():
+    # The active span, or the no-op span (safe to call .set() on)
+    return (_current.get() if tracer.enabled else None) or NOOP_SPAN
+
+
+def set_tracing(enabled):
+    tracer.enabled = bool(enabled)
+
+
+# -----------------------------------------------------
+# ASGI Middleware
+# -----------------------------------------------------
+class TracingMiddleware:
+    """
+    One root span per HTTP request, named by the matched route
+    template (e.g. "GET /aml/explain/{user_id}").
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            return await self.app(scope, receive, send)
+
+        status = {}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        with span(f"{scope['method']} {scope['path']}", path=scope["path"]) as request:
+            await self.app(scope, receive, send_with_status)
+
+            route = scope.get("route")
+            if route is not None and hasattr(route, "path"):
+                request.name = f"{scope['method']} {route.path}"
+            request.set(status_code=status.get("code"))
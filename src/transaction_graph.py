@@ -1,27 +1,79 @@
-import networkx as nx
+import numpy as np
+import scipy.sparse as sp
 
-def build_transaction_graph(transactions):
-    G = nx.DiGraph()
+from src.symbols import account_count
 
-    for tx in transactions:
-        sender = tx["sender_id"]
-        receiver = tx["receiver_id"]
-        amount = float(tx["amount"])
+GRAPH_CENTRALITY_THRESHOLD = 0.2
 
-        G.add_edge(sender, receiver, amount=amount)
+def build_transaction_graph(transactions, n_accounts=None):
+    n = n_accounts if n_accounts is not None else account_count(transactions)
+
+    # Sparse sender x receiver matrix over account codes; repeated
+    # transfers between the same pair are summed
+    G = sp.csr_matrix(
+        (
+            transactions["amount"],
+            (transactions["sender_id"], transactions["receiver_id"])
+        ),
+        shape=(n, n)
+    )
+    G.sum_duplicates()
 
     return G
 
 
-def detect_graph_anomalies(G):
-    risk_scores = {}
+def build_corridor_graph(sketches, n_accounts):
+    # Sketch mode: only the heaviest corridors become edges, weighted by
+    # their estimated transfer counts, so the graph stays bounded
+    senders, receivers, counts = sketches.top_corridors()
+    inside = (senders < n_accounts) & (receivers < n_accounts)
+
+    G = sp.csr_matrix(
+        (
+            counts[inside].astype(np.float64),
+            (senders[inside], receivers[inside])
+        ),
+        shape=(n_accounts, n_accounts)
+    )
+
+    return G
+
+
+def degree_counts(G, sketches=None):
+    # distinct out-neighbours + distinct in-neighbours per account
+    if sketches is not None:
+        # Sketch mode: HyperLogLog distinct counterparties over history
+        n = G.shape[0]
+        return sketches.distinct_receivers(n) + sketches.distinct_senders(n)
+
+    structure = G.copy()
+    structure.data[:] = 1
+
+    return (
+        np.asarray(structure.sum(axis=1)).ravel()
+        + np.asarray(structure.sum(axis=0)).ravel()
+    )
+
+
+def normalize_degree(degree):
+    # Same definition as nx.degree_centrality on a DiGraph:
+    # degree / (nodes - 1), where nodes are accounts with any edge
+    nodes = degree > 0
+    node_count = int(nodes.sum())
+
+    centrality = np.zeros(len(degree))
+    if node_count == 1:
+        centrality[nodes] = 1.0
+    elif node_count > 1:
+        centrality[nodes] = degree[nodes] / (node_count - 1)
+
+    return centrality
+
 
-    degree_centrality = nx.degree_centrality(G)
+def degree_centrality(G, sketches=None):
+    return normalize_degree(degree_counts(G, sketches))
 
-    for node, score in degree_centrality.items():
-        if score > 0.2:
-            risk_scores[node] = "HIGH"
-        else:
-            risk_scores[node] = "LOW"
 
-    return risk_scores
+def detect_graph_anomalies(G, sketches=None, threshold=GRAPH_CENTRALITY_THRESHOLD):
+    # True = HIGH, aligned with account codes
+    return degree_centrality(G, sketches) > threshold
@@ -0,0 +1,146 @@
+"""
+Multi-Window Velocity Features
+Per-sender transaction count, amount and distinct receivers over the
+1-minute, 1-hour and 24-hour windows ending at the sender's latest
+transaction, plus the ratio of that window to the account's lifetime
+baseline rate.
+"""
+
+import numpy as np
+
+from src.symbols import grow
+
+MINUTE_US = 60_000_000
+
+WINDOWS = {
+    "1m": MINUTE_US,
+    "1h": 60 * MINUTE_US,
+    "24h": 24 * 60 * MINUTE_US,
+}
+
+VELOCITY_FEATURES = [
+    f"{metric}_{window}"
+    for window in WINDOWS
+    for metric in ("tx_count", "amount_sum", "distinct_receivers", "velocity_ratio")
+]
+
+_TAIL_FIELDS = ("sender_id", "receiver_id", "amount", "timestamp")
+
+
+class VelocityState:
+    """
+    Incremental velocity state: lifetime totals per account plus the
+    recent tail of transactions (the longest window per sender).
+    Each update only touches the tail and the new rows.
+    """
+
+    def __init__(self, n_accounts=0):
+        self.count = np.zeros(n_accounts, dtype=np.int64)
+        self.first_ts = np.full(n_accounts, np.iinfo(np.int64).max)
+        self.last_ts = np.full(n_accounts, np.iinfo(np.int64).min)
+        self.features = {
+            name: np.zeros(n_accounts) for name in VELOCITY_FEATURES
+        }
+        self.tail = {
+            "sender_id": np.empty(0, dtype=np.int32),
+            "receiver_id": np.empty(0, dtype=np.int32),
+            "amount": np.empty(0, dtype=np.float64),
+            "timestamp": np.empty(0, dtype=np.int64),
+        }
+
+    def _resize(self, n):
+        self.count = grow(self.count, n, 0)
+        self.first_ts = grow(self.first_ts, n, np.iinfo(np.int64).max)
+        self.last_ts = grow(self.last_ts, n, np.iinfo(np.int64).min)
+        for name in self.features:
+            self.features[name] = grow(self.features[name], n, 0.0)
+
+    def update(self, transactions, n_accounts=None):
+        senders = transactions["sender_id"]
+        if n_accounts is None:
+            n_accounts = max(
+                len(self.count),
+                int(senders.max()) + 1 if len(senders) else 0,
+                int(transactions["receiver_id"].max()) + 1 if len(senders) else 0,
+            )
+        self._resize(n_accounts)
+
+        if len(senders) == 0:
+            return self.features
+
+        timestamps = transactions["timestamp"]
+
+        # Lifetime totals
+        self.count += np.bincount(senders, minlength=len(self.count))
+        np.minimum.at(self.first_ts, senders, timestamps)
+        np.maximum.at(self.last_ts, senders, timestamps)
+
+        tail = {
+            field: np.concatenate([self.tail[field], transactions[field]])
+            for field in _TAIL_FIELDS
+        }
+
+        touched = np.unique(senders)
+        if len(touched) < len(self.count):
+            # Only the touched senders' tail rows can change
+            mine = np.isin(tail["sender_id"], touched)
+            self._compute({f: v[mine] for f, v in tail.items()}, touched)
+        else:
+            self._compute(tail, touched)
+
+        # Keep only what can still fall inside the longest window
+        horizon = self.last_ts[tail["sender_id"]] - max(WINDOWS.values())
+        keep = tail["timestamp"] >= horizon
+        self.tail = {field: values[keep] for field, values in tail.items()}
+
+        return self.features
+
+    def _compute(self, tail, touched):
+        # One pass over (sender, time)-sorted arrays
+        order = np.lexsort((tail["timestamp"], tail["sender_id"]))
+        s = tail["sender_id"][order]
+        t = tail["timestamp"][order]
+        a = tail["amount"][order]
+        r = tail["receiver_id"][order]
+
+        # Time of the previous transfer to the same receiver (same sender)
+        pair_order = np.lexsort((t, r, s))
+        same_pair = np.zeros(len(s), dtype=bool)
+        same_pair[1:] = (
+            (s[pair_order][1:] == s[pair_order][:-1])
+            & (r[pair_order][1:] == r[pair_order][:-1])
+        )
+        previous_pair_ts = np.full(len(s), np.iinfo(np.int64).min)
+        shifted = np.empty(len(s), dtype=np.int64)
+        shifted[0] = np.iinfo(np.int64).min
+        shifted[1:] = t[pair_order][:-1]
+        previous_pair_ts[pair_order] = np.where(same_pair, shifted, np.iinfo(np.int64).min)
+
+        n = len(self.count)
+        latest = self.last_ts[s]
+        span = np.maximum(self.last_ts - self.first_ts, 0).astype(np.float64)
+
+        for window, width in WINDOWS.items():
+            start = latest - width
+            inside = t > start
+            # first transfer to this receiver inside the window
+            first_in_window = inside & (previous_pair_ts <= start)
+
+            tx_count = np.bincount(s, weights=inside, minlength=n)
+            amount_sum = np.bincount(s, weights=a * inside, minlength=n)
+            receivers = np.bincount(s, weights=first_in_window, minlength=n)
+
+            # Expected transactions per window at the lifetime average rate
+            baseline = self.count * width / np.maximum(span, width)
+
+            self.features[f"tx_count_{window}"][touched] = tx_count[touched]
+            self.features[f"amount_sum_{window}"][touched] = amount_sum[touched]
+            self.features[f"distinct_receivers_{window}"][touched] = receivers[touched]
+            self.features[f"velocity_ratio_{window}"][touched] = (
+                tx_count[touched] / np.maximum(baseline[touched], 1e-9)
+            )
+
+
+def compute_velocity_features(transactions, n_accounts=None):
+    state = VelocityState()
+    return state.update(transactions, n_accounts)
@@ -0,0 +1,49 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Process-wide singletons in api.py, reset for every API test
+API_SINGLETONS = (
+    "_state", "_catch_up", "_view", "_alerts", "_evolution",
+    "_batcher", "_scorer_source", "_writer",
+)
+
+
+@pytest.fixture(scope="session")
+def corpus(tmp_path_factory):
+    from src.data_generator import generate_corpus
+
+    path = tmp_path_factory.mktemp("corpus") / "transactions.csv"
+    generate_corpus(str(path), 3_000, users=300, devices=150, seed=7)
+    return path
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, corpus):
+    # A private copy of the corpus at the API's relative store path
+    (tmp_path / "data").mkdir()
+    shutil.copy(corpus, tmp_path / "data" / "transactions.csv")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "data" / "transactions.csv"
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import api
+    import main
+
+    for name in API_SINGLETONS:
+        monkeypatch.setattr(api, name, None)
+    monkeypatch.setattr(api, "_catch_up_failures", 0)
+    monkeypatch.setattr(api, "_catch_up_retry_at", 0.0)
+    monkeypatch.setattr(api, "_catch_up_error", None)
+
+    # No lifespan: the background state load and evolution clock stay off
+    return TestClient(main.app)
@@ -0,0 +1,68 @@
+import numpy as np
+
+from src import alerts
+from src.alerts import AlertEngine, pipeline_alerts
+from src.symbols import Symbols
+
+
+def _state(cycle_risk, broker, symbols):
+    n = len(cycle_risk)
+    return {
+        "cycles": {"cycle_risk": np.array(cycle_risk, dtype=bool)},
+        "betweenness": {"broker": np.array(broker, dtype=bool)},
+        "final_risk": {"risk_score": np.full(n, 0.5)},
+        "symbols": symbols,
+    }
+
+
+def _symbols(n):
+    symbols = Symbols()
+    symbols.accounts.encode([f"U{i}" for i in range(n)])
+    return symbols
+
+
+def test_republished_hits_are_not_resubmitted():
+    symbols = _symbols(4)
+    first = _state([True, False, False], [False, True, False], symbols)
+    assert len(pipeline_alerts(first)) == 2
+
+    # Same findings plus one new cycle member and one new account
+    second = _state([True, False, True, True], [False, True, False, False], symbols)
+    records = pipeline_alerts(second, first)
+    assert [(r["account_id"], r["kind"]) for r in records] == [
+        ("U2", "ROUND_TRIPPING"), ("U3", "ROUND_TRIPPING"),
+    ]
+    assert pipeline_alerts(second, second) == []
+
+
+def test_republication_does_not_escalate(tmp_path):
+    engine = AlertEngine(path=str(tmp_path / "alerts.jsonl"), clock=lambda: 1000.0)
+    symbols = _symbols(2)
+    state = _state([True, False], [False, False], symbols)
+
+    engine.submit_many(pipeline_alerts(state))
+    for _ in range(5):
+        engine.submit_many(pipeline_alerts(state, state))
+
+    alert = engine.queue()["alerts"][0]
+    assert alert["count"] == 1
+    assert alert["severity"] == "HIGH"
+
+
+def test_history_is_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr(alerts, "HISTORY_MAX_BYTES", 4_096)
+    path = tmp_path / "alerts.jsonl"
+    clock = iter(range(10_000))
+    engine = AlertEngine(path=str(path), clock=lambda: float(next(clock)))
+
+    for _ in range(200):
+        engine.submit("U1", "VELOCITY", "LOW", 0.2)
+        engine.submit("U2", "VELOCITY", "MEDIUM", 0.4)
+    assert path.stat().st_size <= 2 * 4_096
+
+    queue = engine.queue()
+    replayed = AlertEngine(path=str(path), clock=lambda: 10_000.0)
+    assert replayed.queue()["alerts"] == queue["alerts"]
+    assert [a["count"] for a in queue["alerts"]] == [200, 200]
+    history = engine.history()["alerts"]
+    assert sorted(a["account_id"] for a in history) == ["U1", "U2"]
@@ -0,0 +1,57 @@
+import json
+from multiprocessing import get_context
+
+import pandas as pd
+
+from src import backfill
+from src.anomaly_detector import save_behavior_model
+from src.behavior_features import load_transactions
+from src.pipeline import run_layers
+from src.symbols import SYMBOLS
+
+
+def _model(corpus, tmp_path):
+    transactions = load_transactions(str(corpus))
+    layers = run_layers(transactions, len(SYMBOLS.accounts), len(SYMBOLS.devices))
+    path = str(tmp_path / "model.joblib")
+    save_behavior_model(layers["behavior_model"], path)
+    return path
+
+
+def test_spawned_workers_decode_account_names(corpus, tmp_path, monkeypatch):
+    # Spawned workers start with an empty SYMBOLS table
+    monkeypatch.setattr(backfill, "get_context", lambda: get_context("spawn"))
+    output = tmp_path / "out"
+
+    manifest = backfill.run_backfill(
+        path=str(corpus), output_dir=str(output), partition="week", workers=2,
+        model_path=_model(corpus, tmp_path), config_path=None, progress=None,
+    )
+
+    partitions = manifest["partitions"]
+    assert len(partitions) > 1
+    for entry in partitions.values():
+        frame = pd.read_csv(output / entry["file"])
+        assert len(frame) == entry["accounts"]
+        assert frame["account_id"].str.len().min() > 0
+
+
+def test_changed_source_rescores(corpus, tmp_path):
+    model_path = _model(corpus, tmp_path)
+    output = tmp_path / "out"
+    copy = tmp_path / "copy.csv"
+    copy.write_bytes(corpus.read_bytes())
+
+    first = backfill.run_backfill(
+        path=str(corpus), output_dir=str(output), partition="week",
+        model_path=model_path, config_path=None, progress=None,
+    )
+    assert all(e["source"] == str(corpus) for e in first["partitions"].values())
+
+    second = backfill.run_backfill(
+        path=str(copy), output_dir=str(output), partition="week",
+        model_path=model_path, config_path=None, progress=None,
+    )
+    assert all(e["source"] == str(copy) for e in second["partitions"].values())
+    saved = json.loads((output / backfill.MANIFEST).read_text())
+    assert saved["source"] == str(copy)
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+
+from src.data_generator import generate_corpus
+
+
+def test_timestamps_never_go_backwards_across_chunks(tmp_path):
+    path = str(tmp_path / "corpus.csv")
+    generate_corpus(path, 5_000, users=200, devices=50, chunk_size=500, span_days=1, seed=3)
+
+    timestamps = pd.to_datetime(pd.read_csv(path)["timestamp"]).values
+    timestamps = timestamps.astype("datetime64[us]").astype(np.int64)
+    assert len(timestamps) == 5_000
+    assert np.all(np.diff(timestamps) >= 0)
+
+    start = pd.Timestamp("2026-01-01T00:00:00").value // 1000
+    assert timestamps[0] >= start
+    assert timestamps[-1] < start + 86_400_000_000
+
+
+def test_output_does_not_depend_on_workers(tmp_path):
+    serial, parallel = tmp_path / "serial.csv", tmp_path / "parallel.csv"
+    generate_corpus(str(serial), 2_000, users=100, devices=20, chunk_size=300, seed=5)
+    generate_corpus(str(parallel), 2_000, workers=2, users=100, devices=20, chunk_size=300, seed=5)
+    assert serial.read_bytes() == parallel.read_bytes()
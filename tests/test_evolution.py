@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from src.risk_evolution import RiskEvolution
+from src.symbols import Symbols
+
+
+@pytest.fixture
+def evolution(client, monkeypatch):
+    import api
+
+    symbols = Symbols()
+    symbols.accounts.encode(["U0", "U1", "U2"])
+    evolution = RiskEvolution(seed=1)
+    evolution.sync({
+        "final_risk": {"risk_score": np.array([0.1, 0.5, 0.9])},
+        "accounts": np.arange(3),
+        "graph": sp.csr_matrix((3, 3)),
+        "symbols": symbols,
+    })
+    # No background clock: ticks only when the test asks
+    monkeypatch.setattr(api, "_evolution", evolution)
+    return evolution
+
+
+@pytest.mark.parametrize("delta", ["nan", "inf", "-inf", -0.5, 0, 1.5])
+def test_inject_rejects_out_of_range_delta(client, evolution, delta):
+    before = evolution.scores.copy()
+
+    response = client.post("/aml/evolution/inject", json={"accounts": ["U0"], "delta": delta})
+
+    assert response.status_code == 422
+    assert np.array_equal(evolution.scores, before)
+    assert client.get("/aml/evolution/accounts").status_code == 200
+
+
+def test_inject_raises_scores_up_to_one(client, evolution):
+    response = client.post(
+        "/aml/evolution/inject", json={"accounts": ["U0", "U2", "unknown"], "delta": 0.3}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["applied"] == 2
+    assert evolution.scores.tolist() == pytest.approx([0.4, 0.5, 1.0])
@@ -0,0 +1,26 @@
+import statistics
+
+import pytest
+
+from benchmarks.import_budget import (
+    BACKEND_MODULES,
+    DEFAULT_BUDGET_MS,
+    DEFERRED_MODULES,
+    loaded_modules,
+    measure_import,
+)
+
+
+def test_import_main_within_budget():
+    # NEUROAML_IMPORT_BUDGET_MS overrides the budget on slow runners
+    median = statistics.median(measure_import("main")[0] for _ in range(3))
+    assert median <= DEFAULT_BUDGET_MS, f"import main took {median:.1f} ms"
+
+
+def test_main_defers_heavy_modules():
+    assert not loaded_modules("main") & set(DEFERRED_MODULES)
+
+
+@pytest.mark.parametrize("module", BACKEND_MODULES)
+def test_backend_modules_import_without_streamlit(module):
+    assert "streamlit" not in loaded_modules(module)
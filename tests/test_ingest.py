@@ -0,0 +1,83 @@
+import pytest
+
+
+def _transaction(**fields):
+    return {
+        "sender_id": "user_1",
+        "receiver_id": "user_2",
+        "amount": 120.0,
+        "timestamp": "2026-02-01T00:00:00",
+        **fields,
+    }
+
+
+@pytest.mark.parametrize("amount", ["nan", "inf", "-inf", -5, 1e308])
+def test_rejects_invalid_amounts_before_writing(client, store, amount):
+    before = store.read_bytes()
+
+    response = client.post("/aml/transactions", json=[_transaction(), _transaction(amount=amount)])
+
+    assert response.status_code == 422
+    assert store.read_bytes() == before
+
+
+@pytest.mark.parametrize("field", ["sender_id", "receiver_id", "location", "device_id"])
+def test_rejects_line_breaks_in_string_fields(client, store, field):
+    before = store.read_bytes()
+
+    response = client.post("/aml/transactions", json=[_transaction(**{field: "a\nb"})])
+
+    assert response.status_code == 422
+    assert store.read_bytes() == before
+
+
+def test_accepted_rows_load_back(client, store):
+    from src.behavior_features import load_transaction_range
+
+    response = client.post("/aml/transactions", json=[_transaction(), _transaction(amount="75.5")])
+
+    assert response.status_code == 200
+    batch, _ = load_transaction_range(str(store))
+    assert batch["amount"][-2:].tolist() == [120.0, 75.5]
+
+
+def test_failed_commit_is_rolled_back(client, store, monkeypatch):
+    import os
+    from src import storage
+
+    before = store.read_bytes()
+    real_fsync = os.fsync
+    calls = []
+
+    def failing_fsync(fd):
+        # The rows reached the file; only the fsync fails
+        calls.append(fd)
+        if len(calls) == 1:
+            raise OSError(28, "No space left on device")
+        return real_fsync(fd)
+
+    monkeypatch.setattr(storage.os, "fsync", failing_fsync)
+
+    response = client.post("/aml/transactions", json=[_transaction()])
+    assert response.status_code == 503
+    assert store.read_bytes() == before
+
+    response = client.post("/aml/transactions", json=[_transaction()])
+    assert response.status_code == 200
+    assert response.json()["first_offset"] == storage.count_rows(str(store)) - 1
+
+
+def test_commit_timeout_is_503(client, monkeypatch):
+    from concurrent.futures import Future
+
+    import api
+
+    class StalledWriter:
+        def submit(self, payload, rows):
+            return Future()
+
+    monkeypatch.setattr(api, "get_writer", lambda: StalledWriter())
+    monkeypatch.setattr(api, "INGEST_TIMEOUT_S", 0.01)
+
+    response = client.post("/aml/transactions", json=[_transaction()])
+    assert response.status_code == 503
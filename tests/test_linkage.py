@@ -0,0 +1,59 @@
+import copy
+
+import numpy as np
+
+from src import device_linkage
+from src.device_linkage import LinkageIndex
+
+
+def _pairs(seed, size):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 2_000, size), rng.integers(0, 500, size)
+
+
+def test_incremental_updates_match_one_build(monkeypatch):
+    monkeypatch.setattr(device_linkage, "MIN_PENDING", 64)
+    accounts, devices = _pairs(1, 20_000)
+
+    whole = LinkageIndex()
+    whole.update(accounts, devices)
+
+    incremental = LinkageIndex()
+    for lo in range(0, len(accounts), 700):
+        incremental.update(accounts[lo:lo + 700], devices[lo:lo + 700])
+
+    assert len(incremental) == len(whole)
+    assert (incremental.incidence(2_000, 500) != whole.incidence(2_000, 500)).nnz == 0
+    for code in (0, 7, 1_999):
+        assert np.array_equal(incremental.values_for(code), whole.values_for(code))
+    for code in (0, 3, 499):
+        assert np.array_equal(incremental.accounts_for(code), whole.accounts_for(code))
+
+
+def test_small_update_does_not_rebuild_the_index():
+    accounts, devices = _pairs(2, 50_000)
+    index = LinkageIndex()
+    index.update(accounts, devices)
+    main = index._by_account
+
+    index.update([5_000], [1])
+
+    assert index._by_account is main
+    assert index.values_for(5_000).tolist() == [1]
+    assert 5_000 in index.accounts_for(1)
+
+
+def test_copy_is_independent_and_saves_pending(tmp_path):
+    accounts, devices = _pairs(3, 5_000)
+    index = LinkageIndex()
+    index.update(accounts, devices)
+
+    copied = copy.copy(index)
+    copied.update([9_999], [42])
+    assert len(copied) == len(index) + 1
+    assert index.values_for(9_999).size == 0
+
+    copied.save(tmp_path / "devices.npz")
+    loaded = LinkageIndex.load(tmp_path / "devices.npz")
+    assert len(loaded) == len(copied)
+    assert loaded.values_for(9_999).tolist() == [42]
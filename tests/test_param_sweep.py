@@ -0,0 +1,49 @@
+import json
+
+from benchmarks.param_sweep import (
+    default_parameters,
+    fusion_config,
+    live_fusion_config,
+    pareto_frontier,
+)
+from src.risk_engine import FusionEngine
+
+
+def _result(precision, recall, alerts, hits):
+    return {
+        "parameters": {}, "precision": precision, "recall": recall,
+        "f1": 0.0, "alerts": alerts, "hits": hits,
+    }
+
+
+def test_frontier_skips_configs_without_hits():
+    results = [
+        _result(0.0, 0.0, 1, 0),        # fewest alerts, catches nothing
+        _result(0.0, 0.0, 0, 0),
+        _result(0.5, 0.4, 40, 20),
+        _result(0.3, 0.6, 100, 30),
+        _result(0.2, 0.3, 100, 20),     # dominated
+    ]
+
+    frontier = pareto_frontier(results)
+
+    assert [(r["precision"], r["recall"]) for r in frontier] == [(0.3, 0.6), (0.5, 0.4)]
+
+
+def test_defaults_follow_the_live_config(tmp_path):
+    path = tmp_path / "risk_fusion.json"
+    rules = [{"name": "mule", "when": "behavior & linkage", "min_level": "HIGH"}]
+    path.write_text(json.dumps({
+        "weights": {"behavior": 0.7}, "max_score": 0.9, "rules": rules,
+    }))
+
+    live = live_fusion_config(str(path))
+    parameters = default_parameters(live)
+    assert parameters["weights.behavior"] == 0.7
+    assert parameters["weights.graph"] == 0.3
+
+    config = fusion_config(parameters, live)
+    assert config["rules"] == rules
+    assert config["max_score"] == 0.9
+    # Frontier "fusion" blocks load as a risk config unchanged
+    FusionEngine(path=None, config=config)
@@ -0,0 +1,27 @@
+import numpy as np
+
+from src import cycle_detection, pools
+from src.behavior_features import load_transactions
+from src.sharding import run_sharded_pipeline
+from src.symbols import SYMBOLS
+
+
+def test_pools_do_not_fork_the_api_process():
+    assert pools.POOL_START_METHOD in ("forkserver", "spawn")
+
+
+def test_pooled_results_match_in_process(corpus, monkeypatch):
+    # Small cycle-search jobs, so the pool gets several
+    monkeypatch.setattr(cycle_detection, "STARTS_PER_JOB", 50)
+    transactions = load_transactions(str(corpus))
+    n = len(SYMBOLS.accounts)
+
+    single = cycle_detection.detect_cycles(transactions, n, workers=1)
+    pooled = cycle_detection.detect_cycles(transactions, n, workers=2)
+    assert np.array_equal(single["cycle_risk"], pooled["cycle_risk"])
+    assert len(single["cycles"]) == len(pooled["cycles"])
+
+    single = run_sharded_pipeline(transactions, SYMBOLS, shards=2, workers=1)
+    pooled = run_sharded_pipeline(transactions, SYMBOLS, shards=2, workers=2)
+    assert np.array_equal(single["graph_risk"], pooled["graph_risk"])
+    assert (single["graph"] != pooled["graph"]).nnz == 0
@@ -0,0 +1,60 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.risk_engine import DEFAULT_FUSION_CONFIG, FusionEngine
+
+
+@pytest.mark.parametrize("config", [
+    {"rules": [{"when": "behavior - graph", "min_level": "HIGH"}]},
+    {"rules": ["oops"]},
+    {"rules": [{"name": "no_expression"}]},
+    {"weights": {"bogus": 0.5}},
+    {"weights": {"behavior": "nan"}},
+    {"max_score": "nan"},
+    {"thresholds": {"HIGH": "inf"}},
+    {"rules": [{"when": "behavior", "add": "inf"}]},
+])
+def test_invalid_configs_are_rejected(config):
+    with pytest.raises(ValueError):
+        FusionEngine(path=None, config=config)
+
+
+def test_flag_and_score_rules_load():
+    engine = FusionEngine(path=None, config={"rules": [
+        {"when": "~behavior & (linkage | (propagation >= 0.5))", "min_level": "MEDIUM"},
+        {"when": "score > 0.2", "add": 0.1},
+    ]})
+
+    fused = engine.fuse({
+        "behavior": np.array([False, True]),
+        "linkage": np.array([True, False]),
+        "propagation": np.array([0.1, 0.9]),
+    })
+    assert fused["final_risk"].tolist() == [1, 2]
+
+
+def test_bad_reload_keeps_config_and_reports(tmp_path):
+    path = tmp_path / "risk_fusion.json"
+    path.write_text(json.dumps({"weights": {"behavior": 0.9}}))
+    engine = FusionEngine(path=str(path))
+    assert engine.config["weights"]["behavior"] == 0.9
+
+    path.write_text(json.dumps({"rules": ["oops"]}))
+    # A fresh mtime even on coarse-grained file systems
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert engine.reload_if_changed() is False
+    assert engine.config["weights"]["behavior"] == 0.9
+    assert engine.last_error is not None and "oops" in engine.last_error
+
+    fused = engine.fuse({"behavior": np.array([True]), "graph": np.array([False])})
+    assert fused["final_risk"].tolist() == [2]
+
+
+def test_defaults_are_valid():
+    engine = FusionEngine(path=None, config=DEFAULT_FUSION_CONFIG)
+    assert engine.last_error is None
@@ -0,0 +1,117 @@
+import threading
+
+import numpy as np
+import pytest
+
+from src.realtime_scoring import MicroBatcher, normalize_transaction
+
+
+def _transaction(**fields):
+    return {
+        "transaction_id": "t1",
+        "sender_id": "user_1",
+        "receiver_id": "user_2",
+        "amount": 250.0,
+        "timestamp": "2026-02-01T00:00:00",
+        **fields,
+    }
+
+
+# -----------------------------------------------------
+# Endpoint
+# -----------------------------------------------------
+def test_score_returns_a_risk_level(client):
+    response = client.post("/aml/score", json=_transaction())
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["transaction_id"] == "t1"
+    assert body["risk_level"] in ("LOW", "MEDIUM", "HIGH")
+    assert body["reasons"]
+
+
+def test_score_batch_keeps_request_order(client):
+    records = [_transaction(transaction_id=f"t{i}") for i in range(5)]
+
+    response = client.post("/aml/score", json=records)
+
+    assert [r["transaction_id"] for r in response.json()] == [f"t{i}" for i in range(5)]
+
+
+@pytest.mark.parametrize("amount", ["nan", "inf", "1e308", -1])
+def test_invalid_amount_never_reaches_the_scorer(client, amount):
+    import api
+
+    client.post("/aml/score", json=_transaction())
+    scorer = api._batcher.scorer
+    code = scorer.symbols.accounts.code("user_1")
+    before = (scorer.count[code], scorer.total[code], scorer.max_amount[code])
+
+    response = client.post("/aml/score", json=_transaction(amount=amount))
+
+    assert response.status_code == 422
+    assert (scorer.count[code], scorer.total[code], scorer.max_amount[code]) == before
+    assert np.isfinite(scorer.total).all()
+
+
+# -----------------------------------------------------
+# Scorer
+# -----------------------------------------------------
+def test_scoring_updates_the_sender_profile(client):
+    import api
+
+    client.post("/aml/score", json=_transaction())
+    scorer = api._batcher.scorer
+    code = scorer.symbols.accounts.code("user_1")
+    count, total = scorer.count[code], scorer.total[code]
+
+    scorer.score([normalize_transaction(_transaction(amount=40.0))])
+
+    assert scorer.count[code] == count + 1
+    assert scorer.total[code] == pytest.approx(total + 40.0)
+
+
+def test_new_accounts_are_scored(client):
+    response = client.post("/aml/score", json=_transaction(sender_id="never_seen_before"))
+
+    assert response.status_code == 200
+
+
+# -----------------------------------------------------
+# Micro-Batching
+# -----------------------------------------------------
+class _EchoScorer:
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+
+    def score(self, records):
+        self.release.wait(5)
+        self.batches.append(len(records))
+        return [{"id": r} for r in records]
+
+
+def test_batcher_splits_results_per_request():
+    scorer = _EchoScorer()
+    batcher = MicroBatcher(scorer, max_wait_ms=50)
+
+    futures = [batcher.submit([f"{i}a", f"{i}b"]) for i in range(4)]
+    scorer.release.set()
+
+    assert [f.result(timeout=5) for f in futures] == [
+        [{"id": f"{i}a"}, {"id": f"{i}b"}] for i in range(4)
+    ]
+    assert sum(scorer.batches) == 8
+    assert len(scorer.batches) < 4
+
+
+def test_batcher_fails_every_request_of_a_failed_batch():
+    class Failing:
+        def score(self, records):
+            raise RuntimeError("model unavailable")
+
+    batcher = MicroBatcher(Failing())
+
+    with pytest.raises(RuntimeError):
+        batcher.submit(["x"]).result(timeout=5)
+    assert batcher.metrics.snapshot()["requests"] == 0
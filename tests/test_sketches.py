@@ -0,0 +1,83 @@
+import numpy as np
+
+from src import pipeline
+from src.behavior_features import load_transactions
+from src.sketches import CounterpartySketches, HyperLogLogArray
+from src.symbols import SYMBOLS
+
+
+def _exact_distinct(accounts, items, n):
+    pairs = np.unique(np.stack([accounts, items]), axis=1)
+    return np.bincount(pairs[0], minlength=n)
+
+
+def test_sparse_hll_estimates_distinct_counts():
+    rng = np.random.default_rng(3)
+    accounts = rng.integers(0, 50, 20_000)
+    items = rng.integers(0, 2_000, 20_000)
+
+    hll = HyperLogLogArray()
+    hll.update(accounts, items)
+
+    exact = _exact_distinct(accounts, items, 50)
+    estimate = hll.estimate(50)
+    assert np.all(np.abs(estimate - exact) <= 0.3 * exact)
+
+
+def test_sparse_hll_stores_touched_registers_only():
+    hll = HyperLogLogArray()
+    # A single transfer from a high account code allocates one register
+    hll.update([1_000_000], [42])
+
+    assert len(hll.keys) == 1
+    assert len(hll) == 1_000_001
+    assert hll.estimate(10).sum() == 0.0
+
+
+def test_sparse_hll_merge_matches_single_update():
+    rng = np.random.default_rng(5)
+    accounts = rng.integers(0, 20, 5_000)
+    items = rng.integers(0, 500, 5_000)
+
+    whole = HyperLogLogArray()
+    whole.update(accounts, items)
+
+    left, right = HyperLogLogArray(), HyperLogLogArray()
+    left.update(accounts[:2_000], items[:2_000])
+    right.update(accounts[2_000:], items[2_000:])
+    left.merge(right)
+
+    assert np.array_equal(left.keys, whole.keys)
+    assert np.array_equal(left.ranks, whole.ranks)
+
+
+def test_sketches_round_trip(tmp_path, corpus):
+    transactions = load_transactions(str(corpus))
+    n = len(SYMBOLS.accounts)
+
+    sketches = CounterpartySketches(width=1 << 12, top_k=50)
+    sketches.update(transactions)
+    sketches.save(tmp_path / "sketches.npz")
+    loaded = CounterpartySketches.load(tmp_path / "sketches.npz")
+
+    assert np.array_equal(loaded.distinct_receivers(n), sketches.distinct_receivers(n))
+    assert np.array_equal(loaded.distinct_senders(n), sketches.distinct_senders(n))
+    assert loaded.corridors.k == 50
+
+
+def test_sketch_mode_graph_uses_corridors_only(corpus, monkeypatch):
+    transactions = load_transactions(str(corpus))
+    n = len(SYMBOLS.accounts)
+
+    def exact_graph(*args, **kwargs):
+        raise AssertionError("sketch mode built the exact graph")
+
+    monkeypatch.setattr(pipeline, "build_transaction_graph", exact_graph)
+
+    sketches = CounterpartySketches(width=1 << 12, top_k=50)
+    sketches.update(transactions)
+    layers = pipeline.run_layers(transactions, n, len(SYMBOLS.devices), sketches)
+
+    graph = layers["graph"]
+    assert graph.shape == (n, n)
+    assert 0 < graph.nnz <= 50
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+import api
+
+
+def _append(store, rows):
+    with open(store, "a") as file:
+        for i, (sender, receiver) in enumerate(rows):
+            file.write(
+                f"appended_{i},{sender},{receiver},500.0,2026-03-01T00:00:0{i},"
+                f"Chennai,Transfer,device_x\n"
+            )
+
+
+def _wait_for_catch_up():
+    thread = api._catch_up
+    if thread is not None:
+        thread.join(60)
+
+
+def _fail(*args, **kwargs):
+    raise AssertionError("unexpected pipeline build")
+
+
+def test_warm_start_maps_the_snapshot(client, monkeypatch):
+    cold = api.get_pipeline_state()
+
+    monkeypatch.setattr(api, "_state", None)
+    monkeypatch.setattr(api, "build_pipeline_state", _fail)
+    warm = api.get_pipeline_state()
+
+    assert warm is not cold
+    assert warm["watermark"] == cold["watermark"]
+    np.testing.assert_array_equal(warm["final_risk"]["risk_score"], cold["final_risk"]["risk_score"])
+
+
+def test_catch_up_folds_in_appended_rows(client, store):
+    base = api.get_pipeline_state()
+    _append(store, [("catch_up_sender", "user_1")])
+
+    api.get_pipeline_state()
+    _wait_for_catch_up()
+    state = api.get_pipeline_state()
+
+    assert state is not base
+    assert state["watermark"] == store.stat().st_size
+    assert state["symbols"].accounts.code("catch_up_sender") in state["accounts"]
+
+    # The caught-up device index matches one built over the whole store
+    from src.device_linkage import build_linkage_indexes
+
+    devices = state["linkage_indexes"]["devices"]
+    rebuilt = build_linkage_indexes(state["transactions"])["devices"]
+    assert (devices.incidence() != rebuilt.incidence()).nnz == 0
+    assert len(base["linkage_indexes"]["devices"]) < len(devices)
+
+
+def test_regenerated_store_is_rebuilt_not_caught_up(client, store, monkeypatch):
+    api.get_pipeline_state()
+
+    # Same path, different and larger content
+    lines = store.read_text().splitlines(keepends=True)
+    store.write_text(lines[0] + "".join(reversed(lines[1:])) + "".join(lines[1:50]))
+
+    monkeypatch.setattr(api, "_state", None)
+    state = api.get_pipeline_state()
+
+    assert state["watermark"] == store.stat().st_size
+    assert api._catch_up is None
+
+
+def test_failed_catch_up_backs_off(client, store, monkeypatch):
+    api.get_pipeline_state()
+
+    def broken(path=None, base=None):
+        raise OSError("store unreadable")
+
+    monkeypatch.setattr(api, "build_pipeline_state", broken)
+    _append(store, [("backoff_sender", "user_1")])
+
+    api.get_pipeline_state()
+    _wait_for_catch_up()
+    assert api._catch_up_failures == 1
+    assert "store unreadable" in api._catch_up_error
+
+    # Within the retry delay no new attempt is started
+    api.get_pipeline_state()
+    assert api._catch_up is None
+    assert client.get("/aml/metrics").json()["catch_up"]["failures"] == 1
+
+
+def test_explain_account_interned_after_the_state(client):
+    api.get_pipeline_state()
+    client.post("/aml/score", json={
+        "sender_id": "brand_new_user", "receiver_id": "user_1", "amount": 10.0
+    })
+
+    response = client.get("/aml/explain/brand_new_user")
+
+    assert response.status_code == 200
+    assert response.json()["risk"] == {}
+
+
+@pytest.mark.parametrize("endpoint", ["/aml/cycles", "/aml/brokers"])
+@pytest.mark.parametrize("limit", [-1, 0, 100_000])
+def test_detector_pages_reject_bad_limits(client, endpoint, limit):
+    assert client.get(endpoint, params={"limit": limit}).status_code == 422
+
+
+@pytest.mark.parametrize("endpoint,key", [("/aml/cycles", "cycles"), ("/aml/brokers", "brokers")])
+def test_detector_pages_honour_limit(client, endpoint, key):
+    response = client.get(endpoint, params={"limit": 1})
+    assert response.status_code == 200
+    assert len(response.json()[key]) <= 1
@@ -0,0 +1,39 @@
+import csv
+
+from src.storage import count_rows, encode_rows, save_transactions
+
+
+def _row(i, location="Mumbai"):
+    return {
+        "transaction_id": f"T{i}",
+        "sender_id": f"U{i}",
+        "receiver_id": f"U{i + 1}",
+        "amount": 10.0 + i,
+        "timestamp": "2026-02-01T00:00:00",
+        "location": location,
+        "device_id": "D1",
+    }
+
+
+def test_count_rows_ignores_quoted_line_breaks(tmp_path):
+    path = str(tmp_path / "transactions.csv")
+    rows = [_row(0), _row(1, 'multi\nline "quoted"\r\nplace'), _row(2), _row(3, "a,b")]
+    save_transactions(rows, path)
+    save_transactions([_row(4, "\n")], path)
+
+    with open(path, newline="") as file:
+        parsed = list(csv.DictReader(file))
+    assert len(parsed) == 5
+    assert count_rows(path) == 5
+
+
+def test_count_rows_across_read_chunks(tmp_path):
+    path = tmp_path / "transactions.csv"
+    # A quoted field spanning the 1 MiB read boundary
+    location = "x" * (1 << 20) + "\n" + "y" * 10
+    save_transactions([_row(0), _row(1, location), _row(2)], str(path))
+    assert count_rows(str(path)) == 3
+
+
+def test_encode_rows_quotes_line_breaks():
+    assert b'"a\nb"' in encode_rows([_row(0, "a\nb")])
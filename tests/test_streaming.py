@@ -0,0 +1,84 @@
+import json
+
+from src.streaming import decode_lines
+
+
+def _line(i):
+    return json.dumps({
+        "transaction_id": f"t{i}",
+        "sender_id": f"user_{i}",
+        "receiver_id": f"user_{i + 1}",
+        "amount": 100.0 + i,
+        "timestamp": "2026-01-01T00:00:00",
+        "location": "Chennai",
+        "merchant_category": "Transfer",
+        "device_id": f"device_{i}",
+    }) + "\n"
+
+
+def test_bad_json_line_rejects_only_itself():
+    lines = [_line(0), "{not json\n", _line(1), _line(2), _line(3)]
+
+    records, rejected = decode_lines(lines)
+
+    assert [r["transaction_id"] for r in records] == ["t0", "t1", "t2", "t3"]
+    assert rejected == 1
+
+
+def test_file_tail_reads_past_lines_longer_than_a_read(tmp_path):
+    from src.streaming import MAX_LINE_BYTES, READ_CHUNK_BYTES, FileTailConnector
+
+    long_line = _line(1).replace('"t1"', '"t1", "note": "' + "x" * READ_CHUNK_BYTES + '"')
+    path = tmp_path / "tail.jsonl"
+    path.write_text(
+        _line(0) + long_line + "{" + "y" * MAX_LINE_BYTES + "\n" + _line(2)
+    )
+
+    connector = FileTailConnector(str(path), follow=False)
+    batches = list(connector.read_lines())
+    records, rejected = decode_lines([line for lines, _ in batches for line in lines])
+
+    assert [r["transaction_id"] for r in records] == ["t0", "t1", "t2"]
+    assert connector.offset == path.stat().st_size
+    assert connector.gauges.rejected == 1
+
+
+def test_file_tail_rejects_undecodable_lines(tmp_path):
+    from src.streaming import FileTailConnector
+
+    path = tmp_path / "tail.jsonl"
+    path.write_bytes(_line(0).encode() + b"\xff\xfe\n" + _line(1).encode())
+
+    connector = FileTailConnector(str(path), follow=False)
+    lines = [line for batch, _ in connector.read_lines() for line in batch]
+    records, rejected = decode_lines(lines)
+
+    assert [r["transaction_id"] for r in records] == ["t0", "t1"]
+    assert connector.gauges.rejected == 1
+    assert connector.offset == path.stat().st_size
+
+
+def test_file_tail_splits_on_newlines_only(tmp_path):
+    from src.streaming import FileTailConnector
+
+    # A raw U+2028 inside a record is not a line break
+    path = tmp_path / "tail.jsonl"
+    record = _line(0).replace('"Chennai"', '"Chen\u2028nai"')
+    path.write_text(record + _line(1), encoding="utf-8")
+
+    connector = FileTailConnector(str(path), follow=False)
+    lines = [line for batch, _ in connector.read_lines() for line in batch]
+
+    assert len(lines) == 2
+    records, rejected = decode_lines(lines)
+    assert rejected == 0
+    assert records[0]["location"] == "Chen\u2028nai"
+
+
+def test_connector_requires_read_lines():
+    import pytest
+
+    from src.streaming import Connector
+
+    with pytest.raises(TypeError):
+        Connector("abstract")
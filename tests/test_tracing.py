@@ -0,0 +1,35 @@
+from src import tracing
+from src.tracing import Span, Tracer
+
+
+def test_failing_trace_file_disables_the_sink(tmp_path, monkeypatch):
+    # A directory where the trace file should be: every open fails
+    path = tmp_path / "traces.jsonl"
+    path.mkdir()
+    sink = Tracer(enabled=True, buffer=8, path=str(path))
+    monkeypatch.setattr(tracing, "tracer", sink)
+
+    with Span("request", {}):
+        pass
+    with Span("request", {}):
+        pass
+
+    assert len(sink.traces) == 2
+    assert sink.write_errors == 1
+    assert sink.path is None
+    assert str(path) in sink.file_error
+
+
+def test_trace_file_rotates(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    sink = Tracer(enabled=True, buffer=8, path=str(path))
+    monkeypatch.setattr(tracing, "tracer", sink)
+    monkeypatch.setattr(tracing, "TRACE_FILE_BYTES", 1_000)
+
+    for _ in range(10):
+        with Span("request", {"padding": "x" * 100}):
+            pass
+
+    assert (tmp_path / "traces.jsonl.1").exists()
+    assert path.stat().st_size <= 1_000
+    assert sink.write_errors == 0